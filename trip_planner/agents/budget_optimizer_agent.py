@@ -1,5 +1,5 @@
 from crewai import Agent
-from model import llm
+from model import get_llm
 
 budget_optimizer = Agent(
     role="Travel Budget Optimizer",
@@ -26,6 +26,6 @@ budget_optimizer = Agent(
         "- Suggest at least 1 alternative option per major cost component\n"
         "- Keep the output structured for easy reading and integration with itineraries"
     ),
-    llm=llm,
+    llm=get_llm("budget_optimizer"),
     verbose=True,
 )
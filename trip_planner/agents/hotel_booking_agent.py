@@ -1,5 +1,5 @@
 from crewai import Agent
-from model import llm
+from model import get_llm
 from tools.hotel_booking_tool import HotelBookingTool
 
 hotel_booking_tool = HotelBookingTool()
@@ -18,6 +18,6 @@ hotel_booker = Agent(
         "You are meticulous about details and always provide booking confirmation."
     ),
     tools=[hotel_booking_tool],
-    llm=llm,
+    llm=get_llm("hotel_booker"),
     verbose=True,
 )
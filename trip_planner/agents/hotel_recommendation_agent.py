@@ -1,10 +1,17 @@
 from crewai import Agent
-from model import llm
+from model import get_llm
+from tools.batch_search_tool import BatchSearchTool
 from tools.duckduckgo_tool import DuckDuckGoSearchTool
-from tools.google_serper_tool import GoogleSerperSearchTool
+from tools.geo_tool import NearbyHotelsTool
+from tools.knowledge_search_tool import KnowledgeSearchTool
 
-google_search_tool = GoogleSerperSearchTool()
+# Answers from previously fetched results when it can, searching Google otherwise
+knowledge_search_tool = KnowledgeSearchTool()
 duckduckgo_search_tool = DuckDuckGoSearchTool()
+# Several queries per call, run concurrently and merged
+batch_search_tool = BatchSearchTool()
+# Proximity questions are answered from the local geo index of geocoded hotels and sights
+nearby_hotels_tool = NearbyHotelsTool()
 
 hotel_recommender = Agent(
     role="Hotel & Accommodation Specialist",
@@ -29,12 +36,15 @@ hotel_recommender = Agent(
         "4) Practical Tips (best neighborhoods to stay, peak/off-peak advice, safety & transport tips)\n"
         "5) Sources (linked list of references)\n\n"
         "Tool Usage Rules:\n"
-        "- For 'official listings, top-rated hotels' → use Google Serper Search\n"
+        "- For 'hotels near <attractions or areas>' → use Nearby Hotels first (destination plus the places); "
+        "search only if it has no hotels there\n"
+        "- For 'official listings, top-rated hotels' → use Travel Knowledge Search (pass the destination)\n"
         "- For 'local favorites, blogs, reviews' → use DuckDuckGo Search\n"
+        "- For more than one search (e.g. several areas or price bands) → use Batch Web Search with all the queries in one call\n"
         "- Compare multiple sources if info differs, and mention discrepancies\n"
         "- Include links for every recommendation"
     ),
-    tools=[google_search_tool, duckduckgo_search_tool], 
-    llm=llm,
+    tools=[nearby_hotels_tool, knowledge_search_tool, batch_search_tool, duckduckgo_search_tool], 
+    llm=get_llm("hotel_recommender"),
     verbose=True,
 )
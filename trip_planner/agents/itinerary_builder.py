@@ -1,6 +1,6 @@
 # agents/itinerary_planner.py
 from crewai import Agent, Task, Crew
-from model import llm
+from model import get_llm
 from typing import Dict, List, Any
 import json
 
@@ -38,6 +38,6 @@ itinerary_planner = Agent(
         "- Provide alternatives for weather/closure contingencies\n"
         "- Keep energy levels sustainable (don't over-pack days)"
     ),
-    llm=llm,
+    llm=get_llm("itinerary_planner"),
     verbose=True,
 )
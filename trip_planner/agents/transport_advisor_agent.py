@@ -1,11 +1,13 @@
 from crewai import Agent
-from model import llm
+from model import get_llm
+from tools.batch_search_tool import BatchSearchTool
 from tools.duckduckgo_tool import DuckDuckGoSearchTool
 from tools.google_serper_tool import GoogleSerperSearchTool
 from tools.ors_tool import ORSLocationTool  # Import the actual tool class
 
 google_search_tool = GoogleSerperSearchTool()
 duckduckgo_search_tool = DuckDuckGoSearchTool()
+batch_search_tool = BatchSearchTool()  # several queries per call, run concurrently and merged
 ors_search = ORSLocationTool()  # Create instance of the tool class
 
 transport_advisor = Agent(
@@ -34,11 +36,12 @@ transport_advisor = Agent(
         "Tool Usage Rules:\n"
         "- For official transport schedules or apps → use Google Serper Search\n"
         "- For local tips, blogs, forums → use DuckDuckGo Search\n"
+        "- For more than one search (e.g. trains, buses and local passes) → use Batch Web Search with all the queries in one call\n"
         "- For route planning and distance/time calculations → use OpenRouteService Location Route Finder\n"
         "- If conflicting information, mention discrepancies\n"
         "- Include links for every recommendation"
     ),
-    tools=[google_search_tool, duckduckgo_search_tool, ors_search],  
-    llm=llm,
+    tools=[google_search_tool, batch_search_tool, duckduckgo_search_tool, ors_search],  
+    llm=get_llm("transport_advisor"),
     verbose=True,
 )
\ No newline at end of file
@@ -1,11 +1,15 @@
 from crewai import Agent, Task, Crew
-from model import llm
+from model import get_llm
+from tools.batch_search_tool import BatchSearchTool
 from tools.duckduckgo_tool import DuckDuckGoSearchTool
-from tools.google_serper_tool import GoogleSerperSearchTool
+from tools.knowledge_search_tool import KnowledgeSearchTool
 
 
-google_search_tool = GoogleSerperSearchTool()
+# Answers from previously fetched results when it can, searching Google otherwise
+knowledge_search_tool = KnowledgeSearchTool()
 duckduckgo_search_tool = DuckDuckGoSearchTool()
+# Several queries per call, run concurrently and merged
+batch_search_tool = BatchSearchTool()
 
 
 travel_researcher = Agent(
@@ -24,12 +28,13 @@ travel_researcher = Agent(
 
         "Output style: A continuous, natural language paragraph summarizing all findings."
 
-        "- For 'top/best/official' attractions → use Google Serper Search\n"
+        "- For 'top/best/official' attractions → use Travel Knowledge Search (pass the destination)\n"
         "- For 'hidden/local/blog' content → use DuckDuckGo Search\n"
+        "- For more than one search (e.g. attractions, food and neighbourhoods) → use Batch Web Search with all the queries in one call\n"
         "- If results disagree, mention the discrepancy and cite both.\n"
         "- Include links for every recommendation cluster."
     ),
-    tools=[google_search_tool, duckduckgo_search_tool],  
-    llm=llm,
+    tools=[knowledge_search_tool, batch_search_tool, duckduckgo_search_tool],  
+    llm=get_llm("travel_researcher"),
     verbose=True,
 )
@@ -1,5 +1,6 @@
 from crewai import Agent
-from model import llm
+from model import get_llm
+from tools.climatology_tool import ClimatologyTool
 from tools.duckduckgo_tool import DuckDuckGoSearchTool
 from tools.google_serper_tool import GoogleSerperSearchTool
 from tools.openweather_tool import OpenWeatherTool
@@ -7,6 +8,7 @@ from tools.openweather_tool import OpenWeatherTool
 google_search_tool = GoogleSerperSearchTool()
 duckduckgo_search_tool = DuckDuckGoSearchTool()
 open_weather_tool = OpenWeatherTool()
+climatology_tool = ClimatologyTool()
 
 weather_advisor = Agent(
     role="Weather & Safety Advisor for Travel Planning",
@@ -32,12 +34,13 @@ weather_advisor = Agent(
         "6) Sources (links for verification)\n\n"
         "Tool Usage Rules:\n"
         "- ALWAYS use OpenWeatherTool to get weather forecasts for the specified city and dates.\n"
+        "- For dates beyond the 5-day forecast → use Climate Normals for typical conditions instead of searching.\n"
         "- For official forecasts and alerts → use Google Serper Search (only if OpenWeatherTool is insufficient for specific alerts)."\
         "- For local insights, community reports, blogs → use DuckDuckGo Search (only for general safety beyond weather)."\
         "- Include discrepancies if sources differ\n"
         "- Provide links for every forecast, warning, or tip"
     ),
-    tools=[open_weather_tool, google_search_tool, duckduckgo_search_tool],
-    llm=llm,
+    tools=[open_weather_tool, climatology_tool, google_search_tool, duckduckgo_search_tool],
+    llm=get_llm("weather_advisor"),
     verbose=True,
 )
@@ -1,5 +1,9 @@
+import uuid
 import streamlit as st
 from orchestration import ConversationalOrchestrator
+from tasks.outputs import render as render_output
+from db.embedding import get_embedding_service
+from db.session_store import get_session_store
 from datetime import date
 
 st.set_page_config(page_title="AI Trip Planner", page_icon=":airplane:")
@@ -7,11 +11,30 @@ st.set_page_config(page_title="AI Trip Planner", page_icon=":airplane:")
 st.title("🌍 AI Trip Planner")
 st.markdown("Ask me anything about your trip, and I'll help you plan it!")
 
+@st.cache_resource
+def session_store():
+    # One store (and connection pool) per server process, shared by all browser sessions
+    return get_session_store()
+
+@st.cache_resource
+def embedding_service():
+    # Load the embedding model once per server process, off the first request's path
+    service = get_embedding_service()
+    service.warm_up(background=True)
+    return service
+
+embedding_service()
+
+# The session id lives in the URL so a reload or another worker resumes the same state
+if "sid" not in st.query_params:
+    st.query_params["sid"] = uuid.uuid4().hex
+
 # Initialize ConversationalOrchestrator and session state
 if "orchestrator" not in st.session_state:
-    st.session_state.orchestrator = ConversationalOrchestrator()
-    st.session_state.initial_details_collected = False
-    st.session_state.chat_submitted = False # Initialize chat_submitted
+    st.session_state.orchestrator = ConversationalOrchestrator(
+        user_id=st.query_params["sid"], session_store=session_store()
+    )
+    st.session_state.initial_details_collected = bool(st.session_state.orchestrator.context.get("destination"))
 
 # --- Initial Trip Details Collection ---
 if not st.session_state.initial_details_collected:
@@ -27,10 +50,15 @@ if not st.session_state.initial_details_collected:
         
         if submit_initial_details:
             if destination:
-                st.session_state.orchestrator.context["destination"] = destination
-                st.session_state.orchestrator.context["start_date"] = start_date.strftime("%Y-%m-%d")
-                st.session_state.orchestrator.context["end_date"] = end_date.strftime("%Y-%m-%d")
-                st.session_state.orchestrator.context["travelers"] = travelers
+                orchestrator = st.session_state.orchestrator
+                # Another tab on the same session may be mid-turn in this process
+                with orchestrator.lock:
+                    orchestrator.refresh_session()
+                    orchestrator.context["destination"] = destination
+                    orchestrator.context["start_date"] = start_date.strftime("%Y-%m-%d")
+                    orchestrator.context["end_date"] = end_date.strftime("%Y-%m-%d")
+                    orchestrator.context["travelers"] = travelers
+                    orchestrator.save_session()
                 st.session_state.initial_details_collected = True
                 st.success("Trip details saved! You can now chat with the AI planner.")
                 st.rerun() # Rerun to switch to chat interface
@@ -38,11 +66,47 @@ if not st.session_state.initial_details_collected:
                 st.error("Please enter a destination to plan your trip.")
 
 # --- Main Chat Interface ---
+HISTORY_WINDOW = 20         # most recent messages rendered on every run
+HISTORY_PAGE_SIZE = 20      # older messages revealed per "Load earlier messages" click
+LONG_MESSAGE_CHARS = 1500   # longer answers render as a preview until expanded
+PREVIEW_CHARS = 600
+
+@st.cache_data(max_entries=512)
+def message_preview(content: str) -> str:
+    # Cut at a paragraph or line break so the preview never ends mid-markdown-block
+    cut = content[:PREVIEW_CHARS]
+    for sep in ("\n\n", "\n", ". "):
+        pos = cut.rfind(sep)
+        if pos > PREVIEW_CHARS // 2:
+            return cut[:pos]
+    return cut
+
+def render_message(index: int, message: dict):
+    with st.chat_message("user" if message["role"] == "user" else "assistant"):
+        content = message["content"]
+        if len(content) <= LONG_MESSAGE_CHARS:
+            st.markdown(content)
+            return
+        # The full text is only sent to the browser once the toggle is switched on
+        if st.toggle("Show full response", key=f"expand_msg_{index}"):
+            st.markdown(content)
+        else:
+            st.markdown(message_preview(content) + " …")
+
 if st.session_state.initial_details_collected:
-    # Display chat messages from history on app rerun
-    for message in st.session_state.orchestrator.conversation_history:
-        with st.chat_message("user" if message["role"] == "user" else "assistant"):
-            st.markdown(message["content"])
+    orchestrator = st.session_state.orchestrator
+    summary_slot = st.sidebar.empty()
+    history = orchestrator.conversation_history
+
+    # Only a window of the history is rendered; older turns are paged in on demand
+    visible = HISTORY_WINDOW + st.session_state.get("history_pages", 0) * HISTORY_PAGE_SIZE
+    first_visible = max(0, len(history) - visible)
+    if first_visible > 0:
+        if st.button(f"Load earlier messages ({first_visible} hidden)"):
+            st.session_state.history_pages = st.session_state.get("history_pages", 0) + 1
+            st.rerun()
+    for index in range(first_visible, len(history)):
+        render_message(index, history[index])
 
     # React to user input
     user_input = st.chat_input("Ask me about your trip:")
@@ -51,20 +115,18 @@ if st.session_state.initial_details_collected:
         # Display user message in chat message container
         with st.chat_message("user"):
             st.markdown(user_input)
-        
-        # Process user input and get response
-        result = st.session_state.orchestrator.process_user_input(user_input)
-        intent = result["intent"]
-        response = result["response"]
-        context_summary = st.session_state.orchestrator.get_context_summary()
-
-        # Display assistant response in chat message container
-        with st.chat_message("assistant"):
-            st.markdown(response)
-            st.markdown(context_summary)
-        
-        # Add to conversation history for display
-        st.session_state.orchestrator.conversation_history.append({"role": "user", "content": user_input})
-        st.session_state.orchestrator.conversation_history.append({"role": "assistant", "content": f"{response}\n{context_summary}"})
-        st.session_state.chat_submitted = False # Reset for next input
-        st.rerun() # Rerun to clear input and update display
+
+        # Process user input; the orchestrator appends the turn to the canonical history
+        with st.spinner("Planning..."):
+            # `?profile=1` in the URL profiles this session's turns (see profile_report.py)
+            profile = True if st.query_params.get("profile") == "1" else None
+            result = orchestrator.process_user_input(user_input, profile=profile)
+        render_message(len(orchestrator.conversation_history) - 1,
+                       {"role": "assistant", "content": result["response"]})
+
+    # Trip context and per-agent outputs live in the sidebar rather than in every message
+    summary_slot.markdown(orchestrator.get_context_summary())
+    with st.sidebar:
+        for agent_key in orchestrator.agent_outputs:
+            if st.toggle(f"Show {agent_key.replace('_', ' ')}", key=f"expand_agent_{agent_key}"):
+                st.markdown(render_output(agent_key, orchestrator.agent_outputs[agent_key]))
@@ -0,0 +1,316 @@
+# batch.py
+"""
+Offline batch plan generation.
+
+Reads trip specs from JSONL or CSV (destination, start_date, end_date,
+travelers, budget; optional id, origin, prompt), runs the full agent chain
+for each spec under a bounded worker pool, and streams plans to JSONL or
+Parquet. Completed spec ids are checkpointed, so re-running the same command
+after an interruption resumes where it stopped.
+
+    python batch.py specs.jsonl --output plans.jsonl --workers 4
+    python batch.py specs.csv --output plans.parquet --rate duckduckgo=20
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+
+from orchestration import ConversationalOrchestrator
+from runtime.rate_limiter import limiter, priority
+from runtime.single_flight import single_flight
+
+SPEC_FIELDS = ("destination", "origin", "start_date", "end_date", "travelers", "budget", "prompt")
+
+
+# -------------------
+# Input
+# -------------------
+def read_specs(path: str) -> Iterator[Dict[str, Any]]:
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                yield {k: v for k, v in row.items() if v not in (None, "")}
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def spec_id(spec: Dict[str, Any]) -> str:
+    if spec.get("id"):
+        return str(spec["id"])
+    canonical = json.dumps({k: spec.get(k) for k in SPEC_FIELDS}, sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def spec_prompt(spec: Dict[str, Any]) -> str:
+    if spec.get("prompt"):
+        return spec["prompt"]
+    prompt = f"Plan a trip to {spec['destination']}"
+    if spec.get("start_date") and spec.get("end_date"):
+        prompt += f" from {spec['start_date']} to {spec['end_date']}"
+    prompt += f" for {spec.get('travelers') or 1} people"
+    if spec.get("budget"):
+        prompt += f" with a budget of {spec['budget']}"
+    return prompt
+
+
+# -------------------
+# Planning
+# -------------------
+def plan_trip(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the full agent chain for one spec; never raises."""
+    sid = spec_id(spec)
+    started = time.perf_counter()
+    record = {"id": sid, "destination": spec.get("destination"), "spec": spec}
+    try:
+        # Batch calls yield external API budget to interactive chat turns
+        with priority("batch"):
+            orchestrator = ConversationalOrchestrator(user_id=f"batch:{sid}")
+            orchestrator.context.update({
+                "origin": spec.get("origin"),
+                "destination": spec["destination"],
+                "start_date": spec.get("start_date"),
+                "end_date": spec.get("end_date"),
+                "travelers": int(spec.get("travelers") or 1),
+                "budget_total": int(float(spec["budget"])) if spec.get("budget") else None,
+            })
+            itinerary = orchestrator.run_itinerary_agent(spec_prompt(spec), "")
+            record.update({
+                "itinerary": orchestrator.format_output(itinerary),
+                # Typed records (dicts) where the agent's answer parsed, raw text otherwise
+                "agent_outputs": {k: v for k, v in orchestrator.agent_outputs.items() if k != "itinerary"},
+                "error": None,
+            })
+    except Exception as e:
+        record.update({"itinerary": None, "agent_outputs": {}, "error": f"{type(e).__name__}: {e}"})
+    record["elapsed_s"] = round(time.perf_counter() - started, 3)
+    record["finished_at"] = datetime.now().isoformat()
+    return record
+
+
+# -------------------
+# Output + checkpointing
+# -------------------
+class Checkpoint:
+    """
+    Append-only list of completed spec ids, written after their output is durable.
+    Ids found in the output but not here (a crash in between) are added on resume.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done = {line.strip() for line in f if line.strip()}
+        self._file = open(path, "a", encoding="utf-8")
+
+    def mark(self, ids: List[str]):
+        self._file.write("".join(f"{i}\n" for i in ids))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.done.update(ids)
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlWriter:
+    def __init__(self, path: str, checkpoint: Checkpoint):
+        self.checkpoint = checkpoint
+        self.written = set()
+        if os.path.exists(path):
+            self.written = self._complete_lines(path)
+        self._file = open(path, "a", encoding="utf-8")
+
+    @staticmethod
+    def _complete_lines(path: str) -> set:
+        """Ids of the records already in `path`; a line cut off by a crash is removed."""
+        with open(path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+        ids = set()
+        for line in data.splitlines(keepends=True):
+            if line.endswith(b"\n"):
+                try:
+                    ids.add(json.loads(line)["id"])
+                except (ValueError, KeyError):
+                    continue
+        return ids
+
+    def write(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.checkpoint.mark([record["id"]])
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """
+    Buffers records and flushes them as numbered part files under `path`
+    (a Parquet dataset directory); ids are checkpointed once their part is written.
+    """
+
+    def __init__(self, path: str, checkpoint: Checkpoint, rows_per_part: int = 50):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.path = path
+        self.checkpoint = checkpoint
+        self.rows_per_part = rows_per_part
+        self.schema = pa.schema([
+            ("id", pa.string()),
+            ("destination", pa.string()),
+            ("spec", pa.string()),
+            ("itinerary", pa.string()),
+            ("agent_outputs", pa.string()),
+            ("error", pa.string()),
+            ("elapsed_s", pa.float64()),
+            ("finished_at", pa.string()),
+        ])
+        os.makedirs(path, exist_ok=True)
+        parts = [os.path.join(path, n) for n in os.listdir(path) if n.endswith(".parquet")]
+        self._part = len(parts)
+        self._rows: List[Dict[str, Any]] = []
+        self.written = set()
+        for part in parts:
+            self.written.update(pq.read_table(part, columns=["id"]).column("id").to_pylist())
+
+    def write(self, record: Dict[str, Any]):
+        row = dict(record)
+        row["spec"] = json.dumps(row["spec"], ensure_ascii=False, default=str)
+        row["agent_outputs"] = json.dumps(row["agent_outputs"], ensure_ascii=False, default=str)
+        self._rows.append(row)
+        if len(self._rows) >= self.rows_per_part:
+            self.flush()
+
+    def flush(self):
+        import pyarrow.parquet as pq
+
+        if not self._rows:
+            return
+        table = self.pa.Table.from_pylist(self._rows, schema=self.schema)
+        part_path = os.path.join(self.path, f"part-{self._part:05d}.parquet")
+        pq.write_table(table, part_path + ".tmp", compression="zstd")
+        os.replace(part_path + ".tmp", part_path)
+        self._part += 1
+        self.checkpoint.mark([row["id"] for row in self._rows])
+        self._rows = []
+
+    def close(self):
+        self.flush()
+
+
+# -------------------
+# Progress report
+# -------------------
+class Progress:
+    def __init__(self, total: int, skipped: int):
+        self.total = total
+        self.skipped = skipped
+        self.ok = 0
+        self.failed = 0
+        self.latencies: List[float] = []
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, record: Dict[str, Any]):
+        with self._lock:
+            if record["error"]:
+                self.failed += 1
+            else:
+                self.ok += 1
+            self.latencies.append(record["elapsed_s"])
+            done = self.ok + self.failed
+            elapsed = time.perf_counter() - self.started
+            status = "failed: " + record["error"] if record["error"] else "ok"
+            print(f"[{done}/{self.total}] {record['destination']} {status} "
+                  f"({record['elapsed_s']:.1f}s, {done / elapsed * 60:.2f} plans/min)", flush=True)
+
+    def report(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        lines = [
+            "Batch finished",
+            f"  specs:       {self.total + self.skipped} ({self.skipped} already done, {self.total} run)",
+            f"  succeeded:   {self.ok}",
+            f"  failed:      {self.failed}",
+            f"  wall time:   {elapsed:.1f}s",
+        ]
+        if self.latencies:
+            lat = sorted(self.latencies)
+            lines += [
+                f"  throughput:  {len(lat) / elapsed * 60:.2f} plans/min",
+                f"  latency:     mean {statistics.mean(lat):.1f}s, p50 {lat[len(lat) // 2]:.1f}s, "
+                f"p95 {lat[min(len(lat) - 1, int(len(lat) * 0.95))]:.1f}s",
+            ]
+        return "\n".join(lines)
+
+
+def run_batch(specs_path: str, output: str, fmt: str, workers: int) -> Progress:
+    checkpoint = Checkpoint(output.rstrip("/") + ".checkpoint")
+    specs, seen = [], set()
+    for spec in read_specs(specs_path):
+        sid = spec_id(spec)
+        if sid not in seen:
+            seen.add(sid)
+            specs.append(spec)
+    writer = ParquetWriter(output, checkpoint) if fmt == "parquet" else JsonlWriter(output, checkpoint)
+    # A crash between writing a record and checkpointing it leaves the record in the output only
+    unmarked = writer.written - checkpoint.done
+    if unmarked:
+        checkpoint.mark(sorted(unmarked))
+    pending = [spec for spec in specs if spec_id(spec) not in checkpoint.done]
+    progress = Progress(total=len(pending), skipped=len(specs) - len(pending))
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(plan_trip, spec) for spec in pending]
+            # Single writer: results are written from this thread as they complete
+            for future in as_completed(futures):
+                record = future.result()
+                writer.write(record)
+                progress.record(record)
+    finally:
+        writer.close()
+        checkpoint.close()
+    return progress
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate trip plans in bulk from a JSONL/CSV of trip specs.")
+    parser.add_argument("specs", help="Input file (.jsonl or .csv)")
+    parser.add_argument("--output", required=True, help="Output .jsonl file or Parquet dataset directory")
+    parser.add_argument("--format", choices=["jsonl", "parquet"],
+                        help="Output format (default: inferred from --output)")
+    parser.add_argument("--workers", type=int, default=4, help="Trips planned concurrently")
+    parser.add_argument("--rate", action="append", default=[], metavar="PROVIDER=RPM",
+                        help="Override an API rate limit, e.g. --rate duckduckgo=20 (repeatable)")
+    args = parser.parse_args()
+
+    for item in args.rate:
+        provider, rpm = item.split("=", 1)
+        limiter.set_limit(provider.strip(), int(rpm))
+
+    fmt = args.format or ("parquet" if args.output.endswith(".parquet") else "jsonl")
+    progress = run_batch(args.specs, args.output, fmt, args.workers)
+    print(progress.report())
+    print(limiter.format_metrics())
+    print(f"coalescing: {single_flight.metrics()}")
+
+
+if __name__ == "__main__":
+    main()
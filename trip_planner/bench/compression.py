@@ -0,0 +1,139 @@
+# bench/compression.py
+"""
+Stored bytes per session and codec latency for memories and agent outputs.
+
+Sessions are synthesised from travel-domain templates (itinerary narratives,
+hotel, weather and research records, Q/A memories) so the benchmark runs
+offline; half of them train a dictionary, the other half are measured with
+plain JSON, zstd alone and zstd with that dictionary. Ratios on real stored
+data are printed by train_zstd_dict.py.
+
+    python -m bench.compression --sessions 400
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import Dict, List
+
+import orjson
+import zstandard as zstd
+
+from config.setting import COMPRESSION_LEVEL, COMPRESSION_MIN_BYTES, KNOWLEDGE_PACK_DESTINATIONS
+from db.codec import Codec
+
+AREAS = ["Old City", "Lake Pichola", "Baga Beach", "Mall Road", "Fort Kochi", "Connaught Place", "Colaba",
+         "Civil Lines", "Tapovan", "White Town", "MG Road", "Hauz Khas"]
+SIGHTS = ["Amber Fort", "City Palace", "Hawa Mahal", "Jantar Mantar", "the ghats", "the old bazaar",
+          "Chapora Fort", "Solang Valley", "the spice market", "the sunset point", "the tea gardens",
+          "the heritage walk", "the botanical garden", "the step well", "the night market"]
+FOODS = ["dal baati churma", "laal maas", "fish curry rice", "momos", "masala dosa", "chole bhature",
+         "pav bhaji", "appam with stew", "kachori", "thali", "filter coffee", "lassi"]
+HOTELS = ["Heritage Haveli", "Lakeview Residency", "Sea Breeze Resort", "Pine Crest Inn", "Backpacker Hostel",
+          "Palace Grand", "Riverside Retreat", "City Comfort Inn"]
+WEATHER = ["clear skies", "scattered clouds", "light rain", "humid and warm", "cool mornings", "hazy sunshine"]
+QUESTIONS = ["Plan a {n}-day trip to {d} from {s} for {t} people", "What's the weather in {d} next week?",
+             "Suggest hotels in {d} near {a}", "How do I get from Delhi to {d}?",
+             "What will the trip to {d} cost?", "Book {h} in {d} for {t} guests"]
+
+
+def itinerary(rng: random.Random, destination: str, days: int) -> str:
+    paragraphs = []
+    for day in range(1, days + 1):
+        sights = rng.sample(SIGHTS, 3)
+        paragraphs.append(
+            f"Day {day}: Begin the morning in {rng.choice(AREAS)}, where {sights[0]} opens early and the light "
+            f"is soft enough for photographs. After breakfast of {rng.choice(FOODS)}, make your way to {sights[1]}; "
+            f"allow around {rng.randint(2, 4)} hours, as the queues lengthen by noon. Lunch is best taken nearby, "
+            f"and {rng.choice(FOODS)} at a family-run place is a local favourite. In the afternoon the weather is "
+            f"usually {rng.choice(WEATHER)}, so {sights[2]} makes a relaxed final stop before dinner. Evenings in "
+            f"{destination} are lively; stroll through {rng.choice(AREAS)} and return to your hotel by auto-rickshaw, "
+            f"which should cost about ₹{rng.randint(80, 300)} for the ride."
+        )
+    return "\n\n".join(paragraphs)
+
+
+def session(rng: random.Random) -> Dict[str, List[bytes]]:
+    """The JSON values one session stores: memories and agent outputs."""
+    destination = rng.choice(KNOWLEDGE_PACK_DESTINATIONS)
+    days, travelers = rng.randint(2, 6), rng.randint(1, 4)
+    start = f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    outputs = {
+        "travel_research": {
+            "summary": f"{destination} combines heritage sights with a lively food scene.",
+            "attractions": [{"name": s, "area": rng.choice(AREAS), "why": f"One of the highlights of {destination}."}
+                            for s in rng.sample(SIGHTS, 6)],
+            "food": rng.sample(FOODS, 4),
+            "tips": ["Carry cash for small vendors.", "Start sightseeing early to avoid the heat and crowds."],
+            "sources": [f"https://example.org/{destination.lower()}/guide", "https://example.org/travel/tips"],
+        },
+        "weather_advice": {
+            "summary": f"Expect {rng.choice(WEATHER)} in {destination} during your stay.",
+            "days": [{"date": start, "conditions": rng.choice(WEATHER), "min_c": rng.randint(8, 20),
+                      "max_c": rng.randint(22, 36), "rain_chance": rng.randint(0, 80)} for _ in range(days)],
+            "travel_safety": "Safe",
+        },
+        "hotel_recommendation": {
+            "summary": f"Good options across budgets in {destination}.",
+            "hotels": [{"name": h, "tier": rng.choice(["budget", "mid", "luxury"]), "area": rng.choice(AREAS),
+                        "price_per_night": rng.randint(900, 15000), "note": "Well reviewed, close to the sights."}
+                       for h in rng.sample(HOTELS, 4)],
+        },
+        "itinerary": itinerary(rng, destination, days),
+    }
+    memories = []
+    for q in rng.sample(QUESTIONS, 4):
+        question = q.format(n=days, d=destination, s=start, t=travelers, a=rng.choice(AREAS), h=rng.choice(HOTELS))
+        answer = outputs["itinerary"] if "Plan" in q else json.dumps(rng.choice(list(outputs.values())))
+        memories.append(json.dumps({"text": f"Q: {question}\nA: {answer}",
+                                    "metadata": {"intent": "overview", "timestamp": start}}).encode("utf-8"))
+    return {"memories": memories, "agent_outputs": [orjson.dumps(v) for v in outputs.values()]}
+
+
+def measure(label: str, codec: Codec, sessions: List[Dict[str, List[bytes]]]):
+    stored, encode_us, decode_us = [], [], []
+    for s in sessions:
+        total = 0
+        for value in s["memories"] + s["agent_outputs"]:
+            started = time.perf_counter()
+            encoded = codec.encode(value)
+            encode_us.append((time.perf_counter() - started) * 1e6)
+            started = time.perf_counter()
+            assert codec.decode(encoded) == value
+            decode_us.append((time.perf_counter() - started) * 1e6)
+            total += len(encoded)
+        stored.append(total)
+    encode_us.sort()
+    decode_us.sort()
+    p95 = lambda xs: xs[int(len(xs) * 0.95)]
+    print(f"{label:<16} {statistics.mean(stored):>9.0f} B/session  "
+          f"encode p50 {statistics.median(encode_us):6.1f} µs p95 {p95(encode_us):6.1f} µs  "
+          f"decode p50 {statistics.median(decode_us):6.1f} µs p95 {p95(decode_us):6.1f} µs")
+    return statistics.mean(stored)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compression of stored memories and agent outputs.")
+    parser.add_argument("--sessions", type=int, default=400)
+    parser.add_argument("--dict-size", type=int, default=112640)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    sessions = [session(rng) for _ in range(args.sessions)]
+    train, test = sessions[: len(sessions) // 2], sessions[len(sessions) // 2:]
+    dictionary = zstd.train_dictionary(args.dict_size, [v for s in train for v in s["memories"] + s["agent_outputs"]],
+                                       level=COMPRESSION_LEVEL)
+
+    print(f"{len(test)} sessions measured, level {COMPRESSION_LEVEL}, values under {COMPRESSION_MIN_BYTES} B "
+          f"stored plain, dictionary {len(dictionary.as_bytes())} B trained on {len(train)} other sessions")
+    plain = measure("plain JSON", Codec(dict_dir=None, enabled=False), test)
+    for label, d in (("zstd", None), ("zstd+dictionary", dictionary)):
+        codec = Codec(dict_dir=None)
+        codec.use(d)
+        size = measure(label, codec, test)
+        print(f"{'':<16} {plain / size:.2f}x smaller than plain JSON")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# bench/embeddings.py
+"""
+Embedding throughput on CPU, in texts/sec.
+
+Measures the raw model at several batch sizes, then the shared service under
+concurrent single-text requests (micro-batching) and with a warm LRU cache.
+Every text in the uncached runs is unique, so nothing is served from cache.
+
+    python -m bench.embeddings --texts 2000 --threads 16
+    EMBEDDING_BACKEND=hf python -m bench.embeddings     # compare with the PyTorch model
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config.setting import EMBEDDING_BACKEND
+from db.embedding import EmbeddingService, _load_backend
+
+PLACES = ["Jaipur", "Goa", "Manali", "Udaipur", "Kochi", "Leh", "Varanasi", "Hampi", "Shimla", "Munnar"]
+TOPICS = [
+    "best time to visit {} and what to pack",
+    "budget hotels near the old city in {} with rooftop views",
+    "hidden cafes and street food trails in {}",
+    "how to get from the airport to the centre of {} at night",
+    "three day itinerary for {} with kids",
+    "monsoon travel advice and road conditions around {}",
+]
+
+
+def sample_texts(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    # The counter keeps every text unique so cache hits don't inflate the numbers
+    return [f"{rng.choice(TOPICS).format(rng.choice(PLACES))} (#{i})" for i in range(n)]
+
+
+def rate(n: int, seconds: float) -> str:
+    return f"{n / seconds:10.1f} texts/s  ({seconds * 1000 / n:.2f} ms/text)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding throughput benchmark")
+    parser.add_argument("--texts", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=16, help="Concurrent callers for the service runs")
+    parser.add_argument("--batch-sizes", default="1,8,32,64")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    backend = _load_backend()
+    backend.encode(["warm up"])
+    print(f"backend: {EMBEDDING_BACKEND} ({type(backend).__name__}), loaded in {time.perf_counter() - started:.1f}s")
+
+    print("\nmodel, direct batches:")
+    for batch_size in (int(b) for b in args.batch_sizes.split(",")):
+        texts = sample_texts(args.texts, seed=batch_size)
+        started = time.perf_counter()
+        for i in range(0, len(texts), batch_size):
+            vectors = backend.encode(texts[i:i + batch_size])
+        elapsed = time.perf_counter() - started
+        print(f"  batch {batch_size:>3}: {rate(len(texts), elapsed)}")
+    print(f"  output: {vectors.dtype}, dim {vectors.shape[1]}")
+
+    service = EmbeddingService(backend=backend)
+    texts = sample_texts(args.texts, seed=1000)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(service.embed_one, texts))
+    elapsed = time.perf_counter() - started
+    stats = service.stats()
+    print(f"\nservice, {args.threads} threads x 1 text per call:")
+    print(f"  uncached:  {rate(len(texts), elapsed)}  mean batch {stats['mean_batch']:.1f}")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(service.embed_one, texts))
+    elapsed = time.perf_counter() - started
+    print(f"  cached:    {rate(len(texts), elapsed)}  hit rate {service.stats()['hit_rate']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# bench/geo_index.py
+"""
+Proximity queries on the geo index at scale.
+
+Indexes synthetic hotels and attractions clustered around city centres (the
+way real ones are) in a temporary SQLite file, then times "hotels within R km
+of these attractions" through the grid index against a brute-force haversine
+scan over every hotel, checking both return the same hotels.
+
+    python -m bench.geo_index --points 100000 --queries 2000
+"""
+import argparse
+import math
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from db.climatology import haversine_km
+from db.geo_index import TIERS, GeoIndex
+
+
+def synthetic_places(n: int, cities: int, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    centres = np.column_stack([rng.uniform(8, 34, cities), rng.uniform(68, 97, cities)])
+    city = rng.integers(0, cities, n)
+    # Most places within a few km of the centre, a tail out to the suburbs
+    spread = rng.exponential(0.03, n)[:, None] * rng.standard_normal((n, 2))
+    coords = centres[city] + spread
+    return centres, city, coords, rng
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geo index proximity queries.")
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--cities", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--radius", type=float, default=2.0)
+    parser.add_argument("--attractions-per-query", type=int, default=3)
+    args = parser.parse_args()
+
+    n_hotels = int(args.points * 0.8)
+    centres, city, coords, rng = synthetic_places(args.points, args.cities)
+    hotels = [{"name": f"Hotel {i}", "destination": f"City {city[i]}", "lat": coords[i, 0], "lon": coords[i, 1],
+               "tier": TIERS[i % 3], "price_per_night": float(rng.integers(800, 20000))} for i in range(n_hotels)]
+    attractions = [{"name": f"Sight {i}", "destination": f"City {city[i]}", "lat": coords[i, 0],
+                    "lon": coords[i, 1]} for i in range(n_hotels, args.points)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = GeoIndex(os.path.join(tmp, "geo.db"))
+        started = time.perf_counter()
+        index.add_places(hotels, "hotel")
+        index.add_places(attractions, "attraction")
+        insert_s = time.perf_counter() - started
+        started = time.perf_counter()
+        index.stats()
+        load_s = time.perf_counter() - started
+        print(f"{n_hotels} hotels + {len(attractions)} attractions around {args.cities} cities: "
+              f"insert {insert_s:.2f}s, grid build {load_s * 1000:.0f} ms")
+
+        grid = index._load()["hotel"]
+        all_lat, all_lon = np.radians(coords[:n_hotels, 0]), np.radians(coords[:n_hotels, 1])
+        sights = coords[n_hotels:]
+        queries = [sights[rng.integers(0, len(sights), args.attractions_per_query)] for _ in range(args.queries)]
+
+        grid_us, full_us, brute_us, found, mismatches = [], [], [], [], 0
+        for points in queries:
+            started = time.perf_counter()
+            positions = [grid.within(lat, lon, args.radius)[0] for lat, lon in points]
+            grid_us.append((time.perf_counter() - started) * 1e6)
+            hits = set(grid.ids[np.concatenate(positions)].tolist())
+
+            started = time.perf_counter()
+            index.hotels_near([tuple(p) for p in points], args.radius, limit=10)
+            full_us.append((time.perf_counter() - started) * 1e6)
+
+            started = time.perf_counter()
+            brute = set()
+            for lat, lon in points:
+                d = haversine_km(math.radians(lat), math.radians(lon), all_lat, all_lon)
+                brute.update((np.nonzero(d <= args.radius)[0] + 1).tolist())  # row ids start at 1
+            brute_us.append((time.perf_counter() - started) * 1e6)
+            found.append(len(hits))
+            mismatches += hits != brute
+
+        print(f"{args.queries} queries, {args.attractions_per_query} attractions each, radius {args.radius:g} km, "
+              f"{statistics.mean(found):.0f} hotels found on average")
+        for label, times in (("grid lookup", grid_us), ("hotels_near (ranked, with details)", full_us),
+                             ("brute-force haversine", brute_us)):
+            print(f"  {label:<36} p50 {statistics.median(times):8.1f} µs  p95 {percentile(times, 0.95):8.1f} µs")
+        print(f"  result mismatches vs brute force: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# bench/llm_tiers.py
+"""
+Latency and token cost per agent across LLM tiers, using the local stub provider.
+
+Each agent's real system prompt (role, goal, backstory) plus a representative
+task is sent through StubLLM for every tier's primary model; no network calls
+are made. Latencies come from StubLLM.PROFILES and costs from PRICES below, so
+edit both to match measured provider latency and your billing.
+
+    python -m bench.llm_tiers --calls 5
+"""
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("LLM_PROVIDER", "stub")
+# Search tools read their keys at import; the benchmark never calls them
+os.environ.setdefault("GOOGLE_SURPER_API", "bench-placeholder")
+
+from config.setting import AGENT_LLM, LLM_TIERS  # noqa: E402
+from model import StubLLM, estimate_tokens  # noqa: E402
+
+# USD per 1M (input, output) tokens
+PRICES = {
+    "gemini/gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini/gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini/gemini-2.5-flash": (0.30, 2.50),
+    "gemini/gemini-2.5-pro": (1.25, 10.0),
+}
+
+SAMPLE_TASK = (
+    "Main request: Plan a 4-day trip to Jaipur from 2025-11-10 to 2025-11-14 for 2 people. "
+    "Additional context: destination: Jaipur, budget_total: 40000, travelers: 2."
+)
+
+# Typical answer length per agent, in tokens
+OUTPUT_TOKENS = {
+    "intent_classifier": 3,
+    "hotel_booker": 80,
+    "weather_advisor": 350,
+    "transport_advisor": 450,
+    "hotel_recommender": 500,
+    "travel_researcher": 500,
+    "budget_optimizer": 450,
+    "itinerary_planner": 1400,
+}
+
+
+def agent_system_prompts():
+    from agents.budget_optimizer_agent import budget_optimizer
+    from agents.hotel_booking_agent import hotel_booker
+    from agents.hotel_recommendation_agent import hotel_recommender
+    from agents.itinerary_builder import itinerary_planner
+    from agents.transport_advisor_agent import transport_advisor
+    from agents.travel_researcher import travel_researcher
+    from agents.weather_advisor_agent import weather_advisor
+
+    agents = {
+        "travel_researcher": travel_researcher,
+        "weather_advisor": weather_advisor,
+        "transport_advisor": transport_advisor,
+        "hotel_recommender": hotel_recommender,
+        "hotel_booker": hotel_booker,
+        "budget_optimizer": budget_optimizer,
+        "itinerary_planner": itinerary_planner,
+    }
+    prompts = {name: f"You are {a.role}. {a.backstory}\nYour personal goal is: {a.goal}" for name, a in agents.items()}
+    prompts["intent_classifier"] = "Classify the travel-planning message into exactly one label."
+    return prompts
+
+
+def run(calls: int):
+    prompts = agent_system_prompts()
+    print(f"{'agent':<20} {'tier':<6} {'model':<32} {'p50 s':>7} {'p95 s':>7} {'tokens':>8} {'$/1k calls':>11}")
+    for agent, system in prompts.items():
+        messages = [{"role": "system", "content": system}, {"role": "user", "content": SAMPLE_TASK}]
+        configured = AGENT_LLM.get(agent, {}).get("tier")
+        for tier, models in LLM_TIERS.items():
+            model = models[0]
+            stub = StubLLM(model=f"stub/{model}", output_tokens=OUTPUT_TOKENS.get(agent, 300))
+            latencies = []
+            for _ in range(calls):
+                started = time.perf_counter()
+                stub.call(messages)
+                latencies.append(time.perf_counter() - started)
+            latencies.sort()
+            prompt_tokens = estimate_tokens(messages)
+            price_in, price_out = PRICES.get(model, (0.0, 0.0))
+            cost = (prompt_tokens * price_in + stub.output_tokens * price_out) / 1e6 * 1000
+            marker = "*" if tier == configured else " "
+            print(f"{agent:<20} {tier + marker:<6} {model:<32} {statistics.median(latencies):>7.2f} "
+                  f"{latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]:>7.2f} "
+                  f"{prompt_tokens + stub.output_tokens:>8} {cost:>11.3f}")
+    print("* = tier configured for the agent in AGENT_LLM")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=5, help="Calls per agent and tier")
+    run(parser.parse_args().calls)
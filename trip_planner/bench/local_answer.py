@@ -0,0 +1,141 @@
+# bench/local_answer.py
+"""
+Hit rate and latency of the local answer path on replayed sessions.
+
+Sessions are read from the conversation memories in Redis (or a JSONL file
+of {"session_id", "turns": [{"user", "assistant", "intent"}]}); with neither,
+a few scripted sessions are replayed so the benchmark runs offline. Each
+session's user turns are replayed in order: the trip context is rebuilt with
+the orchestrator's parser, every turn is offered to the local responder, and
+the recorded answer then stands in for the agent output its intent produced,
+as it did in the live session. Turns the responder takes are printed with
+--show for a look at what it would have answered.
+
+    python -m bench.local_answer
+    python -m bench.local_answer --sessions sessions.jsonl --show 20
+"""
+import argparse
+import json
+import statistics
+import time
+from collections import Counter
+from typing import Any, Dict, List
+
+import redis
+
+from config.setting import REDIS_DB, REDIS_HOST, REDIS_PORT
+from db.codec import codec
+from db.session_store import InMemorySessionStore
+from orchestration import AGENT_LABELS, INTENT_AGENT, ConversationalOrchestrator
+from runtime.local_answer import answer_locally
+
+# Output each recorded intent left in the session
+INTENT_OUTPUT = {**INTENT_AGENT, "itinerary": "itinerary", "full_planning": "itinerary", "hotel_booking": "hotel_booking"}
+
+SCRIPTED = [
+    [("Plan a trip from Delhi to Jaipur 2025-03-10 to 2025-03-14 for 2 people, budget 40000", "itinerary"),
+     ("what's the weather like there?", "weather"), ("suggest hotels near amber fort", "hotels"),
+     ("what dates did I pick?", "overview"), ("repeat the weather", "weather"),
+     ("book Rambagh Palace from 2025-03-10 to 2025-03-14 for 2 guests", "hotel_booking"),
+     ("which hotel am I booking?", "hotel_booking"), ("yes", "hotel_booking")],
+    [("trip to goa 2025-12-20 to 2025-12-27", "overview"), ("how do I get there by train from mumbai", "transport"),
+     ("what's my budget?", "budget"), ("budget 60000, what will it cost?", "budget"),
+     ("cheaper hotels in goa", "hotels"), ("what did you say about the train?", "transport"),
+     ("how many people are travelling?", "overview"), ("give me a recap of my trip so far", "itinerary")],
+    [("Delhi → Jaipur → Udaipur from 2025-02-01 to 2025-02-07", "itinerary"), ("what is our route?", "overview"),
+     ("weather in udaipur", "weather"), ("when are we leaving?", "overview"),
+     ("can you repeat that?", "overview"), ("what should we eat in udaipur?", "overview")],
+]
+
+
+def redis_sessions(limit: int) -> List[Dict[str, Any]]:
+    r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
+    sessions = []
+    try:
+        for key in r.scan_iter(match="*:memories", count=500):
+            turns = []
+            for doc_id in reversed(r.lrange(key, 0, -1)):  # stored newest first
+                raw = r.get(doc_id)
+                if not raw:
+                    continue
+                try:
+                    data = json.loads(codec.decode(raw))
+                except ValueError:
+                    continue
+                question, _, answer = data["text"].partition("\nA: ")
+                turns.append({"user": question.removeprefix("Q: "), "assistant": answer,
+                              "intent": data.get("metadata", {}).get("intent", "overview")})
+            if turns:
+                sessions.append({"session_id": key.decode().removesuffix(":memories"), "turns": turns})
+            if len(sessions) >= limit:
+                break
+    except redis.RedisError as e:
+        print(f"Stored sessions unavailable: {e}")
+    return sessions
+
+
+def scripted_sessions() -> List[Dict[str, Any]]:
+    return [{"session_id": f"scripted-{i}", "turns": [{"user": q, "assistant": f"(recorded {intent} answer)",
+                                                       "intent": intent} for q, intent in turns]}
+            for i, turns in enumerate(SCRIPTED)]
+
+
+def replay(session: Dict[str, Any], results: Dict[str, Any]):
+    orchestrator = ConversationalOrchestrator(f"replay:{session['session_id']}", session_store=InMemorySessionStore())
+    ctx = orchestrator.context
+    outputs: Dict[str, str] = {}
+    history: List[Dict[str, str]] = []
+    for turn in session["turns"]:
+        question = turn["user"]
+        ctx.update({k: v for k, v in orchestrator.parse_user_prompt(question).items() if v is not None})
+        started = time.perf_counter()
+        answered = answer_locally(question, ctx, lambda key: outputs.get(key, ""), history, labels=AGENT_LABELS)
+        results["latency_us"].append((time.perf_counter() - started) * 1e6)
+        results["turns"] += 1
+        if answered:
+            results["kinds"][answered[0]] += 1
+            results["avoided"][turn["intent"]] += 1
+            results["samples"].append((question, turn["intent"], answered[1]))
+        # The live session went on with the recorded answer
+        key = INTENT_OUTPUT.get(turn["intent"])
+        if key and turn["intent"] != "recall":
+            outputs[key] = turn["assistant"]
+        if turn["intent"] == "hotel_booking" and not answered:
+            ctx["booking_pending_confirmation"] = not ctx.get("booking_pending_confirmation")
+        history += [{"role": "user", "content": question}, {"role": "assistant", "content": turn["assistant"]}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay sessions through the local answer path.")
+    parser.add_argument("--sessions", help="JSONL of sessions instead of the memories stored in Redis")
+    parser.add_argument("--limit", type=int, default=1000, help="sessions to replay at most")
+    parser.add_argument("--show", type=int, default=10, help="locally answered turns to print")
+    args = parser.parse_args()
+
+    if args.sessions:
+        with open(args.sessions, encoding="utf-8") as f:
+            sessions = [json.loads(line) for line in f if line.strip()][: args.limit]
+    else:
+        sessions = redis_sessions(args.limit)
+    if not sessions:
+        print("No stored sessions found; replaying the scripted ones.")
+        sessions = scripted_sessions()
+
+    results = {"turns": 0, "latency_us": [], "kinds": Counter(), "avoided": Counter(), "samples": []}
+    for session in sessions:
+        replay(session, results)
+
+    hits = sum(results["kinds"].values())
+    latency = sorted(results["latency_us"])
+    print(f"{len(sessions)} sessions, {results['turns']} turns: {hits} answered locally "
+          f"({hits / max(results['turns'], 1):.1%})")
+    print(f"  latency per turn checked: p50 {statistics.median(latency):.0f} µs, "
+          f"p95 {latency[int(len(latency) * 0.95)]:.0f} µs, max {latency[-1]:.0f} µs")
+    print(f"  by kind: {dict(results['kinds'].most_common())}")
+    print(f"  agent runs avoided, by recorded intent: {dict(results['avoided'].most_common())}")
+    for question, intent, answer in results["samples"][: args.show]:
+        print(f"\n[{intent}] {question}\n  → {answer[:200].replace(chr(10), ' | ')}")
+
+
+if __name__ == "__main__":
+    main()
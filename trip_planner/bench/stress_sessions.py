@@ -0,0 +1,118 @@
+# bench/stress_sessions.py
+"""
+Many concurrent chat sessions in one process, against the local stub provider.
+
+Every session asks about its own made-up town ("hotels in townabc", ...).
+StubLLM echoes each prompt, so an answer that mentions another session's town
+means state leaked between sessions (shared agent, LLM or session objects).
+Each session also sends a pair of turns at the same moment from two
+orchestrators, which the per-session lock must serialize: afterwards its
+history has to hold exactly two messages per turn.
+
+    python -m bench.stress_sessions --sessions 200 --turns 3 --threads 64
+"""
+import argparse
+import os
+import statistics
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+os.environ.setdefault("LLM_PROVIDER", "stub")
+# Background prefetch would keep the stub busy between turns and blur the timings
+os.environ.setdefault("PREFETCH_ENABLED", "0")
+# Search tools read their keys at import; the benchmark never calls them
+os.environ.setdefault("GOOGLE_SURPER_API", "bench-placeholder")
+
+from db.session_store import InMemorySessionStore  # noqa: E402
+from orchestration import ConversationalOrchestrator  # noqa: E402
+
+QUESTIONS = ("hotels in {town}", "weather in {town}", "how do I get around {town}")
+
+
+def town(i: int) -> str:
+    """A letters-only name per session, so the destination parser picks it up."""
+    letters = ""
+    while True:
+        i, r = divmod(i, 26)
+        letters = string.ascii_lowercase[r] + letters
+        if i == 0:
+            return f"town{letters}q"
+        i -= 1
+
+
+def foreign_towns(text: str, own: str, towns: set) -> list:
+    words = {w.strip(".,:;!?'\"()[]").lower() for w in text.split()}
+    return sorted(t for t in towns & words if t != own)
+
+
+def run_session(i: int, turns: int, store: InMemorySessionStore, towns: set):
+    name, session_id = town(i), f"stress-{i}"
+    latencies, leaks = [], []
+    orchestrator = ConversationalOrchestrator(user_id=session_id, session_store=store)
+
+    def turn(o: ConversationalOrchestrator, question: str):
+        started = time.perf_counter()
+        result = o.process_user_input(question.format(town=name))
+        latencies.append(time.perf_counter() - started)
+        leaks.extend(foreign_towns(result["response"], name, towns))
+
+    for n in range(turns - 2):
+        turn(orchestrator, QUESTIONS[n % len(QUESTIONS)])
+
+    # Two orchestrators of the same session, two turns at once
+    other = ConversationalOrchestrator(user_id=session_id, session_store=store)
+    threads = [threading.Thread(target=turn, args=(o, q)) for o, q in
+               ((orchestrator, QUESTIONS[0]), (other, QUESTIONS[1]))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    orchestrator.refresh_session()
+    history = len(orchestrator.conversation_history)
+    return {"latencies": latencies, "leaks": leaks, "history_ok": history == 2 * turns}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=3, help="Turns per session (at least 2)")
+    parser.add_argument("--threads", type=int, default=64, help="Sessions running at once")
+    args = parser.parse_args()
+    turns = max(args.turns, 2)
+
+    store = InMemorySessionStore()
+    towns = {town(i) for i in range(args.sessions)}
+    latencies, leaks, bad_history, errors = [], 0, 0, []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads, thread_name_prefix="session") as pool:
+        futures = {pool.submit(run_session, i, turns, store, towns): i for i in range(args.sessions)}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                errors.append(f"stress-{futures[future]}: {type(e).__name__}: {e}")
+                continue
+            latencies.extend(result["latencies"])
+            leaks += len(result["leaks"])
+            bad_history += not result["history_ok"]
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{args.sessions} sessions x {turns} turns on {args.threads} threads in {elapsed:.1f}s "
+          f"({len(latencies) / elapsed:.1f} turns/s)")
+    if latencies:
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"turn latency p50 {statistics.median(latencies):.2f}s  p95 {p95:.2f}s")
+    print(f"cross-session mentions: {leaks}  sessions with wrong history length: {bad_history}  "
+          f"errors: {len(errors)}")
+    for line in errors[:10]:
+        print(f"  {line}")
+    if leaks or bad_history or errors:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
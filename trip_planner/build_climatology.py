@@ -0,0 +1,159 @@
+# build_climatology.py
+"""
+Offline build of the climate-normals dataset (see db/climatology.py).
+
+For each station it downloads daily highs, lows and precipitation for a run
+of past years from the Open-Meteo historical archive (ERA5 reanalysis, no
+API key) and reduces them to monthly normals. Stations come from a CSV with
+`name,lat,lon` columns and/or destination names, geocoded with ORS; by
+default the KNOWLEDGE_PACK_DESTINATIONS list. New stations are merged into an
+existing dataset unless `--replace` is given.
+
+    python build_climatology.py --stations stations.csv --years 2014-2023
+    python build_climatology.py --destinations Jaipur Goa Leh
+"""
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+
+import numpy as np
+import orjson
+import requests
+
+from config.setting import CLIMATOLOGY_DIR, KNOWLEDGE_PACK_DESTINATIONS
+from db.climatology import FIELDS
+from runtime.rate_limiter import limiter, priority, throttle
+from tools.ors_tool import get_coordinates
+
+ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+DATASET_VERSION = 1
+
+
+def fetch_daily(lat: float, lon: float, first_year: int, last_year: int) -> Dict[str, list]:
+    throttle("open_meteo")
+    response = requests.get(ARCHIVE_URL, params={
+        "latitude": lat,
+        "longitude": lon,
+        "start_date": f"{first_year}-01-01",
+        "end_date": f"{last_year}-12-31",
+        "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum",
+        "timezone": "auto",
+    }, timeout=120)
+    response.raise_for_status()
+    return response.json()["daily"]
+
+
+def monthly_normals(daily: Dict[str, list], years: int) -> np.ndarray:
+    """(12, 4) array in FIELDS order from Open-Meteo daily series."""
+    months = np.array([int(d[5:7]) for d in daily["time"]])
+    tmax = np.array(daily["temperature_2m_max"], dtype=np.float64)
+    tmin = np.array(daily["temperature_2m_min"], dtype=np.float64)
+    rain = np.array(daily["precipitation_sum"], dtype=np.float64)
+    out = np.full((12, len(FIELDS)), np.nan, dtype=np.float32)
+    for m in range(1, 13):
+        sel = months == m
+        if not sel.any():
+            continue
+        out[m - 1] = (
+            np.nanmean(tmax[sel]),
+            np.nanmean(tmin[sel]),
+            np.nansum(rain[sel]) / years,
+            np.count_nonzero(rain[sel] >= 1.0) / years,
+        )
+    return out
+
+
+def read_stations(path: str) -> List[Tuple[str, float, float]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return [(row["name"].strip(), float(row["lat"]), float(row["lon"])) for row in csv.DictReader(f)]
+
+
+def load_existing() -> Tuple[List[str], np.ndarray, np.ndarray]:
+    try:
+        with open(os.path.join(CLIMATOLOGY_DIR, "stations.json"), "rb") as f:
+            names = orjson.loads(f.read())["names"]
+        normals = np.load(os.path.join(CLIMATOLOGY_DIR, "normals.npy"))
+        coords = np.load(os.path.join(CLIMATOLOGY_DIR, "coords.npy"))
+        return names, normals, coords
+    except (OSError, ValueError, KeyError):
+        return [], np.zeros((0, 12, len(FIELDS)), np.float32), np.zeros((0, 2), np.float32)
+
+
+def save_dataset(names: List[str], normals: np.ndarray, coords: np.ndarray, period: str):
+    """Write the three files; each is replaced atomically."""
+    os.makedirs(CLIMATOLOGY_DIR, exist_ok=True)
+    for name, array in (("normals.npy", normals.astype(np.float32)), ("coords.npy", coords.astype(np.float32))):
+        path = os.path.join(CLIMATOLOGY_DIR, name)
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, array)
+        os.replace(path + ".tmp", path)
+    meta = {"version": DATASET_VERSION, "names": names, "fields": list(FIELDS), "period": period,
+            "source": "Open-Meteo historical weather archive (ERA5)", "built_at": time.time()}
+    path = os.path.join(CLIMATOLOGY_DIR, "stations.json")
+    with open(path + ".tmp", "wb") as f:
+        f.write(orjson.dumps(meta, option=orjson.OPT_INDENT_2))
+    os.replace(path + ".tmp", path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build monthly climate normals for the weather fallback.")
+    parser.add_argument("--stations", help="CSV with name,lat,lon columns")
+    parser.add_argument("--destinations", nargs="+", help="Place names to geocode (default: knowledge pack list)")
+    parser.add_argument("--years", default="2014-2023", help="First and last year, e.g. 2014-2023")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--replace", action="store_true", help="Start a new dataset instead of merging")
+    args = parser.parse_args()
+
+    first_year, last_year = (int(y) for y in args.years.split("-"))
+    stations = read_stations(args.stations) if args.stations else []
+    if args.destinations or not stations:
+        for name in args.destinations or KNOWLEDGE_PACK_DESTINATIONS:
+            try:
+                lat, lon = get_coordinates(name)
+                stations.append((name, lat, lon))
+            except Exception as e:
+                print(f"{name}: skipped ({e})")
+
+    names, normals, coords = ([], None, None) if args.replace else load_existing()
+    rows = {name.lower(): i for i, name in enumerate(names)}
+    normals = list(normals) if normals is not None else []
+    coords = list(coords) if coords is not None else []
+
+    def build(station):
+        name, lat, lon = station
+        with priority("batch"):
+            return monthly_normals(fetch_daily(lat, lon, first_year, last_year), last_year - first_year + 1)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(build, s): s for s in stations}
+        for future in as_completed(futures):
+            name, lat, lon = futures[future]
+            try:
+                row = future.result()
+            except Exception as e:
+                print(f"{name}: failed: {type(e).__name__}: {e}", flush=True)
+                continue
+            if name.lower() in rows:
+                normals[rows[name.lower()]] = row
+                coords[rows[name.lower()]] = (lat, lon)
+            else:
+                rows[name.lower()] = len(names)
+                names.append(name)
+                normals.append(row)
+                coords.append(np.array((lat, lon), dtype=np.float32))
+            print(f"{name}: built", flush=True)
+
+    if not names:
+        print("No stations built")
+        return
+    save_dataset(names, np.stack(normals), np.stack(coords), f"{first_year}–{last_year}")
+    print(f"{len(names)} stations in {CLIMATOLOGY_DIR} ({time.perf_counter() - started:.1f}s)")
+    print(limiter.format_metrics())
+
+
+if __name__ == "__main__":
+    main()
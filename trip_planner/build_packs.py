@@ -0,0 +1,173 @@
+# build_packs.py
+"""
+Offline build of destination knowledge packs (see db/knowledge_packs.py).
+
+For each of the top-N destinations in KNOWLEDGE_PACK_DESTINATIONS it runs the
+research, hotel and transport agents with live search, takes attractions
+(geocoded) and hotel price bands from their typed outputs, and writes a
+versioned JSON pack. By default only stale packs (missing, older format, or
+older than KNOWLEDGE_PACK_MAX_AGE_DAYS) are rebuilt, so the same command works
+as the scheduled refresh, e.g. nightly from cron:
+
+    python build_packs.py --top 20
+    python build_packs.py --destinations Jaipur Goa --force
+"""
+import argparse
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List
+
+import orjson
+
+from config.setting import KNOWLEDGE_PACK_DESTINATIONS, KNOWLEDGE_PACK_TOP_N
+from db.geo_index import get_geo_index
+from db.knowledge_packs import is_stale, save_pack
+from model import get_llm
+from runtime.rate_limiter import limiter, priority
+from tasks.hotel_task import run_hotel_recommendation
+from tasks.outputs import render as render_output
+from tasks.transport_task import run_transport_advice
+from tasks.travel_task import run_travel_research
+from tools.ors_tool import get_coordinates
+
+MAX_ATTRACTIONS = 15
+_URL = re.compile(r"https?://[^\s)\]>\"',]+")
+
+EXTRACT_PROMPT = (
+    "From the travel notes below, return only a JSON object with two keys: "
+    "\"attractions\": a list of up to {n} attraction names in {destination}, most notable first; "
+    "\"price_bands\": {{\"currency\": <3-letter code>, \"bands\": {{\"budget\": [low, high], "
+    "\"mid\": [low, high], \"luxury\": [low, high]}}}} with hotel prices per night as numbers.\n\n"
+    "Attractions notes:\n{research}\n\nHotel notes:\n{hotels}"
+)
+
+
+def parse_json_object(text: str) -> Dict[str, Any]:
+    """First {...} block in an LLM reply, or {} if there is none."""
+    match = re.search(r"\{.*\}", text, re.S)
+    if not match:
+        return {}
+    try:
+        return orjson.loads(match.group(0))
+    except orjson.JSONDecodeError:
+        return {}
+
+
+def extract_facts(destination: str, research: Any, hotels: Any) -> Dict[str, Any]:
+    """Attraction names and hotel price bands: read off the typed records, or via one LLM call for raw text."""
+    if isinstance(research, dict) and isinstance(hotels, dict):
+        names = [a["name"] for a in research.get("attractions", [])][:MAX_ATTRACTIONS]
+        bands = {}
+        for option in hotels.get("options", []):
+            price = option.get("price_per_night")
+            if price is not None:
+                lo, hi = bands.get(option["tier"], (price, price))
+                bands[option["tier"]] = (min(lo, price), max(hi, price))
+        currency = next((o.get("currency") for o in hotels.get("options", []) if o.get("currency")), "INR")
+        price_bands = {"currency": currency, "bands": {tier: list(band) for tier, band in bands.items()}}
+    else:
+        prompt = EXTRACT_PROMPT.format(n=MAX_ATTRACTIONS, destination=destination,
+                                       research=render_output("travel_research", research),
+                                       hotels=render_output("hotel_recommendation", hotels))
+        facts = parse_json_object(str(get_llm("travel_researcher").call(prompt)))
+        names = [str(n).strip() for n in facts.get("attractions", []) if str(n).strip()][:MAX_ATTRACTIONS]
+        price_bands = facts.get("price_bands") if isinstance(facts.get("price_bands"), dict) else {}
+
+    attractions = []
+    for name in names:
+        try:
+            lat, lon = get_coordinates(f"{name}, {destination}")
+        except Exception as e:
+            print(f"  could not geocode {name}: {e}")
+            lat = lon = None
+        attractions.append({"name": name, "lat": lat, "lon": lon})
+    return {"attractions": attractions, "price_bands": price_bands}
+
+
+def collect_sources(*outputs: Any) -> List[str]:
+    urls = []
+    for out in outputs:
+        if isinstance(out, dict):
+            urls += out.get("sources", [])
+        else:
+            urls += _URL.findall(str(out))
+    return list(dict.fromkeys(urls))
+
+
+def build_pack(destination: str) -> Dict[str, Any]:
+    context = {"destination": destination}
+    research = run_travel_research(
+        f"Top attractions, hidden gems, neighbourhoods, food and practical tips in {destination}",
+        context, use_pack=False,
+    )
+    hotels = run_hotel_recommendation(
+        f"Hotels in {destination} across budget, mid-range and luxury, with prices per night",
+        context, use_pack=False,
+    )
+    transport = run_transport_advice(
+        f"Getting to {destination} from the nearest major hubs and getting around locally",
+        context, use_pack=False,
+    )
+    try:
+        city_lat, city_lon = get_coordinates(destination)
+    except Exception:
+        city_lat = city_lon = None
+    return {
+        "research": research,
+        "hotels": hotels,
+        "transport": transport,
+        "coordinates": {"lat": city_lat, "lon": city_lon},
+        **extract_facts(destination, research, hotels),
+        "sources": collect_sources(research, hotels, transport),
+    }
+
+
+def refresh_packs(destinations: List[str], force: bool = False, workers: int = 2) -> Dict[str, str]:
+    """Rebuild the packs that are stale (or all with `force`); returns a status per destination."""
+    todo = [d for d in destinations if force or is_stale(d)]
+    status = {d: "fresh" for d in destinations if d not in todo}
+
+    def build(destination: str):
+        # Pack builds yield external API budget to interactive chat turns
+        with priority("batch"):
+            pack = build_pack(destination)
+            save_pack(destination, pack)
+        # Geocoded attractions also go to the geo index behind the Nearby Hotels tool
+        get_geo_index().add_pack({**pack, "destination": destination})
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(build, d): d for d in todo}
+        for future in as_completed(futures):
+            destination = futures[future]
+            try:
+                future.result()
+                status[destination] = "built"
+            except Exception as e:
+                status[destination] = f"failed: {type(e).__name__}: {e}"
+            print(f"{destination}: {status[destination]}", flush=True)
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or refresh destination knowledge packs.")
+    parser.add_argument("--top", type=int, default=KNOWLEDGE_PACK_TOP_N,
+                        help="Number of destinations from KNOWLEDGE_PACK_DESTINATIONS to cover")
+    parser.add_argument("--destinations", nargs="+", help="Build these destinations instead of the top-N list")
+    parser.add_argument("--force", action="store_true", help="Rebuild packs even if they are fresh")
+    parser.add_argument("--workers", type=int, default=2, help="Destinations built concurrently")
+    args = parser.parse_args()
+
+    destinations = args.destinations or KNOWLEDGE_PACK_DESTINATIONS[:args.top]
+    started = time.perf_counter()
+    status = refresh_packs(destinations, force=args.force, workers=args.workers)
+    counts = {}
+    for s in status.values():
+        key = s.split(":")[0]
+        counts[key] = counts.get(key, 0) + 1
+    print(f"Done in {time.perf_counter() - started:.1f}s: " + ", ".join(f"{v} {k}" for k, v in sorted(counts.items())))
+    print(limiter.format_metrics())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 # config/settings.py
+import os
+
 CHROMA_DB_DIR = "./chroma_db"
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 TOP_K = 3
@@ -6,3 +8,261 @@ TOP_K = 3
 # You can add more settings like default travel parameters
 DEFAULT_TRAVELERS = 1
 DEFAULT_BUDGET = 10000
+
+# Redis connection (shared by memory, session state and caches)
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+
+# Orchestrator session state: "memory" (per process), "redis" or "sqlite"
+SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "memory")
+SESSION_SQLITE_PATH = os.getenv("SESSION_SQLITE_PATH", "./sessions.db")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Worker threads for agent crews, shared by all turns in a process (multi-destination trips run legs in parallel)
+MAX_PARALLEL_AGENTS = int(os.getenv("MAX_PARALLEL_AGENTS", "16"))
+
+# Call budgets per external provider, enforced across processes through Redis.
+#   rpm:   requests per minute      tpm: LLM tokens per minute
+#   daily: requests per calendar day (UTC)      0 disables a limit
+PROVIDER_BUDGETS = {
+    "gemini": {
+        "rpm": int(os.getenv("GEMINI_RPM", "1000")),
+        "tpm": int(os.getenv("GEMINI_TPM", "1000000")),
+        "daily": int(os.getenv("GEMINI_DAILY", "0")),
+    },
+    "serper": {"rpm": int(os.getenv("SERPER_RPM", "300")), "daily": int(os.getenv("SERPER_DAILY", "0"))},
+    "duckduckgo": {"rpm": int(os.getenv("DUCKDUCKGO_RPM", "30"))},
+    "openweather": {"rpm": int(os.getenv("OPENWEATHER_RPM", "60")), "daily": int(os.getenv("OPENWEATHER_DAILY", "0"))},
+    "ors": {"rpm": int(os.getenv("ORS_RPM", "40")), "daily": int(os.getenv("ORS_DAILY", "2000"))},
+    "ors_geocode": {"rpm": int(os.getenv("ORS_GEOCODE_RPM", "100")), "daily": int(os.getenv("ORS_GEOCODE_DAILY", "1000"))},
+    "open_meteo": {"rpm": int(os.getenv("OPEN_METEO_RPM", "30"))},  # build_climatology.py only
+}
+
+# Share of each budget held back from lower-priority callers, so interactive
+# chat turns still get through while batch jobs or prefetches saturate a provider.
+PRIORITY_RESERVE = {"interactive": 0.0, "prefetch": 0.15, "batch": 0.3}
+
+# LLM tiers: each tier is a fallback chain, tried in order on timeout or error
+LLM_TIERS = {
+    "small": [
+        os.getenv("LLM_SMALL_MODEL", "gemini/gemini-2.5-flash-lite"),
+        os.getenv("LLM_SMALL_FALLBACK", "gemini/gemini-2.0-flash-lite"),
+    ],
+    "large": [
+        os.getenv("LLM_LARGE_MODEL", "gemini/gemini-2.5-flash"),
+        os.getenv("LLM_LARGE_FALLBACK", "gemini/gemini-2.5-flash-lite"),
+    ],
+}
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+
+# Model tier and temperature per agent. Agents whose answers are cached or shared
+# run at temperature 0 so the same inputs give the same output.
+# Override per agent with LLM_TIER_<AGENT> / LLM_TEMPERATURE_<AGENT>, e.g. LLM_TIER_WEATHER_ADVISOR=large.
+_AGENT_LLM_DEFAULTS = {
+    "intent_classifier": ("small", 0.0),
+    "travel_researcher": ("small", 0.0),
+    "weather_advisor": ("small", 0.0),
+    "transport_advisor": ("small", 0.0),
+    "hotel_recommender": ("small", 0.0),
+    "hotel_booker": ("small", 0.0),
+    "budget_optimizer": ("small", 0.0),
+    "itinerary_planner": ("large", 0.7),
+    "conversation_summarizer": ("small", 0.0),
+}
+AGENT_LLM = {
+    agent: {
+        "tier": os.getenv(f"LLM_TIER_{agent.upper()}", tier),
+        "temperature": float(os.getenv(f"LLM_TEMPERATURE_{agent.upper()}", str(temperature))),
+    }
+    for agent, (tier, temperature) in _AGENT_LLM_DEFAULTS.items()
+}
+
+# Use the small tier to classify turns the keyword rules can't place (costs one short LLM call)
+LLM_INTENT_FALLBACK = os.getenv("LLM_INTENT_FALLBACK", "0") == "1"
+
+# "stub" swaps every agent's LLM for the local stub provider (benchmarks, load tests)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+
+# Gemini context caching: agent system prompts (role, backstory, tools; see tasks/prompts.py) of at
+# least GEMINI_CACHE_MIN_TOKENS are sent as cached content so repeated agent calls reuse them.
+# Shorter prompts still benefit from Gemini's implicit prefix caching.
+GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "1") == "1"
+GEMINI_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_CACHE_MIN_TOKENS", "1024"))
+
+# Time budget per chat turn in seconds, by intent ("default" covers the rest).
+# Override per intent with TURN_DEADLINE_<INTENT>, or per client via ConversationalOrchestrator(deadlines=...).
+_TURN_DEADLINE_DEFAULTS = {
+    "weather": 45,
+    "transport": 60,
+    "hotels": 60,
+    "budget": 45,
+    "overview": 60,
+    "hotel_booking": 30,
+    "itinerary": 150,
+    "full_planning": 150,
+    "default": 60,
+}
+TURN_DEADLINES = {
+    intent: float(os.getenv(f"TURN_DEADLINE_{intent.upper()}", str(seconds)))
+    for intent, seconds in _TURN_DEADLINE_DEFAULTS.items()
+}
+# The itinerary builder is skipped (partial answer instead) if less than this is left
+ITINERARY_MIN_SECONDS = float(os.getenv("ITINERARY_MIN_SECONDS", "20"))
+
+# Destination knowledge packs (see build_packs.py). Tasks answer from a pack instead of
+# searching while it is younger than KNOWLEDGE_PACK_EXPIRE_DAYS; the refresh job
+# rebuilds packs older than KNOWLEDGE_PACK_MAX_AGE_DAYS.
+KNOWLEDGE_PACK_DIR = os.getenv("KNOWLEDGE_PACK_DIR", "./knowledge_packs")
+KNOWLEDGE_PACK_MAX_AGE_DAYS = float(os.getenv("KNOWLEDGE_PACK_MAX_AGE_DAYS", "30"))
+KNOWLEDGE_PACK_EXPIRE_DAYS = float(os.getenv("KNOWLEDGE_PACK_EXPIRE_DAYS", "60"))
+# Most requested destinations first; build_packs.py --top N takes the first N
+KNOWLEDGE_PACK_DESTINATIONS = [
+    d.strip() for d in os.getenv(
+        "KNOWLEDGE_PACK_DESTINATIONS",
+        "Goa,Jaipur,Manali,Udaipur,Kerala,Delhi,Mumbai,Agra,Rishikesh,Shimla,"
+        "Darjeeling,Varanasi,Leh,Pondicherry,Ooty,Munnar,Mysore,Amritsar,Andaman,Hampi",
+    ).split(",") if d.strip()
+]
+KNOWLEDGE_PACK_TOP_N = int(os.getenv("KNOWLEDGE_PACK_TOP_N", "20"))
+
+# Local index over fetched search results (db/search_index.py). The knowledge search tool
+# answers from it when at least SEARCH_INDEX_MIN_HITS results have a cosine similarity to the query
+# of SEARCH_INDEX_MIN_COSINE or more (results are ranked by hybrid BM25 + cosine), and searches the
+# web otherwise.
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", "./search_index.db")
+SEARCH_INDEX_MAX_AGE_DAYS = float(os.getenv("SEARCH_INDEX_MAX_AGE_DAYS", "30"))
+SEARCH_INDEX_MIN_COSINE = float(os.getenv("SEARCH_INDEX_MIN_COSINE", "0.6"))
+SEARCH_INDEX_MIN_HITS = int(os.getenv("SEARCH_INDEX_MIN_HITS", "3"))
+
+# Batch Web Search tool (tools/batch_search_tool.py): up to BATCH_SEARCH_MAX_QUERIES queries per
+# call, run concurrently on BATCH_SEARCH_WORKERS threads per process, merged into at most
+# BATCH_SEARCH_MAX_RESULTS results. SEARCH_HTTP_POOL_SIZE keep-alive connections to Serper.
+BATCH_SEARCH_MAX_QUERIES = int(os.getenv("BATCH_SEARCH_MAX_QUERIES", "6"))
+BATCH_SEARCH_WORKERS = int(os.getenv("BATCH_SEARCH_WORKERS", "16"))
+BATCH_SEARCH_RESULTS_PER_QUERY = int(os.getenv("BATCH_SEARCH_RESULTS_PER_QUERY", "5"))
+BATCH_SEARCH_MAX_RESULTS = int(os.getenv("BATCH_SEARCH_MAX_RESULTS", "12"))
+SEARCH_HTTP_POOL_SIZE = int(os.getenv("SEARCH_HTTP_POOL_SIZE", "16"))
+
+# Embedding service (db/embedding.py): "onnx" runs the int8 ONNX export with ONNX Runtime,
+# "hf" the HuggingFace/PyTorch model. Concurrent requests are grouped into batches of up
+# to EMBEDDING_BATCH_SIZE, waiting at most EMBEDDING_BATCH_WAIT_MS for a batch to fill.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "onnx")
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model_quint8_avx2.onnx")
+EMBEDDING_MODEL_DIR = os.getenv("EMBEDDING_MODEL_DIR", "./models")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))  # 0: ONNX Runtime default
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "20000"))
+
+# Speculative prefetch (runtime/prefetch.py): after each turn, run the agents for the most
+# likely next intents in the background at "prefetch" priority.
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") == "1"
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "2"))
+PREFETCH_MAX_JOBS_PER_TURN = int(os.getenv("PREFETCH_MAX_JOBS_PER_TURN", "2"))
+PREFETCH_HOURLY_BUDGET = int(os.getenv("PREFETCH_HOURLY_BUDGET", "300"))  # agent runs/hour, all processes; 0 = no cap
+PREFETCH_MIN_PROBABILITY = float(os.getenv("PREFETCH_MIN_PROBABILITY", "0.25"))
+PREFETCH_DEADLINE_SECONDS = float(os.getenv("PREFETCH_DEADLINE_SECONDS", "120"))
+# Pseudo-counts for intent -> next intent, used until real transitions accumulate
+PREFETCH_PRIOR = {
+    "overview": {"weather": 2, "hotels": 2, "itinerary": 1},
+    "weather": {"hotels": 3, "transport": 2},
+    "transport": {"hotels": 3, "budget": 1},
+    "hotels": {"transport": 2, "budget": 2, "hotel_booking": 1},
+    "budget": {"hotels": 2, "itinerary": 1},
+    "itinerary": {"hotels": 1, "budget": 1},
+    "full_planning": {"hotels": 1, "budget": 1},
+}
+
+# Turn profiling (runtime/profiling.py): off unless PROFILE_TURNS=1 or a turn asks for it
+# (`?profile=1` in the app). "pyinstrument" adds an HTML flame graph if it is installed.
+PROFILE_TURNS = os.getenv("PROFILE_TURNS", "0") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+PROFILE_BACKEND = os.getenv("PROFILE_BACKEND", "cprofile")
+
+# OpenWeather forecast cache (db/forecast_cache.py): one upstream call per location grid cell
+# (WEATHER_GEO_PRECISION decimal degrees) per forecast issuance bucket, shared through Redis.
+WEATHER_BUCKET_SECONDS = int(os.getenv("WEATHER_BUCKET_SECONDS", "10800"))  # OpenWeather issues every 3 hours
+WEATHER_GEO_PRECISION = int(os.getenv("WEATHER_GEO_PRECISION", "1"))  # 0.1° ≈ 11 km
+# A hit in the last WEATHER_REFRESH_AHEAD_SECONDS of a bucket schedules a fetch for when the next one starts
+WEATHER_REFRESH_AHEAD_SECONDS = int(os.getenv("WEATHER_REFRESH_AHEAD_SECONDS", "600"))
+WEATHER_CACHE_MEMORY_SIZE = int(os.getenv("WEATHER_CACHE_MEMORY_SIZE", "1024"))
+
+# Climate normals (db/climatology.py, built by build_climatology.py) answer weather questions for
+# trips starting more than WEATHER_FORECAST_HORIZON_DAYS ahead, from the nearest station
+# within CLIMATOLOGY_MAX_KM.
+CLIMATOLOGY_DIR = os.getenv("CLIMATOLOGY_DIR", "./climatology")
+CLIMATOLOGY_MAX_KM = float(os.getenv("CLIMATOLOGY_MAX_KM", "150"))
+# While the dataset is missing, look for it again at most this often
+CLIMATOLOGY_RETRY_SECONDS = int(os.getenv("CLIMATOLOGY_RETRY_SECONDS", "300"))
+WEATHER_FORECAST_HORIZON_DAYS = int(os.getenv("WEATHER_FORECAST_HORIZON_DAYS", "5"))
+
+# zstd compression of stored memories and session fields (db/codec.py). Values smaller than
+# COMPRESSION_MIN_BYTES are stored as plain JSON. A dictionary trained on our own travel text
+# (train_zstd_dict.py) is used when COMPRESSION_DICT_DIR holds one.
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1") == "1"
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "256"))
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "3"))
+COMPRESSION_DICT_DIR = os.getenv("COMPRESSION_DICT_DIR", "./zstd_dicts")
+
+# Rolling conversation summary (runtime/summary.py) passed to the agents instead of the history.
+# The last SUMMARY_RECENT_TURNS exchanges are kept as one extract each, older ones are folded
+# into a digest; only when the summary would exceed SUMMARY_MAX_TOKENS is the digest condensed
+# by the small-tier model (trimmed instead if that call fails).
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "400"))
+SUMMARY_RECENT_TURNS = int(os.getenv("SUMMARY_RECENT_TURNS", "4"))
+SUMMARY_LINE_CHARS = int(os.getenv("SUMMARY_LINE_CHARS", "280"))
+SUMMARY_MAX_PREFERENCES = int(os.getenv("SUMMARY_MAX_PREFERENCES", "8"))
+
+# Geo index of geocoded hotels and attractions (db/geo_index.py) behind the Nearby Hotels tool.
+# Points are bucketed in GEO_CELL_DEGREES grid cells (0.02° ≈ 2.2 km); up to GEO_GEOCODE_PER_REPORT
+# new hotels from each hotel recommendation are geocoded in the background.
+GEO_INDEX_PATH = os.getenv("GEO_INDEX_PATH", "./geo_index.db")
+GEO_CELL_DEGREES = float(os.getenv("GEO_CELL_DEGREES", "0.02"))
+GEO_DEFAULT_RADIUS_KM = float(os.getenv("GEO_DEFAULT_RADIUS_KM", "2"))
+GEO_MAX_RADIUS_KM = float(os.getenv("GEO_MAX_RADIUS_KM", "25"))
+GEO_RELOAD_SECONDS = float(os.getenv("GEO_RELOAD_SECONDS", "5"))
+GEO_GEOCODE_PER_REPORT = int(os.getenv("GEO_GEOCODE_PER_REPORT", "5"))
+
+# Agent job queue (runtime/job_queue.py): with JOB_QUEUE_ENABLED=1 agent runs are added to a Redis
+# stream and executed by `python worker.py` processes instead of the web process's own pool.
+# A job a worker stops refreshing for JOB_VISIBILITY_TIMEOUT_SECONDS (the worker died) is handed
+# to another worker; failed jobs are retried up to JOB_MAX_ATTEMPTS runs in total.
+JOB_QUEUE_ENABLED = os.getenv("JOB_QUEUE_ENABLED", "0") == "1"
+JOB_QUEUE_STREAM = os.getenv("JOB_QUEUE_STREAM", "agent_jobs")
+JOB_QUEUE_GROUP = os.getenv("JOB_QUEUE_GROUP", "agent_workers")
+JOB_QUEUE_MAXLEN = int(os.getenv("JOB_QUEUE_MAXLEN", "100000"))
+JOB_VISIBILITY_TIMEOUT_SECONDS = float(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RESULT_TTL_SECONDS = int(os.getenv("JOB_RESULT_TTL_SECONDS", "600"))
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", str(MAX_PARALLEL_AGENTS)))
+
+# Questions about the session itself ("what dates did I pick?", "repeat the weather") are answered
+# from the trip context, stored agent outputs and the last LOCAL_ANSWER_MEMORY_TURNS memories,
+# without agents (runtime/local_answer.py).
+LOCAL_ANSWER_ENABLED = os.getenv("LOCAL_ANSWER_ENABLED", "1") == "1"
+LOCAL_ANSWER_MEMORY_TURNS = int(os.getenv("LOCAL_ANSWER_MEMORY_TURNS", "20"))
+
+# Tool calls inside one agent run (runtime/tool_guard.py): identical calls are answered from the first
+# one, loops (the same call or cycle of up to TOOL_LOOP_MAX_CYCLE calls, TOOL_LOOP_REPEATS times in a
+# row) are cut short, and each agent may run at most `calls` tools and `iterations` reasoning steps.
+# Override per agent with TOOL_CALL_BUDGET_<AGENT> / AGENT_MAX_ITER_<AGENT>.
+TOOL_LOOP_REPEATS = int(os.getenv("TOOL_LOOP_REPEATS", "3"))
+TOOL_LOOP_MAX_CYCLE = int(os.getenv("TOOL_LOOP_MAX_CYCLE", "3"))
+_AGENT_TOOL_BUDGET_DEFAULTS = {
+    "travel_researcher": (8, 15),
+    "weather_advisor": (4, 10),
+    "transport_advisor": (8, 15),
+    "hotel_recommender": (8, 15),
+    "hotel_booker": (2, 6),
+    "budget_optimizer": (0, 6),
+    "itinerary_planner": (0, 6),
+    "default": (8, 15),
+}
+AGENT_TOOL_BUDGETS = {
+    agent: {
+        "calls": int(os.getenv(f"TOOL_CALL_BUDGET_{agent.upper()}", str(calls))),
+        "iterations": int(os.getenv(f"AGENT_MAX_ITER_{agent.upper()}", str(iterations))),
+    }
+    for agent, (calls, iterations) in _AGENT_TOOL_BUDGET_DEFAULTS.items()
+}
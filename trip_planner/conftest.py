@@ -0,0 +1,2 @@
+# conftest.py
+# Lets the tests import the app's modules (runtime, db, ...) the way the app does, from this directory.
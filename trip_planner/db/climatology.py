@@ -0,0 +1,128 @@
+# db/climatology.py
+"""
+Monthly climate normals per station, for trips beyond the forecast range.
+
+The dataset (built offline by `build_climatology.py`) lives in CLIMATOLOGY_DIR:
+
+- normals.npy   float32 (stations, 12, 4): mean daily high °C, mean daily low °C,
+                mean monthly precipitation mm, mean days with >= 1 mm of rain
+- coords.npy    float32 (stations, 2): latitude, longitude in degrees
+- stations.json station names (row order), period and source
+
+The arrays are memory-mapped, so opening the dataset costs nothing and only
+the rows a lookup touches are read. Coordinates are kept in radians in
+memory for a vectorised nearest-station search. While the dataset is missing
+it is looked for again every CLIMATOLOGY_RETRY_SECONDS; `reload()` picks up a
+rebuilt one at once.
+"""
+import os
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import orjson
+
+from config.setting import CLIMATOLOGY_DIR, CLIMATOLOGY_RETRY_SECONDS
+
+FIELDS = ("tmax_c", "tmin_c", "precip_mm", "rain_days")
+MONTHS = ("January", "February", "March", "April", "May", "June", "July",
+          "August", "September", "October", "November", "December")
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distances from one point to arrays of points (all in radians)."""
+    dlat = lats - lat
+    dlon = lons - lon
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def months_between(start: date, end: date) -> List[int]:
+    """Month numbers (1-12) covered by [start, end], in order, each once (at most 12)."""
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month) and len(months) < 12:
+        months.append(month)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+class Climatology:
+    def __init__(self, directory: str = CLIMATOLOGY_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._retry_at = 0.0
+        self.normals: Optional[np.ndarray] = None
+        self.meta: Dict[str, Any] = {}
+        self._names: Dict[str, int] = {}
+        self._lat: Optional[np.ndarray] = None
+        self._lon: Optional[np.ndarray] = None
+
+    def _load(self) -> bool:
+        with self._lock:
+            if self._loaded:
+                return True
+            if time.monotonic() < self._retry_at:
+                return False
+            try:
+                self.normals = np.load(os.path.join(self.directory, "normals.npy"), mmap_mode="r")
+                coords = np.load(os.path.join(self.directory, "coords.npy"), mmap_mode="r")
+                with open(os.path.join(self.directory, "stations.json"), "rb") as f:
+                    self.meta = orjson.loads(f.read())
+            except (OSError, ValueError) as e:
+                print(f"Climatology dataset not available in {self.directory}: {e}")
+                self.normals = None
+                self._retry_at = time.monotonic() + CLIMATOLOGY_RETRY_SECONDS
+                return False
+            self._lat = np.radians(np.asarray(coords[:, 0], dtype=np.float64))
+            self._lon = np.radians(np.asarray(coords[:, 1], dtype=np.float64))
+            self._names = {name.lower(): i for i, name in enumerate(self.meta.get("names", []))}
+            self._loaded = True
+            return True
+
+    def reload(self):
+        """Pick up a rebuilt dataset (e.g. after `build_climatology.py` added stations)."""
+        with self._lock:
+            self._loaded = False
+            self._retry_at = 0.0
+        self._load()
+
+    def available(self) -> bool:
+        return self._load()
+
+    def station_by_name(self, name: str) -> Optional[int]:
+        if not self._load():
+            return None
+        return self._names.get(name.split(",")[0].strip().lower())
+
+    def nearest(self, lat: float, lon: float) -> Optional[Tuple[int, float]]:
+        """(station row, distance in km) of the closest station."""
+        if not self._load() or not len(self._lat):
+            return None
+        distances = haversine_km(np.radians(lat), np.radians(lon), self._lat, self._lon)
+        i = int(np.argmin(distances))
+        return i, float(distances[i])
+
+    def station_name(self, i: int) -> str:
+        return self.meta["names"][i]
+
+    def month_normals(self, i: int, months: List[int]) -> List[Dict[str, Any]]:
+        rows = np.asarray(self.normals[i, [m - 1 for m in months]], dtype=np.float64)
+        return [{"month": MONTHS[m - 1], **{f: round(float(v), 1) for f, v in zip(FIELDS, row)}}
+                for m, row in zip(months, rows)]
+
+
+_climatology: Optional[Climatology] = None
+_climatology_lock = threading.Lock()
+
+
+def get_climatology() -> Climatology:
+    global _climatology
+    with _climatology_lock:
+        if _climatology is None:
+            _climatology = Climatology()
+        return _climatology
@@ -0,0 +1,146 @@
+# db/codec.py
+"""
+Compression codec for stored values (conversation memories, session fields
+such as agent outputs).
+
+Values are JSON bytes. Anything of at least COMPRESSION_MIN_BYTES is stored as
+
+    MAGIC (b"\\x1bZ") | codec version (1 byte) | zstd frame
+
+Version 1 frames carry the id of the zstd dictionary they were compressed
+with (0 for none). Dictionaries are trained on our own travel text by
+`train_zstd_dict.py` and kept in COMPRESSION_DICT_DIR as `travel-<id>.zdict`,
+with `CURRENT` naming the one new values use; older dictionaries stay there
+so values written with them can still be read. Smaller values, and every
+value written before compression existed, are plain JSON: since JSON never
+starts with MAGIC, `decode` passes them through unchanged.
+"""
+import os
+import threading
+from typing import Dict, Optional
+
+import zstandard as zstd
+
+from config.setting import COMPRESSION_DICT_DIR, COMPRESSION_ENABLED, COMPRESSION_LEVEL, COMPRESSION_MIN_BYTES
+
+MAGIC = b"\x1bZ"
+CODEC_VERSION = 1
+CURRENT_FILE = "CURRENT"
+
+
+def dict_filename(dict_id: int) -> str:
+    return f"travel-{dict_id}.zdict"
+
+
+class Codec:
+    def __init__(self, dict_dir: Optional[str] = COMPRESSION_DICT_DIR, level: int = COMPRESSION_LEVEL,
+                 min_bytes: int = COMPRESSION_MIN_BYTES, enabled: bool = COMPRESSION_ENABLED):
+        self.dict_dir = dict_dir
+        self.level = level
+        self.min_bytes = min_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._dicts: Dict[int, zstd.ZstdCompressionDict] = {}
+        self._current: Optional[zstd.ZstdCompressionDict] = None
+        self._loaded = False
+        # zstd (de)compressor objects are not thread-safe: one set per thread
+        self._local = threading.local()
+
+    # -------------------
+    # Dictionaries
+    # -------------------
+    def _load_current(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self.dict_dir:
+                return
+            try:
+                with open(os.path.join(self.dict_dir, CURRENT_FILE)) as f:
+                    name = f.read().strip()
+                with open(os.path.join(self.dict_dir, name), "rb") as f:
+                    current = zstd.ZstdCompressionDict(f.read())
+            except OSError:
+                return  # no trained dictionary yet: plain zstd
+            self._dicts[current.dict_id()] = current
+            self._current = current
+
+    def dictionary(self, dict_id: int) -> zstd.ZstdCompressionDict:
+        """The dictionary a frame was written with, loaded from COMPRESSION_DICT_DIR on first use."""
+        with self._lock:
+            found = self._dicts.get(dict_id)
+        if found is not None:
+            return found
+        path = os.path.join(self.dict_dir or "", dict_filename(dict_id))
+        try:
+            with open(path, "rb") as f:
+                found = zstd.ZstdCompressionDict(f.read())
+        except OSError:
+            raise ValueError(f"zstd dictionary {dict_id} not found in {self.dict_dir}")
+        with self._lock:
+            self._dicts[dict_id] = found
+        return found
+
+    def use(self, dictionary: Optional[zstd.ZstdCompressionDict]):
+        """Compress new values with `dictionary` (None: no dictionary)."""
+        with self._lock:
+            self._loaded = True
+            self._current = dictionary
+            if dictionary is not None:
+                self._dicts[dictionary.dict_id()] = dictionary
+
+    def reload(self):
+        """Pick up a newly trained CURRENT dictionary."""
+        with self._lock:
+            self._loaded = False
+        self._load_current()
+
+    def current_dict_id(self) -> int:
+        self._load_current()
+        return self._current.dict_id() if self._current is not None else 0
+
+    # -------------------
+    # Encoding
+    # -------------------
+    def _compressor(self) -> zstd.ZstdCompressor:
+        self._load_current()
+        current = self._current
+        key = (current.dict_id() if current is not None else 0, self.level)
+        compressors = self._local.__dict__.setdefault("compressors", {})
+        compressor = compressors.get(key)
+        if compressor is None:
+            compressor = compressors[key] = zstd.ZstdCompressor(level=self.level, dict_data=current)
+        return compressor
+
+    def _decompressor(self, dict_id: int) -> zstd.ZstdDecompressor:
+        decompressors = self._local.__dict__.setdefault("decompressors", {})
+        decompressor = decompressors.get(dict_id)
+        if decompressor is None:
+            dictionary = self.dictionary(dict_id) if dict_id else None
+            decompressor = decompressors[dict_id] = zstd.ZstdDecompressor(dict_data=dictionary)
+        return decompressor
+
+    def encode(self, data: bytes) -> bytes:
+        if not self.enabled or len(data) < self.min_bytes:
+            return data
+        compressed = self._compressor().compress(data)
+        if len(compressed) + len(MAGIC) + 1 >= len(data):
+            return data  # incompressible: keep it plain
+        return MAGIC + bytes((CODEC_VERSION,)) + compressed
+
+    def decode(self, data: Optional[bytes]) -> Optional[bytes]:
+        if data is None or not data.startswith(MAGIC):
+            return data
+        version = data[len(MAGIC)]
+        if version != CODEC_VERSION:
+            raise ValueError(f"Unknown codec version {version}")
+        frame = data[len(MAGIC) + 1:]
+        try:
+            dict_id = zstd.get_frame_parameters(frame).dict_id
+            return self._decompressor(dict_id).decompress(frame)
+        except zstd.ZstdError as e:
+            raise ValueError(f"Corrupt compressed value: {e}") from e
+
+
+codec = Codec()
@@ -1,15 +1,253 @@
 # db/embeddings.py
-from langchain.embeddings import HuggingFaceEmbeddings
+"""
+Shared MiniLM embedding service.
+
+The model is loaded once per process: by default the int8-quantized ONNX
+export of all-MiniLM-L6-v2 run with ONNX Runtime (EMBEDDING_BACKEND=onnx),
+or the HuggingFace/PyTorch model (EMBEDDING_BACKEND=hf). Concurrent requests
+are micro-batched by a single worker thread, embeddings are cached in an LRU
+keyed on a hash of the text, and results come back as L2-normalized float32
+NumPy arrays.
+"""
+import hashlib
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config.setting import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_BATCH_WAIT_MS,
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_MODEL,
+    EMBEDDING_MODEL_DIR,
+    EMBEDDING_ONNX_FILE,
+    EMBEDDING_THREADS,
+)
+
+MAX_SEQ_LENGTH = 256
+
+
+class OnnxMiniLM:
+    """MiniLM through ONNX Runtime: tokenize, run the encoder, mean-pool, normalize."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, model_file: str = EMBEDDING_ONNX_FILE,
+                 cache_dir: str = EMBEDDING_MODEL_DIR, threads: int = EMBEDDING_THREADS):
+        import onnxruntime as ort
+        from huggingface_hub import hf_hub_download
+        from tokenizers import Tokenizer
+
+        repo = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+        local_dir = os.path.join(cache_dir, repo.replace("/", "--"))
+        model_path = hf_hub_download(repo, model_file, local_dir=local_dir)
+        tokenizer_path = hf_hub_download(repo, "tokenizer.json", local_dir=local_dir)
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        hidden = self.session.run(None, feeds)[0]
+        if hidden.ndim == 3:
+            # Mean over real (unpadded) tokens, as sentence-transformers does
+            weights = mask[..., None].astype(np.float32)
+            hidden = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        return _normalize(hidden)
+
+
+class HuggingFaceMiniLM:
+    """The original langchain/PyTorch model; slower, kept for environments without ONNX Runtime."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL):
+        from langchain.embeddings import HuggingFaceEmbeddings
+
+        self.embedder = HuggingFaceEmbeddings(model_name=model_name)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return _normalize(self.embedder.embed_documents(texts))
+
+
+def _normalize(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def _load_backend(name: str = EMBEDDING_BACKEND):
+    return HuggingFaceMiniLM() if name == "hf" else OnnxMiniLM()
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class EmbeddingService:
+    def __init__(self, backend=None, batch_size: int = EMBEDDING_BATCH_SIZE,
+                 max_wait_ms: float = EMBEDDING_BATCH_WAIT_MS, cache_size: int = EMBEDDING_CACHE_SIZE):
+        self._backend = backend
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.cache_size = cache_size
+        self._queue: "queue.Queue" = queue.Queue()
+        # Guards the LRU, the in-flight map and the stats only; loading the model has its own lock
+        self._lock = threading.Lock()
+        self._backend_lock = threading.Lock()
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._inflight: Dict[bytes, Future] = {}
+        self._worker: Optional[threading.Thread] = None
+        self._stats = {"texts": 0, "cache_hits": 0, "batches": 0, "embedded": 0, "encode_seconds": 0.0}
+
+    # -------------------
+    # Model
+    # -------------------
+    @property
+    def backend(self):
+        # Cache hits never wait for a model that is still downloading or loading
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = _load_backend()
+        return self._backend
+
+    def warm_up(self, background: bool = False):
+        """Load the model and run one batch so the first real request pays no start-up cost."""
+        if background:
+            threading.Thread(target=self.warm_up, name="embedding-warm-up", daemon=True).start()
+            return
+        self.backend.encode(["warm up"])
+
+    # -------------------
+    # Public API
+    # -------------------
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """(len(texts), dim) float32 array of L2-normalized embeddings."""
+        keys = [text_key(t) for t in texts]
+        rows: List[Optional[np.ndarray]] = [None] * len(texts)
+        waiting: Dict[bytes, Future] = {}
+        with self._lock:
+            self._stats["texts"] += len(texts)
+            for i, key in enumerate(keys):
+                vector = self._cache.get(key)
+                if vector is not None:
+                    self._cache.move_to_end(key)
+                    self._stats["cache_hits"] += 1
+                    rows[i] = vector
+                elif key not in waiting:
+                    future = self._inflight.get(key)
+                    if future is None:
+                        # Nobody is embedding this text yet: queue it for the next batch
+                        future = Future()
+                        self._inflight[key] = future
+                        self._queue.put((texts[i], key, future))
+                    waiting[key] = future
+        if waiting:
+            self._ensure_worker()
+            for i, key in enumerate(keys):
+                if rows[i] is None:
+                    rows[i] = waiting[key].result()
+        if not rows:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack(rows)
+
+    def embed_one(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+    # -------------------
+    # Micro-batching worker
+    # -------------------
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Collect whatever else arrives within the wait window, up to a full batch
+            until = time.monotonic() + self.max_wait
+            while len(batch) < self.batch_size:
+                remaining = until - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._encode_batch(batch)
+
+    def _encode_batch(self, batch):
+        started = time.perf_counter()
+        try:
+            vectors = self.backend.encode([text for text, _, _ in batch])
+            vectors.setflags(write=False)  # rows are shared through the cache
+        except Exception as e:
+            with self._lock:
+                for _, key, _ in batch:
+                    self._inflight.pop(key, None)
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["embedded"] += len(batch)
+            self._stats["encode_seconds"] += time.perf_counter() - started
+            for (_, key, _), vector in zip(batch, vectors):
+                self._cache[key] = vector
+                self._inflight.pop(key, None)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        for (_, _, future), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached"] = len(self._cache)
+        stats["hit_rate"] = stats["cache_hits"] / stats["texts"] if stats["texts"] else 0.0
+        stats["mean_batch"] = stats["embedded"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+
+_service: Optional[EmbeddingService] = None
+_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """The process-wide service; the model loads on first use (or on warm_up)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = EmbeddingService()
+        return _service
+
 
 class MiniLMEmbedder:
+    """Thin front for the shared service (kept for existing callers)."""
+
     def __init__(self):
-        # all-MiniLM embeddings
-        self.embedder = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+        self.service = get_embedding_service()
 
-    def embed_text(self, text: str):
+    def embed_text(self, text: str) -> np.ndarray:
         """Return embedding vector for a single string"""
-        return self.embedder.embed_query(text)
+        return self.service.embed_one(text)
 
-    def embed_texts(self, texts: list[str]):
+    def embed_texts(self, texts: list[str]) -> np.ndarray:
         """Return embedding vectors for a list of strings"""
-        return self.embedder.embed_documents(texts)
+        return self.service.embed(texts)
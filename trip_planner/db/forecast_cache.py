@@ -0,0 +1,223 @@
+# db/forecast_cache.py
+"""
+Forecast cache for the OpenWeather tool.
+
+OpenWeather issues its 5-day / 3-hour forecast every three hours, so a payload
+fetched in one 3-hour UTC bucket stays current until the next one. Payloads
+are keyed on the location snapped to a grid of WEATHER_GEO_PRECISION decimal
+degrees plus the bucket, and kept both in process memory and in Redis for all
+processes. City spellings ("Jaipur", "jaipur", "Jaipur,IN") map to their
+location through an alias table learnt from responses, so after the first
+lookup they all share one entry, as do neighbouring places in the same grid
+cell. The raw payload is cached; callers cut it to the number of days they
+need.
+
+A hit in the last WEATHER_REFRESH_AHEAD_SECONDS of a bucket schedules one
+background fetch for the next bucket, made as soon as that bucket starts (a
+fetch before then would get the current issuance again), so busy locations
+never go cold.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import orjson
+import redis
+
+from config.setting import (
+    REDIS_DB,
+    REDIS_HOST,
+    REDIS_PORT,
+    WEATHER_BUCKET_SECONDS,
+    WEATHER_CACHE_MEMORY_SIZE,
+    WEATHER_GEO_PRECISION,
+    WEATHER_REFRESH_AHEAD_SECONDS,
+)
+from runtime.rate_limiter import priority
+
+ALIAS_KEY = "weather:aliases"
+
+
+def forecast_bucket(ts: Optional[float] = None) -> int:
+    return int((time.time() if ts is None else ts) // WEATHER_BUCKET_SECONDS)
+
+
+def normalize_city(city: str) -> str:
+    return ",".join(" ".join(part.split()) for part in city.lower().split(","))
+
+
+class ForecastCache:
+    def __init__(self, client: Optional[redis.Redis] = None, memory_size: int = WEATHER_CACHE_MEMORY_SIZE):
+        self.r = client or redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
+        self.memory_size = memory_size
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._aliases: Dict[str, Dict[str, float]] = {}
+        self._refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="forecast-refresh")
+        self._refreshing = set()
+        self._stats = {"memory_hits": 0, "redis_hits": 0, "misses": 0, "refreshes": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    # -------------------
+    # Locations
+    # -------------------
+    def location(self, city: str) -> Optional[Dict[str, float]]:
+        """Learnt location ({"lat", "lon"}) for a city spelling, or None."""
+        alias = normalize_city(city)
+        with self._lock:
+            loc = self._aliases.get(alias)
+        if loc is not None:
+            return loc
+        try:
+            raw = self.r.hget(ALIAS_KEY, alias)
+        except redis.RedisError:
+            return None
+        if raw is None:
+            return None
+        loc = orjson.loads(raw)
+        with self._lock:
+            self._aliases[alias] = loc
+        return loc
+
+    def remember(self, city: str, loc: Dict[str, float]):
+        alias = normalize_city(city)
+        with self._lock:
+            self._aliases[alias] = loc
+        try:
+            self.r.hset(ALIAS_KEY, alias, orjson.dumps(loc))
+        except redis.RedisError:
+            pass
+
+    @staticmethod
+    def cell(loc: Dict[str, float]) -> str:
+        return f"{loc['lat']:.{WEATHER_GEO_PRECISION}f},{loc['lon']:.{WEATHER_GEO_PRECISION}f}"
+
+    # -------------------
+    # Payloads
+    # -------------------
+    @staticmethod
+    def _key(cell: str, bucket: int) -> str:
+        return f"weather:forecast:{cell}:{bucket}"
+
+    def get(self, cell: str, bucket: int) -> Optional[Dict[str, Any]]:
+        key = self._key(cell, bucket)
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+        if payload is not None:
+            self._count("memory_hits")
+            return payload
+        try:
+            raw = self.r.get(key)
+        except redis.RedisError:
+            raw = None
+        if raw is None:
+            return None
+        payload = orjson.loads(raw)
+        self._remember_payload(key, payload)
+        self._count("redis_hits")
+        return payload
+
+    def put(self, cell: str, bucket: int, payload: Dict[str, Any]):
+        key = self._key(cell, bucket)
+        self._remember_payload(key, payload)
+        # Kept a little past the bucket so the refresh-ahead window can still read it
+        ttl = int((bucket + 1) * WEATHER_BUCKET_SECONDS - time.time() + WEATHER_REFRESH_AHEAD_SECONDS)
+        try:
+            self.r.set(key, orjson.dumps(payload), ex=max(ttl, 60))
+        except redis.RedisError:
+            pass
+
+    def _remember_payload(self, key: str, payload: Dict[str, Any]):
+        with self._lock:
+            self._memory[key] = payload
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    # -------------------
+    # Lookup
+    # -------------------
+    def forecast(self, city: str, fetch: Callable[..., Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Forecast payload for `city`, from cache or via `fetch(city=...)` /
+        `fetch(lat=..., lon=...)` (the raw OpenWeather /forecast response).
+        """
+        now = time.time()
+        bucket = forecast_bucket(now)
+        loc = self.location(city)
+        if loc is not None:
+            cell = self.cell(loc)
+            payload = self.get(cell, bucket)
+            if payload is not None:
+                if (bucket + 1) * WEATHER_BUCKET_SECONDS - now < WEATHER_REFRESH_AHEAD_SECONDS:
+                    self._refresh_ahead(cell, loc, bucket + 1, fetch)
+                return payload
+
+        self._count("misses")
+        payload = fetch(lat=loc["lat"], lon=loc["lon"]) if loc else fetch(city=city)
+        if loc is None:
+            loc = self._payload_location(payload)
+            if loc is None:
+                return payload
+            self.remember(city, loc)
+            # Also learn the canonical "name,CC" spelling ("Jaipur" teaches "jaipur,in")
+            info = payload.get("city") or {}
+            if info.get("name") and info.get("country"):
+                self.remember(f"{info['name']},{info['country']}", loc)
+        self.put(self.cell(loc), bucket, payload)
+        return payload
+
+    @staticmethod
+    def _payload_location(payload: Dict[str, Any]) -> Optional[Dict[str, float]]:
+        coord = (payload.get("city") or {}).get("coord") or {}
+        if coord.get("lat") is None or coord.get("lon") is None:
+            return None
+        return {"lat": float(coord["lat"]), "lon": float(coord["lon"])}
+
+    def _refresh_ahead(self, cell: str, loc: Dict[str, float], bucket: int, fetch: Callable[..., Dict[str, Any]]):
+        job: Tuple[str, int] = (cell, bucket)
+        with self._lock:
+            if job in self._refreshing:
+                return
+            self._refreshing.add(job)
+
+        def refresh():
+            try:
+                # A live lookup that missed at the start of the bucket may have fetched it already
+                if self.get(cell, bucket) is None:
+                    # Background refreshes yield provider budget to live turns
+                    with priority("prefetch"):
+                        self.put(cell, bucket, fetch(lat=loc["lat"], lon=loc["lon"]))
+                    self._count("refreshes")
+            except Exception as e:
+                print(f"Forecast refresh for {cell} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(job)
+
+        # Not before the bucket starts: OpenWeather issues the new forecast at the boundary
+        delay = bucket * WEATHER_BUCKET_SECONDS - time.time()
+        if delay > 0:
+            timer = threading.Timer(delay, self._refresher.submit, args=(refresh,))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._refresher.submit(refresh)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["redis_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["redis_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+forecast_cache = ForecastCache()
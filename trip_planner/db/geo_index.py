@@ -0,0 +1,306 @@
+# db/geo_index.py
+"""
+Local geo index of hotels and attractions, for "hotels near these sights"
+questions without searching.
+
+Places (kind, name, destination, lat/lon, and for hotels the price tier and
+price per night) live in SQLite. For queries they are held in memory per kind
+as NumPy arrays sorted by grid cell: the cell key is the row (latitude band of
+GEO_CELL_DEGREES) times a constant plus the column, so the cells of one row
+that overlap a search radius are one contiguous slice, found with two binary
+searches. Candidates from those slices are filtered with a vectorised
+haversine. A lookup touches a few hundred points at most and takes tens of
+microseconds regardless of how many places are indexed.
+
+Places come from the geocoded attractions of knowledge packs, from
+attractions the Nearby Hotels tool had to geocode, and from hotels named in
+hotel recommendations (pack builds included), geocoded in the background.
+Longitudes are not wrapped at ±180°.
+"""
+import math
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.setting import GEO_CELL_DEGREES, GEO_GEOCODE_PER_REPORT, GEO_INDEX_PATH, GEO_RELOAD_SECONDS
+from db.climatology import haversine_km
+
+KINDS = ("attraction", "hotel")
+TIERS = ("budget", "mid", "luxury")
+_UNKNOWN_TIER = len(TIERS)
+_ROW = 1 << 24  # cell key = (row + offset) * _ROW + column + offset
+_OFFSET = 1 << 22
+KM_PER_DEGREE = 111.195
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS places ("
+    "id INTEGER PRIMARY KEY, kind TEXT NOT NULL, name TEXT NOT NULL, name_key TEXT NOT NULL, "
+    "destination TEXT, destination_key TEXT NOT NULL, lat REAL NOT NULL, lon REAL NOT NULL, tier TEXT, "
+    "price REAL, currency TEXT, source TEXT, updated_at REAL NOT NULL, "
+    "UNIQUE (kind, destination_key, name_key))",
+    "CREATE INDEX IF NOT EXISTS places_updated ON places (updated_at)",
+    "CREATE INDEX IF NOT EXISTS places_name ON places (name_key)",
+]
+
+
+def place_key(text: Optional[str]) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", (text or "").lower()).strip()
+
+
+class Grid:
+    """One kind's places, sorted by grid cell."""
+
+    def __init__(self, ids: np.ndarray, lat: np.ndarray, lon: np.ndarray, tier: np.ndarray, price: np.ndarray,
+                 cell_degrees: float = GEO_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        rows = np.floor(lat / cell_degrees).astype(np.int64) + _OFFSET
+        cols = np.floor(lon / cell_degrees).astype(np.int64) + _OFFSET
+        keys = rows * _ROW + cols
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.ids = ids[order]
+        self.lat = np.radians(lat[order])
+        self.lon = np.radians(lon[order])
+        self.tier = tier[order]
+        self.price = price[order]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def within(self, lat: float, lon: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, distances in km) of the points within `radius_km` of (lat, lon) in degrees."""
+        if not len(self.ids):
+            return np.zeros(0, np.int64), np.zeros(0)
+        span_lat = radius_km / KM_PER_DEGREE
+        span_lon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        row_lo = math.floor((lat - span_lat) / self.cell_degrees) + _OFFSET
+        row_hi = math.floor((lat + span_lat) / self.cell_degrees) + _OFFSET
+        col_lo = math.floor((lon - min(span_lon, 180)) / self.cell_degrees) + _OFFSET
+        col_hi = math.floor((lon + min(span_lon, 180)) / self.cell_degrees) + _OFFSET
+        rows = np.arange(row_lo, row_hi + 1, dtype=np.int64) * _ROW
+        starts = np.searchsorted(self.keys, rows + col_lo, side="left")
+        ends = np.searchsorted(self.keys, rows + col_hi, side="right")
+        slices = [np.arange(s, e) for s, e in zip(starts.tolist(), ends.tolist()) if e > s]
+        if not slices:
+            return np.zeros(0, np.int64), np.zeros(0)
+        candidates = np.concatenate(slices) if len(slices) > 1 else slices[0]
+        distances = haversine_km(math.radians(lat), math.radians(lon), self.lat[candidates], self.lon[candidates])
+        keep = distances <= radius_km
+        return candidates[keep], distances[keep]
+
+
+class GeoIndex:
+    def __init__(self, path: str = GEO_INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._grids: Dict[str, Grid] = {}
+        self._loaded_version = None
+        self._checked_at = 0.0
+        conn = self._conn()
+        for statement in _SCHEMA:
+            conn.execute(statement)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    # -------------------
+    # Writes
+    # -------------------
+    def add_places(self, places: Iterable[Dict[str, Any]], kind: str, destination: Optional[str] = None,
+                   source: str = "") -> int:
+        """Store places (dicts with name, lat, lon; hotels also tier, price_per_night, currency)."""
+        if kind not in KINDS:
+            raise ValueError(f"Unknown place kind: {kind}")
+        rows = []
+        now = time.time()
+        for p in places:
+            if p.get("lat") is None or p.get("lon") is None or not p.get("name"):
+                continue
+            dest = p.get("destination") or destination
+            tier = p.get("tier") if p.get("tier") in TIERS else None
+            price = p.get("price_per_night", p.get("price"))
+            rows.append((kind, p["name"], place_key(p["name"]), dest, place_key(dest), float(p["lat"]),
+                         float(p["lon"]), tier, float(price) if price is not None else None,
+                         p.get("currency"), source, now))
+        if not rows:
+            return 0
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO places (kind, name, name_key, destination, destination_key, lat, lon, tier, price, "
+                "currency, source, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(kind, destination_key, name_key) DO UPDATE SET lat = excluded.lat, "
+                "lon = excluded.lon, tier = COALESCE(excluded.tier, places.tier), "
+                "price = COALESCE(excluded.price, places.price), "
+                "currency = COALESCE(excluded.currency, places.currency), source = excluded.source, "
+                "updated_at = excluded.updated_at",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._loaded_version = None  # reload on the next query
+        return len(rows)
+
+    def add_pack(self, pack: Dict[str, Any]) -> int:
+        """Index a knowledge pack's geocoded attractions."""
+        return self.add_places(pack.get("attractions") or [], "attraction", pack.get("destination"), source="pack")
+
+    # -------------------
+    # Reads
+    # -------------------
+    def _load(self) -> Dict[str, Grid]:
+        now = time.monotonic()
+        with self._lock:
+            if self._loaded_version is not None and now - self._checked_at < GEO_RELOAD_SECONDS:
+                return self._grids
+        conn = self._conn()
+        # Writes from other processes raise MAX(updated_at) or COUNT(*)
+        version = conn.execute("SELECT COUNT(*), MAX(updated_at) FROM places").fetchone()
+        with self._lock:
+            self._checked_at = now
+            if version == self._loaded_version:
+                return self._grids
+        grids = {}
+        for kind in KINDS:
+            rows = conn.execute("SELECT id, lat, lon, tier, price FROM places WHERE kind = ?", (kind,)).fetchall()
+            grids[kind] = Grid(
+                np.array([r[0] for r in rows], dtype=np.int64),
+                np.array([r[1] for r in rows], dtype=np.float64),
+                np.array([r[2] for r in rows], dtype=np.float64),
+                np.array([TIERS.index(r[3]) if r[3] in TIERS else _UNKNOWN_TIER for r in rows], dtype=np.int8),
+                np.array([r[4] if r[4] is not None else np.nan for r in rows], dtype=np.float64),
+            )
+        with self._lock:
+            self._grids, self._loaded_version = grids, version
+            return grids
+
+    def locate(self, name: str, destination: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        """Stored coordinates of a place by name (any kind), preferring the given destination."""
+        row = self._conn().execute(
+            "SELECT lat, lon FROM places WHERE name_key = ? ORDER BY destination_key = ? DESC, updated_at DESC "
+            "LIMIT 1", (place_key(name), place_key(destination)),
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def count(self, kind: str) -> int:
+        return len(self._load().get(kind, ()))
+
+    def hotels_near(self, points: Sequence[Tuple[float, float]], radius_km: float,
+                    tiers: Optional[Sequence[str]] = None, max_price: Optional[float] = None,
+                    sort: str = "distance", limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Hotels within `radius_km` of any of `points` ((lat, lon) in degrees), each with its distance
+        to and index of the closest point. Sorted by distance then price band, or with
+        sort="price" by band, price and distance.
+        """
+        grid = self._load()["hotel"]
+        found_pos, found_dist, found_point = [], [], []
+        for i, (lat, lon) in enumerate(points):
+            pos, dist = grid.within(lat, lon, radius_km)
+            found_pos.append(pos)
+            found_dist.append(dist)
+            found_point.append(np.full(len(pos), i, dtype=np.int64))
+        if not found_pos:
+            return []
+        pos, dist, point = np.concatenate(found_pos), np.concatenate(found_dist), np.concatenate(found_point)
+        if tiers:
+            pos_tier = grid.tier[pos]
+            keep = np.isin(pos_tier, [TIERS.index(t) for t in tiers if t in TIERS])
+            pos, dist, point = pos[keep], dist[keep], point[keep]
+        if max_price is not None:
+            price = grid.price[pos]
+            keep = ~(price > max_price)  # unknown prices stay in
+            pos, dist, point = pos[keep], dist[keep], point[keep]
+        if not len(pos):
+            return []
+        # Closest point per hotel: order by (hotel, distance) and keep each hotel's first entry
+        order = np.lexsort((dist, pos))
+        pos, dist, point = pos[order], dist[order], point[order]
+        first = np.ones(len(pos), dtype=bool)
+        first[1:] = pos[1:] != pos[:-1]
+        pos, dist, point = pos[first], dist[first], point[first]
+
+        tier, price = grid.tier[pos], np.nan_to_num(grid.price[pos], nan=np.inf)
+        order = np.lexsort((dist, price, tier) if sort == "price" else (price, tier, dist))[:limit]
+        ids = grid.ids[pos[order]].tolist()
+        details = self._details(ids)
+        return [{**details[i], "distance_km": round(float(d), 2), "near": int(p)}
+                for i, d, p in zip(ids, dist[order], point[order]) if i in details]
+
+    def _details(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        rows = self._conn().execute(
+            f"SELECT id, name, destination, lat, lon, tier, price, currency FROM places WHERE id IN ({placeholders})",
+            ids,
+        ).fetchall()
+        return {r[0]: {"name": r[1], "destination": r[2], "lat": r[3], "lon": r[4], "tier": r[5],
+                       "price_per_night": r[6], "currency": r[7]} for r in rows}
+
+    def stats(self) -> Dict[str, int]:
+        grids = self._load()
+        return {kind: len(grids[kind]) for kind in KINDS}
+
+
+_index: Optional[GeoIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_geo_index() -> GeoIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = GeoIndex()
+        return _index
+
+
+# Geocoding and writing happen off the request path, one batch at a time
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="geo-index")
+
+
+def _geocode_hotels(destination: str, options: List[Dict[str, Any]]):
+    from runtime.rate_limiter import priority
+    from tools.ors_tool import get_coordinates
+
+    index = get_geo_index()
+    located = []
+    for option in options:
+        if index.locate(option["name"], destination) is not None:
+            continue
+        if len(located) >= GEO_GEOCODE_PER_REPORT:
+            break
+        try:
+            # Background geocoding yields the ORS budget to live turns
+            with priority("batch"):
+                lat, lon = get_coordinates(f"{option['name']}, {destination}")
+        except Exception as e:
+            print(f"Could not geocode hotel {option['name']}: {e}")
+            continue
+        located.append({**option, "lat": lat, "lon": lon})
+    try:
+        index.add_places(located, "hotel", destination, source="hotel_recommendation")
+    except Exception as e:
+        print(f"Error indexing hotels for {destination}: {e}")
+
+
+def learn_hotels(destination: Optional[str], report: Any):
+    """Queue the hotels of a hotel recommendation for geocoding and indexing; never delays the caller."""
+    options = report.get("options") if isinstance(report, dict) else None
+    if destination and options:
+        _writer.submit(_geocode_hotels, destination, [o for o in options if o.get("name")])
@@ -0,0 +1,123 @@
+# db/knowledge_packs.py
+"""
+Precomputed destination knowledge packs.
+
+A pack is a small JSON file per destination (built offline by
+`build_packs.py`) holding the research, hotel and local transport records,
+attractions with coordinates, hotel price bands and the sources they came
+from. The research, hotel and transport tasks answer from a fresh pack
+instead of searching the web.
+"""
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from config.setting import KNOWLEDGE_PACK_DIR, KNOWLEDGE_PACK_EXPIRE_DAYS, KNOWLEDGE_PACK_MAX_AGE_DAYS
+from tasks.outputs import render as render_output
+
+# Bump when the pack layout changes; packs of another version are rebuilt and never served
+PACK_FORMAT_VERSION = 2
+
+# Pack section -> agent whose typed output it stores
+PACK_SECTIONS = {"research": "travel_research", "hotels": "hotel_recommendation", "transport": "transport_advice"}
+
+_cache_lock = threading.Lock()
+_cache: Dict[str, tuple] = {}  # path -> (mtime, pack)
+
+
+def pack_slug(destination: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", destination.lower()).strip("-")
+
+
+def pack_path(destination: str) -> str:
+    return os.path.join(KNOWLEDGE_PACK_DIR, f"{pack_slug(destination)}.json")
+
+
+def pack_age_days(pack: Dict[str, Any]) -> float:
+    return (time.time() - pack.get("built_at", 0)) / 86400
+
+
+def read_pack(destination: str) -> Optional[Dict[str, Any]]:
+    """The stored pack for `destination` (any age or version), or None."""
+    if not destination:
+        return None
+    path = pack_path(destination)
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, "rb") as f:
+            pack = orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError) as e:
+        print(f"Error reading knowledge pack {path}: {e}")
+        return None
+    with _cache_lock:
+        _cache[path] = (mtime, pack)
+    return pack
+
+
+def load_pack(destination: Optional[str]) -> Optional[Dict[str, Any]]:
+    """The pack to answer from at runtime: current format and not expired."""
+    pack = read_pack(destination) if destination else None
+    if not pack or pack.get("version") != PACK_FORMAT_VERSION:
+        return None
+    if pack_age_days(pack) > KNOWLEDGE_PACK_EXPIRE_DAYS:
+        return None
+    return pack
+
+
+def is_stale(destination: str) -> bool:
+    """True when the pack is missing, of an older format, or due for a rebuild."""
+    pack = read_pack(destination)
+    return (
+        pack is None
+        or pack.get("version") != PACK_FORMAT_VERSION
+        or pack_age_days(pack) > KNOWLEDGE_PACK_MAX_AGE_DAYS
+    )
+
+
+def save_pack(destination: str, pack: Dict[str, Any]):
+    """Write the pack atomically; readers see either the old or the new file."""
+    os.makedirs(KNOWLEDGE_PACK_DIR, exist_ok=True)
+    previous = read_pack(destination) or {}
+    pack = {
+        **pack,
+        "version": PACK_FORMAT_VERSION,
+        "destination": destination,
+        "revision": previous.get("revision", 0) + 1,
+        "built_at": time.time(),
+    }
+    path = pack_path(destination)
+    with open(path + ".tmp", "wb") as f:
+        f.write(orjson.dumps(pack, option=orjson.OPT_INDENT_2))
+    os.replace(path + ".tmp", path)
+
+
+def pack_prompt(pack: Dict[str, Any], section: str, max_sources: int = 8) -> str:
+    """Compact text of one pack section plus the shared facts, for a task description."""
+    lines = [f"Knowledge pack for {pack['destination']} (revision {pack['revision']}):",
+             render_output(PACK_SECTIONS[section], pack.get(section, ""))]
+    attractions: List[Dict[str, Any]] = pack.get("attractions", [])
+    if attractions:
+        lines.append("Attractions (lat, lon): " + "; ".join(
+            f"{a['name']} ({a['lat']:.4f}, {a['lon']:.4f})" if a.get("lat") is not None else a["name"]
+            for a in attractions
+        ))
+    bands = pack.get("price_bands") or {}
+    if bands.get("bands"):
+        lines.append(f"Hotel price per night ({bands.get('currency', 'INR')}): " + ", ".join(
+            f"{name} {lo}-{hi}" for name, (lo, hi) in bands["bands"].items()
+        ))
+    sources = pack.get("sources", [])[:max_sources]
+    if sources:
+        lines.append("Sources: " + " ".join(sources))
+    return "\n".join(line for line in lines if line)
@@ -2,8 +2,11 @@
 import redis
 import json
 
-# Connect to Redis
-r = redis.Redis(host="localhost", port=6379, db=0, decode_responses=True)
+from config.setting import REDIS_DB, REDIS_HOST, REDIS_PORT
+from db.codec import codec
+
+# Connect to Redis (binary: payloads are stored through the compression codec)
+r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
 
 def add_memory(session_id: str, doc_id: str, text: str, metadata: dict, ttl: int = 3600):
     """Store memory for a specific session in Redis with TTL (auto-delete)."""
@@ -12,7 +15,7 @@ def add_memory(session_id: str, doc_id: str, text: str, metadata: dict, ttl: int
         "text": text,
         "metadata": metadata
     }
-    r.setex(key, ttl, json.dumps(data))  # auto-delete after ttl
+    r.setex(key, ttl, codec.encode(json.dumps(data).encode("utf-8")))  # auto-delete after ttl
     r.lpush(f"{session_id}:memories", key)
     r.expire(f"{session_id}:memories", ttl)  # expire the list too
 
@@ -27,7 +30,11 @@ def query_memory(session_id: str, top_k: int = 3):
     for doc_id in doc_ids:
         raw = r.get(doc_id)
         if raw:
-            data = json.loads(raw)
+            try:
+                data = json.loads(codec.decode(raw))  # plain JSON for small and older entries
+            except ValueError as e:
+                print(f"Skipping unreadable memory {doc_id!r}: {e}")
+                continue
             documents.append(data["text"])
             metadatas.append(data["metadata"])
 
@@ -39,4 +46,3 @@ def clear_session(session_id: str):
     for doc_id in doc_ids:
         r.delete(doc_id)
     r.delete(f"{session_id}:memories")
-
@@ -0,0 +1,238 @@
+# db/search_index.py
+"""
+Local retrieval index over every web search result the tools have fetched.
+
+Results (title, URL, snippet, destination, query, fetch time) live in SQLite
+with an FTS5 table for BM25 keyword ranking, and MiniLM embeddings
+(the shared service in db/embedding.py) stored as float32 blobs for cosine similarity. `search`
+blends both scores so repeat and near-duplicate queries can be answered
+without going back to Serper or DuckDuckGo.
+"""
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config.setting import SEARCH_INDEX_MAX_AGE_DAYS, SEARCH_INDEX_PATH
+from db.embedding import get_embedding_service
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS results ("
+    "id INTEGER PRIMARY KEY, url TEXT NOT NULL UNIQUE, title TEXT, snippet TEXT, destination TEXT, "
+    "query TEXT, source TEXT, fetched_at REAL NOT NULL, embedding BLOB)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS results_fts USING fts5("
+    "title, snippet, destination, query, content='results', content_rowid='id')",
+    # Keep the FTS table in step with results (external-content table)
+    "CREATE TRIGGER IF NOT EXISTS results_ai AFTER INSERT ON results BEGIN "
+    "INSERT INTO results_fts(rowid, title, snippet, destination, query) "
+    "VALUES (new.id, new.title, new.snippet, new.destination, new.query); END",
+    "CREATE TRIGGER IF NOT EXISTS results_ad AFTER DELETE ON results BEGIN "
+    "INSERT INTO results_fts(results_fts, rowid, title, snippet, destination, query) "
+    "VALUES ('delete', old.id, old.title, old.snippet, old.destination, old.query); END",
+    "CREATE TRIGGER IF NOT EXISTS results_au AFTER UPDATE ON results BEGIN "
+    "INSERT INTO results_fts(results_fts, rowid, title, snippet, destination, query) "
+    "VALUES ('delete', old.id, old.title, old.snippet, old.destination, old.query); "
+    "INSERT INTO results_fts(rowid, title, snippet, destination, query) "
+    "VALUES (new.id, new.title, new.snippet, new.destination, new.query); END",
+]
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+# Words that would match nearly every result on their own
+_STOPWORDS = {"the", "a", "an", "in", "on", "at", "for", "to", "of", "and", "or", "is", "are", "with", "near",
+              "what", "which", "where", "how", "best", "top", "good", "me", "my", "we", "our", "i", "it", "from",
+              "by", "about", "things", "do", "places", "visit", "there", "this", "that", "some"}
+
+
+def _fts_query(text: str, exclude: str = "") -> str:
+    """
+    Match any of the content words; quoting keeps FTS5 operators in user text inert.
+    Words of `exclude` (the destination, already used as a filter) are left out.
+    """
+    skip = _STOPWORDS | {w.lower() for w in _WORD.findall(exclude)}
+    words = dict.fromkeys(w.lower() for w in _WORD.findall(text) if len(w) > 1 and w.lower() not in skip)
+    return " OR ".join(f'"{w}"' for w in words)
+
+
+class SearchIndex:
+    def __init__(self, path: str = SEARCH_INDEX_PATH, embedder=None):
+        self.path = path
+        self._embedder = embedder
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # In-memory copy of the embeddings, reloaded when rows are added
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._loaded_version = None
+        conn = self._conn()
+        for statement in _SCHEMA:
+            conn.execute(statement)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @property
+    def embedder(self):
+        # Shared, batched service; the model loads on first use
+        if self._embedder is None:
+            self._embedder = get_embedding_service()
+        return self._embedder
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """L2-normalized float32 vectors."""
+        return self.embedder.embed(texts)
+
+    # -------------------
+    # Writes
+    # -------------------
+    def add_results(self, items: List[Dict[str, Any]], query: str, source: str,
+                    destination: Optional[str] = None):
+        """Store search results (dicts with title, url, snippet); a re-fetched URL is refreshed."""
+        items = [i for i in items if i.get("url")]
+        if not items:
+            return
+        vectors = self._embed([f"{i.get('title') or ''}. {i.get('snippet') or ''}" for i in items])
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for item, vector in zip(items, vectors):
+                conn.execute(
+                    "INSERT INTO results (url, title, snippet, destination, query, source, fetched_at, embedding) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(url) DO UPDATE SET "
+                    "title = excluded.title, snippet = excluded.snippet, "
+                    "destination = COALESCE(excluded.destination, results.destination), "
+                    "query = excluded.query, source = excluded.source, fetched_at = excluded.fetched_at, "
+                    "embedding = excluded.embedding",
+                    (item["url"], item.get("title"), item.get("snippet"), destination, query, source, now,
+                     vector.tobytes()),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def prune(self, max_age_days: float = SEARCH_INDEX_MAX_AGE_DAYS) -> int:
+        cutoff = time.time() - max_age_days * 86400
+        cur = self._conn().execute("DELETE FROM results WHERE fetched_at < ?", (cutoff,))
+        with self._lock:
+            self._loaded_version = None  # force a reload without the deleted rows
+        return cur.rowcount
+
+    # -------------------
+    # Reads
+    # -------------------
+    def _vectors(self):
+        conn = self._conn()
+        # New rows raise MAX(id); refreshed rows raise MAX(fetched_at)
+        version = conn.execute("SELECT COUNT(*), MAX(id), MAX(fetched_at) FROM results").fetchone()
+        with self._lock:
+            if version != self._loaded_version:
+                rows = conn.execute(
+                    "SELECT id, embedding FROM results WHERE embedding IS NOT NULL ORDER BY id"
+                ).fetchall()
+                self._ids = np.array([r[0] for r in rows], dtype=np.int64)
+                self._matrix = (np.frombuffer(b"".join(r[1] for r in rows), dtype=np.float32)
+                                .reshape(len(rows), -1) if rows else np.zeros((0, 0), dtype=np.float32))
+                self._loaded_version = version
+            return self._ids, self._matrix
+
+    def search(self, query: str, destination: Optional[str] = None, k: int = 5, alpha: float = 0.4,
+               candidates: int = 50, max_age_days: float = SEARCH_INDEX_MAX_AGE_DAYS) -> List[Dict[str, Any]]:
+        """
+        Top `k` results by alpha * BM25 + (1 - alpha) * cosine, each score scaled to [0, 1].
+        Only results fetched within `max_age_days` (and for `destination`, if given) are returned.
+        The BM25 part is relative to the best keyword hit of this query, so `score` only ranks;
+        each result's `cosine` (query to result, unscaled) says how well it actually matches.
+        """
+        conn = self._conn()
+        bm25: Dict[int, float] = {}
+        fts = _fts_query(query, exclude=destination or "")
+        if fts:
+            for rowid, rank in conn.execute(
+                "SELECT rowid, bm25(results_fts) FROM results_fts WHERE results_fts MATCH ? "
+                "ORDER BY bm25(results_fts) LIMIT ?", (fts, candidates)
+            ):
+                bm25[rowid] = -rank  # FTS5 ranks are negative; lower is better
+        top = max(bm25.values(), default=0.0)
+        bm25 = {rowid: score / top for rowid, score in bm25.items()} if top > 0 else {}
+
+        cosine: Dict[int, float] = {}
+        ids, matrix = self._vectors()
+        if len(ids):
+            sims = matrix @ self._embed([query])[0]
+            best = np.argsort(-sims)[:candidates]
+            cosine = {int(ids[i]): float(max(sims[i], 0.0)) for i in best}
+            # Candidates found only by keywords still need their cosine score
+            missing = [rowid for rowid in bm25 if rowid not in cosine]
+            if missing:
+                positions = np.searchsorted(ids, missing)
+                for rowid, pos in zip(missing, positions):
+                    if pos < len(ids) and ids[pos] == rowid:
+                        cosine[rowid] = float(max(sims[pos], 0.0))
+
+        scores = {rowid: alpha * bm25.get(rowid, 0.0) + (1 - alpha) * cosine.get(rowid, 0.0)
+                  for rowid in set(bm25) | set(cosine)}
+        if not scores:
+            return []
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        cutoff = time.time() - max_age_days * 86400
+        placeholders = ",".join("?" * len(ranked))
+        rows = {r[0]: r for r in conn.execute(
+            f"SELECT id, url, title, snippet, destination, fetched_at FROM results WHERE id IN ({placeholders})",
+            ranked,
+        )}
+        results = []
+        for rowid in ranked:
+            row = rows.get(rowid)
+            if row is None or row[5] < cutoff:
+                continue
+            if destination and row[4] and row[4].lower() != destination.lower():
+                continue
+            results.append({"url": row[1], "title": row[2], "snippet": row[3], "destination": row[4],
+                            "fetched_at": row[5], "score": round(scores[rowid], 4),
+                            "cosine": round(cosine.get(rowid, 0.0), 4)})
+            if len(results) >= k:
+                break
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        count, oldest = self._conn().execute("SELECT COUNT(*), MIN(fetched_at) FROM results").fetchone()
+        return {"results": count, "oldest_age_days": round((time.time() - oldest) / 86400, 1) if oldest else None}
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex()
+        return _index
+
+
+# Embedding and writing happen off the request path, one batch at a time
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-index")
+
+
+def _add(items: List[Dict[str, Any]], query: str, source: str, destination: Optional[str]):
+    try:
+        get_search_index().add_results(items, query=query, source=source, destination=destination)
+    except Exception as e:
+        print(f"Error indexing search results: {e}")
+
+
+def index_results(items: List[Dict[str, Any]], query: str, source: str, destination: Optional[str] = None):
+    """Queue fetched results for indexing; never delays or fails the search that produced them."""
+    if items:
+        _writer.submit(_add, list(items), query, source, destination)
@@ -0,0 +1,374 @@
+# db/session_store.py
+import copy
+import sqlite3
+import threading
+import time
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, Iterator, Optional, Set
+
+import orjson
+import redis
+
+from config.setting import (
+    REDIS_DB,
+    REDIS_HOST,
+    REDIS_PORT,
+    SESSION_SQLITE_PATH,
+    SESSION_STORE_BACKEND,
+    SESSION_TTL_SECONDS,
+)
+from db.codec import codec
+
+
+class StaleSessionError(Exception):
+    """Raised when a session was saved by another request after it was loaded."""
+
+
+def _dumps(value: Any) -> bytes:
+    # pydantic models (and anything else exposing model_dump) are stored as plain dicts
+    return orjson.dumps(value, default=lambda o: o.model_dump(mode="json"))
+
+
+class SessionState:
+    """
+    Lazily loaded view of one session.
+
+    Only the version number is read on load; each field is fetched and decoded
+    the first time it is accessed, so a turn that only touches `context` never
+    deserializes `agent_outputs`. On save, only fields whose encoding changed
+    are written, and deleted fields are removed from the store. Fields go
+    through the codec (db/codec.py) on their way to and from the store, so
+    large ones such as agent outputs are kept compressed.
+    """
+
+    def __init__(self, store: "BaseSessionStore", session_id: str, version: int, defaults: Dict[str, Any]):
+        self._store = store
+        self.session_id = session_id
+        self.version = version
+        self.defaults = defaults
+        self._raw: Dict[str, Optional[bytes]] = {}
+        self._values: Dict[str, Any] = {}
+        self._deleted: Set[str] = set()
+
+    def _load_raw(self, field: str) -> Optional[bytes]:
+        return codec.decode(self._store.load_field(self.session_id, field))
+
+    def get(self, field: str) -> Any:
+        if field in self._deleted:
+            return copy.deepcopy(self.defaults.get(field))
+        if field not in self._values:
+            raw = self._load_raw(field)
+            self._raw[field] = raw
+            self._values[field] = orjson.loads(raw) if raw is not None else copy.deepcopy(self.defaults.get(field))
+        return self._values[field]
+
+    def set(self, field: str, value: Any):
+        if field not in self._raw:
+            self._raw[field] = self._load_raw(field)
+        self._deleted.discard(field)
+        self._values[field] = value
+
+    def delete(self, field: str):
+        """Remove `field` from the session; it reads as its default until set again."""
+        if field not in self._raw:
+            self._raw[field] = self._load_raw(field)
+        self._values.pop(field, None)
+        self._deleted.add(field)
+
+    def changed_fields(self) -> Dict[str, bytes]:
+        """Fields to write: new or changed encodings (deleted fields are in `deleted_fields`)."""
+        changes = {}
+        for field, value in self._values.items():
+            encoded = _dumps(value)
+            if encoded != self._raw.get(field):
+                changes[field] = encoded
+        return changes
+
+    def deleted_fields(self) -> Set[str]:
+        """Deleted fields that are still stored."""
+        return {field for field in self._deleted if self._raw.get(field) is not None}
+
+    def save(self, max_retries: int = 3) -> int:
+        """
+        Write changed fields, bumping the session version.
+        On a version conflict the local changes are rebased onto the latest
+        stored state and the write is retried.
+        """
+        for attempt in range(max_retries + 1):
+            changes = self.changed_fields()
+            deleted = self.deleted_fields()
+            if not changes and not deleted:
+                return self.version
+            try:
+                stored = {field: codec.encode(payload) for field, payload in changes.items()}
+                self.version = self._store.write(self.session_id, self.version, stored, deleted)
+                self._raw.update(changes)
+                self._raw.update(dict.fromkeys(deleted))
+                return self.version
+            except StaleSessionError:
+                if attempt == max_retries:
+                    raise
+                self._rebase()
+        return self.version
+
+    def _rebase(self):
+        """Re-apply this turn's edits on top of the latest stored fields."""
+        self.version = self._store.load_version(self.session_id)
+        for field, value in list(self._values.items()):
+            original_raw = self._raw.get(field)
+            original = orjson.loads(original_raw) if original_raw is not None else copy.deepcopy(self.defaults.get(field))
+            latest_raw = self._load_raw(field)
+            latest = orjson.loads(latest_raw) if latest_raw is not None else copy.deepcopy(self.defaults.get(field))
+
+            if isinstance(value, dict) and isinstance(latest, dict):
+                merged = dict(latest)
+                for k, v in value.items():
+                    if k not in original or original[k] != v:
+                        merged[k] = v
+                for k in original:
+                    if k not in value:
+                        merged.pop(k, None)
+            elif isinstance(value, list) and isinstance(latest, list) and isinstance(original, list):
+                # append-only fields (conversation history): keep both sides' new entries
+                merged = latest + value[len(original):]
+            else:
+                merged = value
+
+            self._raw[field] = latest_raw
+            self._values[field] = merged
+        for field in self._deleted:
+            self._raw[field] = self._load_raw(field)
+
+
+class SessionMap(MutableMapping):
+    """
+    Dict-like field whose entries are stored as separate session fields.
+
+    Only the key index (`<prefix>`) is decoded to list or test keys; each value
+    (`<prefix>:<key>`) is fetched on first read, and writing one entry never
+    loads the others.
+    """
+
+    def __init__(self, state: SessionState, prefix: str):
+        self._state = state
+        self._prefix = prefix
+
+    def _index(self) -> Dict[str, int]:
+        index = self._state.get(self._prefix)
+        if index is None:
+            index = {}
+            self._state.set(self._prefix, index)
+        return index
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._index():
+            raise KeyError(key)
+        return self._state.get(f"{self._prefix}:{key}")
+
+    def __setitem__(self, key: str, value: Any):
+        self._state.set(f"{self._prefix}:{key}", value)
+        self._index()[key] = 1
+
+    def __delitem__(self, key: str):
+        del self._index()[key]
+        self._state.delete(f"{self._prefix}:{key}")
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._index()))
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def __repr__(self) -> str:
+        return f"SessionMap({self._prefix!r}, keys={list(self._index())})"
+
+
+class BaseSessionStore:
+    """Interface shared by the session-state backends."""
+
+    def load(self, session_id: str, defaults: Optional[Dict[str, Any]] = None) -> SessionState:
+        return SessionState(self, session_id, self.load_version(session_id), defaults or {})
+
+    def load_version(self, session_id: str) -> int:
+        raise NotImplementedError
+
+    def load_field(self, session_id: str, field: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def write(self, session_id: str, expected_version: int, changes: Dict[str, bytes],
+              deleted: Iterable[str] = ()) -> int:
+        """
+        Atomically write `changes` and remove the `deleted` fields if the stored version
+        matches; return the new version.
+        """
+        raise NotImplementedError
+
+    def delete_field(self, session_id: str, expected_version: int, field: str) -> int:
+        """Remove one field if the stored version matches; return the new version."""
+        return self.write(session_id, expected_version, {}, [field])
+
+    def delete(self, session_id: str):
+        raise NotImplementedError
+
+
+class InMemorySessionStore(BaseSessionStore):
+    """Process-local backend; keeps the previous single-process behaviour."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._fields: Dict[str, Dict[str, bytes]] = {}
+
+    def load_version(self, session_id: str) -> int:
+        return self._versions.get(session_id, 0)
+
+    def load_field(self, session_id: str, field: str) -> Optional[bytes]:
+        return self._fields.get(session_id, {}).get(field)
+
+    def write(self, session_id: str, expected_version: int, changes: Dict[str, bytes],
+              deleted: Iterable[str] = ()) -> int:
+        with self._lock:
+            if self._versions.get(session_id, 0) != expected_version:
+                raise StaleSessionError(session_id)
+            fields = self._fields.setdefault(session_id, {})
+            fields.update(changes)
+            for field in deleted:
+                fields.pop(field, None)
+            self._versions[session_id] = expected_version + 1
+            return expected_version + 1
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._versions.pop(session_id, None)
+            self._fields.pop(session_id, None)
+
+
+class RedisSessionStore(BaseSessionStore):
+    """
+    One Redis hash per session: `v` holds the version, `f:<field>` the encoded fields.
+    Writes use WATCH/MULTI so a concurrent save makes the transaction fail.
+    """
+
+    def __init__(self, client: Optional[redis.Redis] = None, ttl: int = SESSION_TTL_SECONDS):
+        self.r = client or redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"session:{session_id}"
+
+    def load_version(self, session_id: str) -> int:
+        v = self.r.hget(self._key(session_id), "v")
+        return int(v) if v is not None else 0
+
+    def load_field(self, session_id: str, field: str) -> Optional[bytes]:
+        return self.r.hget(self._key(session_id), f"f:{field}")
+
+    def write(self, session_id: str, expected_version: int, changes: Dict[str, bytes],
+              deleted: Iterable[str] = ()) -> int:
+        key = self._key(session_id)
+        with self.r.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                current = pipe.hget(key, "v")
+                if (int(current) if current is not None else 0) != expected_version:
+                    raise StaleSessionError(session_id)
+                pipe.multi()
+                mapping = {f"f:{field}": payload for field, payload in changes.items()}
+                mapping["v"] = expected_version + 1
+                pipe.hset(key, mapping=mapping)
+                removed = [f"f:{field}" for field in deleted]
+                if removed:
+                    pipe.hdel(key, *removed)
+                pipe.expire(key, self.ttl)
+                pipe.execute()
+            except redis.WatchError:
+                raise StaleSessionError(session_id)
+        return expected_version + 1
+
+    def delete(self, session_id: str):
+        self.r.delete(self._key(session_id))
+
+
+class SQLiteSessionStore(BaseSessionStore):
+    """Single-file backend for deployments without Redis."""
+
+    def __init__(self, path: str = SESSION_SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, version INTEGER NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_fields ("
+                "session_id TEXT NOT NULL, field TEXT NOT NULL, payload BLOB NOT NULL, "
+                "PRIMARY KEY (session_id, field))"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def load_version(self, session_id: str) -> int:
+        row = self._conn().execute("SELECT version FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return row[0] if row else 0
+
+    def load_field(self, session_id: str, field: str) -> Optional[bytes]:
+        row = self._conn().execute(
+            "SELECT payload FROM session_fields WHERE session_id = ? AND field = ?", (session_id, field)
+        ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def write(self, session_id: str, expected_version: int, changes: Dict[str, bytes],
+              deleted: Iterable[str] = ()) -> int:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if expected_version == 0:
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO sessions (session_id, version, updated_at) VALUES (?, 1, ?)",
+                    (session_id, time.time()),
+                )
+            else:
+                cur = conn.execute(
+                    "UPDATE sessions SET version = version + 1, updated_at = ? WHERE session_id = ? AND version = ?",
+                    (time.time(), session_id, expected_version),
+                )
+            if cur.rowcount != 1:
+                raise StaleSessionError(session_id)
+            conn.executemany(
+                "INSERT OR REPLACE INTO session_fields (session_id, field, payload) VALUES (?, ?, ?)",
+                [(session_id, field, payload) for field, payload in changes.items()],
+            )
+            conn.executemany(
+                "DELETE FROM session_fields WHERE session_id = ? AND field = ?",
+                [(session_id, field) for field in deleted],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return expected_version + 1
+
+    def delete(self, session_id: str):
+        conn = self._conn()
+        conn.execute("DELETE FROM session_fields WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+
+def get_session_store(backend: str = SESSION_STORE_BACKEND) -> BaseSessionStore:
+    """Build the session store configured in `config/setting.py`."""
+    if backend == "redis":
+        return RedisSessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    return InMemorySessionStore()
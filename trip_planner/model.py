@@ -1,16 +1,190 @@
-# model.py
+import copy
 import os
+import threading
+import time
+from typing import Dict, List, Optional
+
 from dotenv import load_dotenv
 from crewai import LLM
 
+from config.setting import (
+    AGENT_LLM,
+    GEMINI_CACHE_MIN_TOKENS,
+    GEMINI_CONTEXT_CACHE,
+    LLM_PROVIDER,
+    LLM_TIERS,
+    LLM_TIMEOUT_SECONDS,
+)
+from runtime.deadline import DeadlineExceeded, check_deadline
+from runtime.profiling import span
+from runtime.rate_limiter import limiter
+
 load_dotenv()
 
 # Load your Gemini API key
 api_key = os.getenv("GEMINI_API_KEY")
 
-# CrewAI LLM wrapper for Google Gemini
-llm = LLM(
-    model="gemini/gemini-2.5-flash-lite",
-    api_key=api_key,
-    temperature=0.7,  
-)
+
+def estimate_tokens(messages) -> int:
+    """Rough prompt size (~4 characters per token) used to reserve tokens/min budget."""
+    if isinstance(messages, str):
+        return len(messages) // 4 + 1
+    return sum(len(str(m.get("content", ""))) for m in messages) // 4 + 1
+
+
+# Models whose context-caching request failed once; they are called without it from then on
+_no_context_cache = set()
+
+
+def with_context_cache(model: str, messages):
+    """
+    Mark a leading system message for Gemini context caching (litellm turns the
+    `cache_control` part into cached content). Only long enough prompts qualify.
+    """
+    if not GEMINI_CONTEXT_CACHE or not model.startswith("gemini/") or model in _no_context_cache:
+        return messages
+    if isinstance(messages, str) or not messages or messages[0].get("role") != "system":
+        return messages
+    system = messages[0].get("content")
+    if not isinstance(system, str) or estimate_tokens(system) < GEMINI_CACHE_MIN_TOKENS:
+        return messages
+    cached = {"role": "system",
+              "content": [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]}
+    return [cached, *messages[1:]]
+
+
+class RateLimitedLLM(LLM):
+    """LLM whose calls go through the shared rate limiter under `provider`'s budget."""
+
+    def __init__(self, *args, provider: str = "gemini", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.provider = provider
+
+    def call(self, messages, *args, **kwargs):
+        # Stops an agent that is still looping after its turn ran out of time
+        check_deadline(f"{self.model} call")
+        limiter.acquire(self.provider, tokens=estimate_tokens(messages))
+        try:
+            with span(f"llm:{self.model}"):
+                result = self.call_cached(messages, *args, **kwargs)
+        except Exception as e:
+            # Upstream 429: make every process back off instead of retrying straight away
+            if "ratelimit" in type(e).__name__.lower() or "429" in str(e):
+                limiter.backoff(self.provider, float(getattr(e, "retry_after", None) or 10))
+            raise
+        if isinstance(result, str):
+            limiter.debit(self.provider, len(result) // 4)
+        return result
+
+    def call_cached(self, messages, *args, **kwargs):
+        """Provider call with context caching where it applies; retried without it if the cache is refused."""
+        cached = with_context_cache(self.model, messages)
+        if cached is messages:
+            return super().call(messages, *args, **kwargs)
+        try:
+            return super().call(cached, *args, **kwargs)
+        except Exception as e:
+            if "cache" not in str(e).lower():
+                raise
+            print(f"Context caching failed for {self.model} ({e}); calling without it")
+            _no_context_cache.add(self.model)
+            return super().call(messages, *args, **kwargs)
+
+
+class TieredLLM(RateLimitedLLM):
+    """Primary model of a tier; on timeout or error the call moves down the fallback chain."""
+
+    def __init__(self, *args, fallbacks: Optional[List[LLM]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fallbacks = fallbacks or []
+
+    def call(self, messages, *args, **kwargs):
+        try:
+            return super().call(messages, *args, **kwargs)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            error = e
+        for fallback in self.fallbacks:
+            print(f"LLM {self.model} failed ({type(error).__name__}: {error}); falling back to {fallback.model}")
+            # The agent executor sets stop words on the LLM it was given; the fallbacks are
+            # shared by every copy of this LLM, so set them on a per-call copy
+            fallback = copy.copy(fallback)
+            fallback.stop = self.stop
+            try:
+                return fallback.call(messages, *args, **kwargs)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                error = e
+        raise error
+
+
+class StubLLM(LLM):
+    """
+    Local stand-in provider: no network, deterministic reply, simulated latency.
+    Selected with LLM_PROVIDER=stub; used by the benchmarks and load tests.
+    """
+
+    # Simulated (base latency s, seconds per output token) by model family
+    PROFILES = {
+        "flash-lite": (0.25, 0.002),
+        "flash": (0.45, 0.004),
+        "pro": (1.2, 0.01),
+    }
+
+    def __init__(self, *args, output_tokens: int = 300, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.output_tokens = output_tokens
+        # Shared with the per-run copies agents make, so counts cover every run
+        self.usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self._usage_lock = threading.Lock()
+
+    def profile(self):
+        for family in ("flash-lite", "flash", "pro"):
+            if family in self.model:
+                return self.PROFILES[family]
+        return self.PROFILES["flash-lite"]
+
+    def call(self, messages, *args, **kwargs):
+        base, per_token = self.profile()
+        time.sleep(base + per_token * self.output_tokens)
+        prompt = messages if isinstance(messages, str) else str(messages[-1].get("content", ""))
+        with self._usage_lock:
+            self.usage["calls"] += 1
+            self.usage["prompt_tokens"] += estimate_tokens(messages)
+            self.usage["completion_tokens"] += self.output_tokens
+        # Echo the request so callers can check each answer belongs to its own input
+        return f"Thought: I now know the final answer\nFinal Answer: [{self.model}] {' '.join(prompt.split())[:2000]}"
+
+
+_llm_cache: Dict[tuple, LLM] = {}
+_llm_cache_lock = threading.Lock()
+
+
+def build_llm(tier: str, temperature: float) -> LLM:
+    """LLM for a tier: its first model, falling back to the rest of the chain."""
+    models = LLM_TIERS[tier]
+    if LLM_PROVIDER == "stub":
+        return StubLLM(model=f"stub/{models[0]}", temperature=temperature)
+    fallbacks = [
+        RateLimitedLLM(model=m, api_key=api_key, temperature=temperature, timeout=LLM_TIMEOUT_SECONDS)
+        for m in models[1:]
+    ]
+    return TieredLLM(model=models[0], api_key=api_key, temperature=temperature,
+                     timeout=LLM_TIMEOUT_SECONDS, fallbacks=fallbacks)
+
+
+def get_llm(agent: str) -> LLM:
+    """The LLM configured for `agent` in config/setting.py (AGENT_LLM)."""
+    cfg = AGENT_LLM.get(agent, {"tier": "small", "temperature": 0.7})
+    key = (cfg["tier"], cfg["temperature"])
+    # Agent runs start on pool threads: one shared instance per tier and temperature
+    with _llm_cache_lock:
+        if key not in _llm_cache:
+            _llm_cache[key] = build_llm(*key)
+        return _llm_cache[key]
+
+
+# Default LLM (small tier) for code that doesn't name an agent
+llm = get_llm("default")
@@ -1,5 +1,33 @@
-from datetime import datetime
-from typing import Dict, Any, List
+"""
+Conversational orchestrator: one instance per chat session.
+
+Concurrency model (many sessions served by one process):
+
+- Session state (context, agent outputs, history) lives in a SessionState
+  loaded per orchestrator and is only mutated by the thread running the
+  session's turn. Turns of the same session are serialized by a per-session
+  lock shared by every orchestrator for that session id in the process
+  (`session_lock`); other processes are reconciled by the session store's
+  optimistic versioning.
+- Agent jobs run on a process-wide pool or, with JOB_QUEUE_ENABLED, on
+  worker processes fed through a Redis stream (runtime/job_queue.py). They
+  receive their inputs as arguments and return a record; only the turn
+  thread writes the results into the session.
+- The Agent objects in agents/ and their tools are shared, read-only
+  definitions. Every run works on `agent.copy()`, which has its own executor
+  state and its own shallow copy of the LLM (stop words are set per run).
+  Tools keep no per-call state; their caches (search index, forecast cache,
+  embedding service, rate limiter) are thread-safe.
+- Per-turn settings (deadline, cancel event, rate-limit priority, profiling)
+  travel in context variables, copied into pool threads with the job.
+"""
+import contextvars
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
 import re
 
 
@@ -10,32 +38,246 @@ from tasks.hotel_task import run_hotel_recommendation
 from tasks.budget_task import run_budget_optimizer
 from tasks.itinerary_task import run_itinerary_builder
 from tasks.hotel_booking_task import run_hotel_booking
+from tasks.outputs import brief as brief_output, render as render_output
 
 # Redis memory
 from db.memory_store import add_memory, query_memory
+from db.session_store import BaseSessionStore, InMemorySessionStore, SessionMap
+
+from config.setting import (
+    ITINERARY_MIN_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_QUEUE_ENABLED,
+    LLM_INTENT_FALLBACK,
+    LOCAL_ANSWER_ENABLED,
+    LOCAL_ANSWER_MEMORY_TURNS,
+    MAX_PARALLEL_AGENTS,
+    PREFETCH_ENABLED,
+    PREFETCH_MAX_JOBS_PER_TURN,
+    PREFETCH_MIN_PROBABILITY,
+    SUMMARY_RECENT_TURNS,
+    TURN_DEADLINES,
+)
+from model import get_llm
+from runtime.deadline import DeadlineExceeded, deadline, time_left
+from runtime.job_queue import QueueUnavailable, job_queue
+from runtime.local_answer import answer_locally
+from runtime.prefetch import prefetcher, transitions
+from runtime.profiling import profile_turn, profiled_job, profiling_enabled, span
+from runtime.single_flight import coalesce_key
+from runtime.summary import fold_exchange, render_summary, summary_from_memories
+
+# Process-wide pool for agent crews. Turns wait on it only as long as their deadline
+# allows; a crew left running past its deadline stops at its next LLM or tool call.
+_agent_pool = ThreadPoolExecutor(max_workers=MAX_PARALLEL_AGENTS, thread_name_prefix="agent")
+
+# session id -> lock held for a whole turn; entries go away with the last orchestrator holding them
+_session_locks: "weakref.WeakValueDictionary[str, threading.RLock]" = weakref.WeakValueDictionary()
+_session_locks_guard = threading.Lock()
+
+
+def session_lock(session_id: str):
+    """The process-wide lock for `session_id` (re-entrant, so a turn may save while holding it)."""
+    with _session_locks_guard:
+        lock = _session_locks.get(session_id)
+        if lock is None:
+            lock = _session_locks[session_id] = threading.RLock()
+        return lock
+
+
+def submit_agent_job(name: str, runner, *args, **kwargs):
+    """Start one agent run and return its Future: on the job queue's workers when enabled, else on our pool."""
+    if JOB_QUEUE_ENABLED:
+        try:
+            return job_queue.submit(runner, *args, **kwargs)
+        except QueueUnavailable as e:
+            print(f"Job queue unavailable, running {name} in this process: {e}")
+    # Each job carries the caller's context (deadline, rate-limit priority and the like)
+    return _agent_pool.submit(contextvars.copy_context().run, profiled_job(name, runner), *args, **kwargs)
+
+
+def run_agent_job(runner, *args, attempts: int = JOB_MAX_ATTEMPTS, **kwargs):
+    """
+    Run one agent to completion in the calling thread's deadline: on a worker when the job queue is
+    enabled, else right here. `attempts=1` for runs with side effects (bookings) that must not repeat.
+    """
+    if JOB_QUEUE_ENABLED:
+        try:
+            return job_queue.run(runner, *args, attempts=attempts, **kwargs)
+        except QueueUnavailable as e:
+            print(f"Job queue unavailable, running {getattr(runner, '__name__', runner)} in this process: {e}")
+    return runner(*args, **kwargs)
+
+AGENT_LABELS = {
+    "travel_research": "Travel research",
+    "weather_advice": "Weather",
+    "transport_advice": "Transport",
+    "hotel_recommendation": "Hotels",
+    "budget_optimizer": "Budget",
+    "itinerary": "Itinerary",
+    "hotel_booking": "Hotel booking",
+}
+
+# Agent whose earlier output answers an intent when its turn runs out of time
+INTENT_AGENT = {
+    "weather": "weather_advice",
+    "transport": "transport_advice",
+    "hotels": "hotel_recommendation",
+    "budget": "budget_optimizer",
+    "overview": "travel_research",
+}
+
+# Words a follow-up can use without asking for more than the generic prefetch run
+# ("<Label> for this trip") answered: "show me the hotels", "what about the weather?"
+_GENERIC_REQUEST_WORDS = {
+    "a", "an", "the", "for", "in", "at", "to", "of", "on", "and", "this", "that", "trip", "our", "my", "me", "us", "we",
+    "i", "you", "it", "is", "are", "be", "will", "what", "what's", "how", "about", "any", "some", "show", "give", "tell",
+    "get", "see", "list", "suggest", "suggestions", "recommend", "recommendations", "options", "ideas", "info",
+    "information", "details", "please", "now", "also", "then", "next", "so", "ok", "okay", "there", "like", "there's",
+    "weather", "forecast", "climate", "temperature", "hotel", "hotels", "stay", "staying", "accommodation",
+    "transport", "travel", "getting", "reach", "route", "budget", "cost", "costs", "research", "overview",
+    "attractions", "things", "do", "places", "visit",
+}
+_REQUEST_WORD = re.compile(r"[a-z0-9₹$€£']+")
+
+
+def request_specifics(prompt: str, ctx: Any) -> List[str]:
+    """
+    Words of `prompt` that ask for something specific ("under ₹3000", "near amber fort"): not
+    generic request words and not trip fields already among the run's arguments (`ctx`).
+    """
+    def words(text: str) -> set:
+        return {w.strip("'") for w in _REQUEST_WORD.findall(text.lower())}
+
+    known = words(str(ctx)) if ctx else set()
+    return sorted(words(prompt or "") - _GENERIC_REQUEST_WORDS - known - {""})
+
+
+# Multi-destination routes: "Delhi → Jaipur → Udaipur", "delhi -> jaipur -> udaipur"
+# or at least two "to" hops ("from delhi to jaipur to udaipur").
+_LEG_WORD = r"\b(?!to\b|from\b|then\b)[a-z][a-z\-]*"
+_LEG_CITY = rf"{_LEG_WORD}(?:\s+{_LEG_WORD}){{0,2}}"
+_ARROW = r"\s*(?:→|->|=>)\s*"
+_LEG_CHAIN_PATTERNS = (
+    re.compile(rf"{_LEG_CITY}(?:{_ARROW}{_LEG_CITY})+"),
+    re.compile(rf"{_LEG_CITY}(?:\s+(?:to|then)\s+{_LEG_CITY}){{2,}}"),
+)
+_LEG_LEAD_WORDS = {"i", "we", "want", "would", "like", "plan", "a", "an", "the", "my", "me", "trip", "tour", "route", "visit", "visiting",
+                   "travel", "go", "going", "itinerary", "for", "road", "multi", "city"}
+_LEG_TRAIL_WORDS = {"on", "for", "with", "by", "and", "in", "trip", "tour", "starting", "next", "this"}
+
+
+def extract_trip_legs(s: str) -> List[str]:
+    """Return the ordered city names of a multi-destination route in `s` (lower-case), or []."""
+    for pattern in _LEG_CHAIN_PATTERNS:
+        m = pattern.search(s)
+        if not m:
+            continue
+        cities = []
+        for part in re.split(rf"{_ARROW}|\s+(?:to|then)\s+", m.group(0)):
+            words = part.split()
+            while words and words[0] in _LEG_LEAD_WORDS:
+                words.pop(0)
+            while words and words[-1] in _LEG_TRAIL_WORDS:
+                words.pop()
+            if words:
+                cities.append(" ".join(words).title())
+        if len(cities) >= 2:
+            return cities
+    return []
+
+
+def assign_leg_dates(cities: List[str], start_date: Optional[str], end_date: Optional[str]) -> List[Dict[str, Any]]:
+    """Split the trip's date range across legs; each leg ends the day the next one starts."""
+    legs = [{"destination": city, "start_date": None, "end_date": None} for city in cities]
+    if not (start_date and end_date):
+        return legs
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    nights = max((datetime.strptime(end_date, "%Y-%m-%d") - start).days, 0)
+    per_leg, extra = divmod(nights, len(legs))
+    for i, leg in enumerate(legs):
+        leg_nights = per_leg + (1 if i < extra else 0)
+        leg["start_date"] = start.strftime("%Y-%m-%d")
+        start += timedelta(days=leg_nights)
+        leg["end_date"] = start.strftime("%Y-%m-%d")
+    return legs
 
 
 class ConversationalOrchestrator:
     """Handles conversational flow with persistent memory and dynamic agent orchestration."""
 
-    def __init__(self, user_id: str = "default_user"):
+    def __init__(self, user_id: str = "default_user", session_store: Optional[BaseSessionStore] = None,
+                 deadlines: Optional[Dict[str, float]] = None):
         self.user_id = user_id
-        self.context: Dict[str, Any] = {
-            "origin": None,
-            "destination": None,
-            "start_date": None,
-            "end_date": None,
-            "travel_mode_preference": None,
-            "budget_total": None,
-            "travelers": 1,
-            "hotel_name": None,
-            "check_in_date": None,
-            "check_out_date": None,
-            "booking_pending_confirmation": False,
-            "last_query_intent": "overview" # Tracks the last classified intent
+        # Serializes turns (and other session updates) across orchestrators for this session id
+        self.lock = session_lock(user_id)
+        # Per-client time budgets override the per-intent defaults
+        self.deadlines = {**TURN_DEADLINES, **(deadlines or {})}
+        # Outputs that did not finish within the current turn's deadline
+        self.missing_outputs: List[str] = []
+        self.session_store = session_store or InMemorySessionStore()
+        defaults = {
+            "context": {
+                "origin": None,
+                "destination": None,
+                "start_date": None,
+                "end_date": None,
+                "travel_mode_preference": None,
+                "budget_total": None,
+                "travelers": 1,
+                "hotel_name": None,
+                "check_in_date": None,
+                "check_out_date": None,
+                "booking_pending_confirmation": False,
+                "legs": [], # Ordered stops of a multi-destination trip: {destination, start_date, end_date}
+                "last_query_intent": "overview" # Tracks the last classified intent
+            },
+            "agent_outputs": {},
+            # agent_outputs key -> fingerprint of the inputs a background prefetch computed it for
+            "prefetched": {},
+            # Rolling summary of the conversation passed to the agents (see runtime/summary.py)
+            "summary": {},
+            "conversation_history": [],
         }
-        self.agent_outputs: Dict[str, Any] = {}
-        self.conversation_history: List[Dict[str, str]] = []
+        # Fields are loaded from the store on first access (see db/session_store.py);
+        # each agent output is its own field so reading one never decodes the rest.
+        self.session = self.session_store.load(self.user_id, defaults)
+        self._agent_outputs = SessionMap(self.session, "agent_outputs")
+
+    @property
+    def context(self) -> Dict[str, Any]:
+        return self.session.get("context")
+
+    @context.setter
+    def context(self, value: Dict[str, Any]):
+        self.session.set("context", value)
+
+    @property
+    def agent_outputs(self) -> SessionMap:
+        return self._agent_outputs
+
+    @agent_outputs.setter
+    def agent_outputs(self, value: Dict[str, Any]):
+        self._agent_outputs.clear()
+        self._agent_outputs.update(value)
+
+    @property
+    def conversation_history(self) -> List[Dict[str, str]]:
+        return self.session.get("conversation_history")
+
+    @conversation_history.setter
+    def conversation_history(self, value: List[Dict[str, str]]):
+        self.session.set("conversation_history", value)
+
+    def refresh_session(self):
+        """Drop cached fields if another request saved this session since we loaded it."""
+        if self.session_store.load_version(self.user_id) != self.session.version:
+            self.session = self.session_store.load(self.user_id, self.session.defaults)
+            self._agent_outputs = SessionMap(self.session, "agent_outputs")
+
+    def save_session(self) -> int:
+        """Persist the fields changed during this turn; returns the new session version."""
+        return self.session.save()
 
     # -------------------
     # Context Parsing
@@ -64,6 +306,14 @@ class ConversationalOrchestrator:
         if m_origin:
             ctx["origin"] = m_origin.group(1).strip().title()
 
+        # Extract multi-destination route; "from X to Y to Z" makes X the origin, not a stop
+        leg_cities = extract_trip_legs(s)
+        if leg_cities:
+            if re.search(rf"from\s+{re.escape(leg_cities[0].lower())}\b", s):
+                ctx["origin"] = leg_cities.pop(0)
+            ctx["legs"] = leg_cities if len(leg_cities) > 1 else []
+            ctx["destination"] = leg_cities[0]
+
         # Extract dates (main trip dates)
         m_dates = re.search(r"(\d{4}-\d{2}-\d{2}|\d{1,2}[/-]\d{1,2}[/-]\d{4})\s*(?:to|-)\s*(\d{4}-\d{2}-\d{2}|\d{1,2}[/-]\d{1,2}[/-]\d{4})", s)
         if m_dates:
@@ -117,6 +367,12 @@ class ConversationalOrchestrator:
         if ("book" in s or "reserve" in s) and not ctx["travelers"] and self.context.get("travelers"):
             ctx["travelers"] = self.context.get("travelers")
 
+        # Spread the trip dates over the legs (new route, or new dates for the existing one)
+        if leg_cities or m_dates:
+            cities = [leg if isinstance(leg, str) else leg["destination"] for leg in ctx.get("legs") or []]
+            if len(cities) > 1:
+                ctx["legs"] = assign_leg_dates(cities, ctx["start_date"], ctx["end_date"])
+
         return ctx
 
     # -------------------
@@ -143,8 +399,25 @@ class ConversationalOrchestrator:
         if re.search(r"itinerary|plan|schedule|day by day", user_input_lower): return "itinerary"
         if re.search(r"plan everything|complete planning|full trip", user_input_lower): return "full_planning"
 
+        if LLM_INTENT_FALLBACK:
+            return self.classify_intent_llm(user_input)
         return "overview" # Default or general inquiry
 
+    INTENTS = ("weather", "transport", "hotels", "budget", "itinerary", "overview")
+
+    def classify_intent_llm(self, user_input: str) -> str:
+        """Ask the small-tier model to place a turn the keyword rules missed."""
+        prompt = (
+            "Classify the travel-planning message into exactly one label: "
+            f"{', '.join(self.INTENTS)}. Reply with the label only.\n\nMessage: {user_input}"
+        )
+        try:
+            label = str(get_llm("intent_classifier").call([{"role": "user", "content": prompt}])).strip().lower()
+        except Exception as e:
+            print(f"Intent fallback failed: {e}")
+            return "overview"
+        return label if label in self.INTENTS else "overview"
+
     # -------------------
     # Formatting Output
     # -------------------
@@ -156,41 +429,212 @@ class ConversationalOrchestrator:
         return str(agent_out)
 
     # -------------------
-    # Agent Executors (to be implemented more dynamically)
+    # Trip legs (single destination is a one-leg trip)
+    # -------------------
+    def trip_legs(self) -> List[Dict[str, Any]]:
+        legs = self.context.get("legs") or []
+        if len(legs) > 1:
+            return legs
+        return [{
+            "destination": self.context.get("destination"),
+            "start_date": self.context.get("start_date"),
+            "end_date": self.context.get("end_date"),
+        }]
+
+    def agent_targets(self, agent_key: str) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """
+        (output key, label, leg) for every run of `agent_key` the current trip needs:
+        one per leg for research/weather/hotels, one per consecutive hop for transport.
+        Single-destination trips keep the plain agent key.
+        """
+        legs = self.trip_legs()
+        if agent_key == "transport_advice":
+            origin = self.context.get("origin")
+            if len(legs) == 1:
+                return [(agent_key, "", {"origin": origin, "destination": legs[0]["destination"]})]
+            stops = [leg["destination"] for leg in legs]
+            if origin and origin != stops[0]:
+                stops.insert(0, origin)
+            return [(f"{agent_key}:{a}->{b}", f"{a} → {b}", {"origin": a, "destination": b})
+                    for a, b in zip(stops, stops[1:])]
+        if agent_key == "budget_optimizer" or len(legs) == 1:
+            return [(agent_key, "", legs[0])]
+        return [(f"{agent_key}:{leg['destination']}",
+                 f"{leg['destination']} ({leg.get('start_date') or '?'} to {leg.get('end_date') or '?'})", leg)
+                for leg in legs]
+
+    RESEARCH_CONTEXT_KEYS = ("origin", "destination", "start_date", "end_date", "travelers",
+                             "budget_total", "travel_mode_preference")
+
+    def agent_job(self, agent_key: str, prompt: str, leg: Dict[str, Any]):
+        """Task runner and its arguments for one run of `agent_key` on `leg`."""
+        multi = len(self.trip_legs()) > 1
+        if agent_key == "travel_research":
+            # Only trip fields, so identical trips from different sessions can share one run
+            trip = {k: self.context.get(k) for k in self.RESEARCH_CONTEXT_KEYS}
+            return run_travel_research, (prompt, {**trip, **leg} if multi else trip)
+        if agent_key == "weather_advice":
+            return run_weather_advice, (prompt, {
+                "destination": leg.get("destination"),
+                "start_date": leg.get("start_date"),
+                "end_date": leg.get("end_date"),
+            })
+        if agent_key == "transport_advice":
+            return run_transport_advice, (prompt, {
+                "origin": leg.get("origin"),
+                "destination": leg.get("destination"),
+                "travel_mode_preference": self.context.get("travel_mode_preference"),
+            })
+        if agent_key == "hotel_recommendation":
+            ctx = {"destination": leg.get("destination"), "budget_total": self.context.get("budget_total")}
+            if multi:
+                ctx.update({"check_in": leg.get("start_date"), "check_out": leg.get("end_date")})
+            return run_hotel_recommendation, (prompt, ctx)
+        if agent_key == "budget_optimizer":
+            ctx = {"budget_total": self.context.get("budget_total")}
+            # Prices from earlier hotel/transport runs, when there are any
+            for field, source in (("hotel_options", "hotel_recommendation"), ("transport_estimates", "transport_advice")):
+                facts = self.merged_output(source, compact=True)
+                if facts:
+                    ctx[field] = facts
+            if multi:
+                ctx["route"] = " → ".join(l["destination"] for l in self.trip_legs())
+            return run_budget_optimizer, (prompt, ctx)
+        raise ValueError(f"Unknown agent: {agent_key}")
+
+    def run_agents(self, prompt: str, agent_keys: List[str], reuse: bool = False,
+                   conversation: str = "") -> Dict[str, str]:
+        """
+        Run every leg/hop of the given agents, concurrently when there is more than one.
+        With `reuse`, outputs already in `agent_outputs` are not recomputed. `conversation`
+        (the rolling summary) goes to the runners but not into the job fingerprints.
+        """
+        jobs = {}
+        for agent_key in agent_keys:
+            for key, _, leg in self.agent_targets(agent_key):
+                if not (reuse and key in self.agent_outputs):
+                    runner, args = self.agent_job(agent_key, prompt, leg)
+                    if conversation:
+                        runner = functools.partial(runner, conversation=conversation)
+                    jobs[key] = (runner, args)
+
+        results = {}
+        futures = {}
+        shared = set()  # keys answered by a prefetch that is still running
+        prefetched = dict(self.session.get("prefetched") or {})
+        for key, (runner, args) in jobs.items():
+            fingerprint = self.job_fingerprint(key, args)
+            if prefetched.pop(key, None) == fingerprint and key in self.agent_outputs:
+                # A background prefetch already answered this for the same inputs
+                prefetcher.record_use()
+                results[key] = self.agent_outputs[key]
+                continue
+            future = prefetcher.pending(self.user_id, key, fingerprint)
+            if future is not None:
+                shared.add(key)
+            else:
+                future = submit_agent_job(f"agent:{key}", runner, *args)
+            futures[key] = future
+        self.session.set("prefetched", prefetched)
+
+        done, _ = wait(futures.values(), timeout=time_left())
+        for key, future in futures.items():
+            if future not in done:
+                # A shared prefetch keeps running and stores its result for the next turn
+                if key not in shared:
+                    future.cancel()
+                self.missing_outputs.append(key)
+                continue
+            try:
+                results[key] = future.result()
+            except DeadlineExceeded:
+                self.missing_outputs.append(key)
+            except Exception as e:
+                if len(jobs) == 1:
+                    raise
+                print(f"Error running {key}: {e}")
+        # Written from this thread only; the session state is not shared with the pool
+        self.agent_outputs.update(results)
+        return results
+
+    @staticmethod
+    def job_fingerprint(key: str, args: tuple) -> str:
+        """
+        Identity of a run's inputs: the trip fields for the leg, and what the prompt asks for beyond
+        them. A generic follow-up ("show me the hotels") matches the generic prefetch run; a
+        specific one ("hotels under ₹3000 near Amber Fort") does not, and runs on its own.
+        """
+        return coalesce_key(key, request_specifics(args[0], args[1] if len(args) > 1 else None), *args[1:])
+
+    # -------------------
+    # Speculative prefetch (see runtime/prefetch.py)
+    # -------------------
+    def planned_jobs(self, agent_keys: List[str], prompt: str = "") -> Dict[str, tuple]:
+        """output key -> (runner, args, fingerprint) for the given agents on the current trip."""
+        planned = {}
+        for agent_key in agent_keys:
+            for key, _, leg in self.agent_targets(agent_key):
+                runner, args = self.agent_job(agent_key, prompt, leg)
+                planned[key] = (runner, args, self.job_fingerprint(key, args))
+        return planned
+
+    def cancel_stale_prefetches(self) -> int:
+        """Cancel background runs whose inputs no longer match the trip (e.g. a new destination)."""
+        current = {key: fp for key, (_, _, fp) in self.planned_jobs(list(INTENT_AGENT.values())).items()}
+        return prefetcher.cancel(self.user_id, keep=current)
+
+    def schedule_prefetch(self, intent: str) -> int:
+        """Start the agents for the likeliest next intents in the background; returns runs scheduled."""
+        if not self.context.get("destination"):
+            return 0
+        prefetched = self.session.get("prefetched") or {}
+        scheduled = 0
+        for next_intent, _ in transitions.predict(intent, k=3, min_probability=PREFETCH_MIN_PROBABILITY):
+            agent_key = INTENT_AGENT.get(next_intent)
+            if agent_key is None or next_intent == intent:
+                continue
+            prompt = f"{AGENT_LABELS[agent_key]} for this trip"
+            for key, (runner, args, fingerprint) in self.planned_jobs([agent_key], prompt).items():
+                if scheduled >= PREFETCH_MAX_JOBS_PER_TURN:
+                    return scheduled
+                if prefetched.get(key) == fingerprint:
+                    continue
+                if prefetcher.schedule(self.user_id, self.session_store, key, fingerprint,
+                                       functools.partial(run_agent_job, runner), args):
+                    scheduled += 1
+        return scheduled
+
+    def merged_output(self, agent_key: str, missing: str = "", compact: bool = False) -> str:
+        """
+        The agent's output for the current trip, one labelled section per leg/hop: prose for
+        the user, or with `compact` only the fields later agents need (for their prompts).
+        """
+        sections = []
+        for key, label, _ in self.agent_targets(agent_key):
+            if key in self.agent_outputs:
+                value = self.agent_outputs[key]
+                out = brief_output(key, value) if compact else render_output(key, value)
+                sections.append(f"**{label}**\n{out}" if label else out)
+        return "\n\n".join(sections) if sections else missing
+
+    # -------------------
+    # Agent Executors
     # -------------------
     def run_travel_research_agent(self, prompt: str, past_context: str):
-        out = run_travel_research(prompt, self.context)
-        self.agent_outputs["travel_research"] = self.format_output(out)
-        return self.agent_outputs["travel_research"]
+        self.run_agents(prompt, ["travel_research"], conversation=past_context)
+        return self.merged_output("travel_research")
 
     def run_weather_agent(self, prompt: str, past_context: str):
-        ctx = {
-            "destination": self.context.get("destination"),
-            "start_date": self.context.get("start_date"),
-            "end_date": self.context.get("end_date")
-        }
-        out = run_weather_advice(prompt, ctx)
-        self.agent_outputs["weather_advice"] = self.format_output(out)
-        return self.agent_outputs["weather_advice"]
+        self.run_agents(prompt, ["weather_advice"], conversation=past_context)
+        return self.merged_output("weather_advice")
 
     def run_transport_agent(self, prompt: str, past_context: str):
-        ctx = {
-            "origin": self.context.get("origin"),
-            "destination": self.context.get("destination"),
-            "travel_mode_preference": self.context.get("travel_mode_preference")
-        }
-        out = run_transport_advice(prompt, ctx)
-        self.agent_outputs["transport_advice"] = self.format_output(out)
-        return self.agent_outputs["transport_advice"]
+        self.run_agents(prompt, ["transport_advice"], conversation=past_context)
+        return self.merged_output("transport_advice")
 
     def run_hotel_agent(self, prompt: str, past_context: str):
-        ctx = {
-            "destination": self.context.get("destination"),
-            "budget_total": self.context.get("budget_total")
-        }
-        out = run_hotel_recommendation(prompt, ctx)
-        self.agent_outputs["hotel_recommendation"] = self.format_output(out)
-        return self.agent_outputs["hotel_recommendation"]
+        self.run_agents(prompt, ["hotel_recommendation"], conversation=past_context)
+        return self.merged_output("hotel_recommendation")
 
     def run_hotel_booking_agent(self, prompt: str, past_context: str):
         hotel_name = self.context.get("hotel_name")
@@ -209,7 +653,8 @@ class ConversationalOrchestrator:
 
         if booking_pending_confirmation:
             if re.search(r"yes|confirm|book it", prompt.lower()):
-                out = run_hotel_booking(hotel_name, check_in_date, check_out_date, num_guests)
+                out = run_agent_job(run_hotel_booking, hotel_name, check_in_date, check_out_date, num_guests,
+                                    attempts=1)
                 self.agent_outputs["hotel_booking"] = self.format_output(out)
                 self.context["booking_pending_confirmation"] = False
                 return self.agent_outputs["hotel_booking"]
@@ -221,85 +666,166 @@ class ConversationalOrchestrator:
             return self.format_output(f"I have the following details for your hotel booking: {hotel_name} from {check_in_date} to {check_out_date} for {num_guests} guest(s). Do you want to confirm this booking?")
 
     def run_budget_agent(self, prompt: str, past_context: str):
-        ctx = {
-            "budget_total": self.context.get("budget_total")
-        }
-        out = run_budget_optimizer(prompt, ctx)
-        self.agent_outputs["budget_optimizer"] = self.format_output(out)
-        return self.agent_outputs["budget_optimizer"]
+        self.run_agents(prompt, ["budget_optimizer"], conversation=past_context)
+        return self.merged_output("budget_optimizer")
 
     def run_itinerary_agent(self, prompt: str, past_context: str):
-        required_agents = {
-            "travel_research": self.run_travel_research_agent,
-            "weather_advice": self.run_weather_agent,
-            "transport_advice": self.run_transport_agent,
-            "hotel_recommendation": self.run_hotel_agent,
-            "budget_optimizer": self.run_budget_agent,
+        # Every leg and hop of every supporting agent runs in one concurrent batch,
+        # so a multi-city trip costs about the same wall-clock time as a single city.
+        self.run_agents(prompt, [
+            "travel_research",
+            "weather_advice",
+            "transport_advice",
+            "hotel_recommendation",
+            "budget_optimizer",
+        ], reuse=True, conversation=past_context)
+
+        # Now collect context: just the fields the itinerary needs, not the full write-ups
+        ctx = {
+            "research": self.merged_output("travel_research", "No travel research available.", compact=True),
+            "weather": self.merged_output("weather_advice", "No weather advice available.", compact=True),
+            "transport": self.merged_output("transport_advice", "No transport advice available.", compact=True),
+            "hotels": self.merged_output("hotel_recommendation", "No hotel recommendations available.", compact=True),
+            "budget": self.merged_output("budget_optimizer", "No budget optimization available.", compact=True),
         }
 
-        for agent_key, agent_func in required_agents.items():
-            if agent_key not in self.agent_outputs:
-                self.agent_outputs[agent_key] = self.format_output(agent_func(prompt, past_context))
+        legs = self.trip_legs()
+        if len(legs) > 1:
+            route = " → ".join(f"{leg['destination']} ({leg.get('start_date') or '?'} to {leg.get('end_date') or '?'})"
+                               for leg in legs)
+            prompt = f"{prompt}\nRoute (one itinerary covering every stop in order): {route}"
 
-        # Now collect context
-        ctx = {
-            "research": self.agent_outputs.get("travel_research", "No travel research available."),
-            "weather": self.agent_outputs.get("weather_advice", "No weather advice available."),
-            "transport": self.agent_outputs.get("transport_advice", "No transport advice available."),
-            "hotels": self.agent_outputs.get("hotel_recommendation", "No hotel recommendations available."),
-            "budget": self.agent_outputs.get("budget_optimizer", "No budget optimization available."),
-        }
+        left = time_left()
+        if left is not None and left < ITINERARY_MIN_SECONDS:
+            self.missing_outputs.append("itinerary")
+            return self.partial_answer()
 
+        future = submit_agent_job("agent:itinerary", run_itinerary_builder, user_prompt=prompt, context=ctx,
+                                  conversation=past_context)
         try:
-            itinerary_output_str = run_itinerary_builder(user_prompt=prompt, context=ctx)
-            self.agent_outputs["itinerary"] = itinerary_output_str
+            self.agent_outputs["itinerary"] = future.result(timeout=time_left())
         except Exception as e:
-            print(f"Error running itinerary builder: {e}")
-            self.agent_outputs["itinerary"] = "Sorry, could not generate full itinerary, but here's what I have."
+            # Includes the deadline running out: answer with whatever the agents produced
+            print(f"Error running itinerary builder: {type(e).__name__}: {e}")
+            future.cancel()
+            self.missing_outputs.append("itinerary")
+            return self.partial_answer()
 
         return self.agent_outputs["itinerary"]
 
     # -------------------
-    # Main Orchestration Logic
+    # Partial answers (deadline ran out)
     # -------------------
-    def process_user_input(self, user_input: str) -> Dict[str, Any]:
-        memory_results = query_memory(user_input, top_k=3)
-        past_context = ""
-        if memory_results and memory_results.get("documents"):
-            past_context = "\n".join(memory_results["documents"][0])
-
-        # Update context based on user input
-        new_ctx = self.parse_user_prompt(user_input)
-        self.context.update({k: v for k, v in new_ctx.items() if v is not None})
-
-        # Dynamic Intent Classification (more flexible)
-        intent = self.classify_intent(user_input)
-        self.context["last_query_intent"] = intent # Store last intent
-
-        response = None
-
+    ITINERARY_INPUTS = ("travel_research", "weather_advice", "transport_advice", "hotel_recommendation",
+                        "budget_optimizer")
+
+    def partial_answer(self) -> str:
+        """Best available plan from finished (or earlier cached) agent outputs."""
+        sections = []
+        for agent_key in self.ITINERARY_INPUTS:
+            out = self.merged_output(agent_key)
+            if out:
+                sections.append(f"### {AGENT_LABELS[agent_key]}\n{out}")
+        if not sections:
+            return "I couldn't put your plan together in time."
+        return "I couldn't finish the full itinerary in time, but here is what I have so far.\n\n" + "\n\n".join(sections)
+
+    def missing_note(self) -> str:
+        names = []
+        for key in dict.fromkeys(self.missing_outputs):
+            agent_key, _, detail = key.partition(":")
+            name = AGENT_LABELS.get(agent_key, agent_key)
+            names.append(f"{name} ({detail.replace('->', ' → ')})" if detail else name)
+        return (f"⏱️ Not finished in time: {', '.join(names)}. "
+                "Earlier results are shown where I had them; ask again to fill in the rest.")
+
+    def dispatch(self, intent: str, user_input: str, past_context: str) -> str:
+        """Run the agents for `intent` and return the response text."""
         # If a booking confirmation is pending, prioritize that
         if self.context.get("booking_pending_confirmation") and intent == "hotel_booking":
-            response = self.format_output(self.run_hotel_booking_agent(user_input, past_context))
+            return self.format_output(self.run_hotel_booking_agent(user_input, past_context))
         
         # Otherwise, run agents based on classified intent
         elif intent == "hotel_booking":
-            response = self.format_output(self.run_hotel_booking_agent(user_input, past_context))
+            return self.format_output(self.run_hotel_booking_agent(user_input, past_context))
         elif intent == "itinerary" or intent == "full_planning":
-            response = self.format_output(self.run_itinerary_agent(user_input, past_context))
+            return self.format_output(self.run_itinerary_agent(user_input, past_context))
         elif intent == "hotels":
-            response = self.format_output(self.run_hotel_agent(user_input, past_context))
+            return self.format_output(self.run_hotel_agent(user_input, past_context))
         elif intent == "weather":
-            response = self.format_output(self.run_weather_agent(user_input, past_context))
+            return self.format_output(self.run_weather_agent(user_input, past_context))
         elif intent == "transport":
-            response = self.format_output(self.run_transport_agent(user_input, past_context))
+            return self.format_output(self.run_transport_agent(user_input, past_context))
         elif intent == "budget":
-            response = self.format_output(self.run_budget_agent(user_input, past_context))
+            return self.format_output(self.run_budget_agent(user_input, past_context))
         elif intent == "overview":
-            response = self.format_output(self.run_travel_research_agent(user_input, past_context)) # Default to travel research for general queries
+            return self.format_output(self.run_travel_research_agent(user_input, past_context)) # Default to travel research for general queries
         else:
             # Fallback for unhandled explicit intents (shouldn't happen often with good patterns)
-            response = self.format_output(self.run_travel_research_agent(user_input, past_context))
+            return self.format_output(self.run_travel_research_agent(user_input, past_context))
+
+    # -------------------
+    # Main Orchestration Logic
+    # -------------------
+    def process_user_input(self, user_input: str, deadline_s: Optional[float] = None,
+                           profile: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Handle one chat turn within `deadline_s` seconds (default: per-intent budget).
+        With `profile` (default: PROFILE_TURNS) the turn is profiled to PROFILE_DIR.
+        """
+        with self.lock:
+            if not profiling_enabled(profile):
+                return self.run_turn(user_input, deadline_s)
+            with profile_turn(self.user_id) as turn:
+                result = self.run_turn(user_input, deadline_s)
+                turn.turn_id = f"{len(self.conversation_history) // 2:04d}-{datetime.now():%Y%m%d-%H%M%S}"
+                turn.meta.update(intent=result["intent"], missing=list(self.missing_outputs),
+                                 user_input=user_input[:200])
+            return result
+
+    def run_turn(self, user_input: str, deadline_s: Optional[float] = None) -> Dict[str, Any]:
+        with span("refresh_session"):
+            self.refresh_session()
+        self.missing_outputs = []
+
+        with span("load_summary"):
+            past_context = self.conversation_summary()
+
+        # Update context based on user input
+        with span("parse"):
+            new_ctx = self.parse_user_prompt(user_input)
+        self.context.update({k: v for k, v in new_ctx.items() if v is not None})
+
+        # Questions about the session itself are answered from it, without agents
+        local = None
+        if LOCAL_ANSWER_ENABLED:
+            with span("local_answer"):
+                local = self.local_answer(user_input)
+        if local is not None:
+            intent, response = "recall", local
+        else:
+            # Dynamic Intent Classification (more flexible)
+            with span("classify"):
+                intent = self.classify_intent(user_input)
+            if self.conversation_history:
+                transitions.record(self.context.get("last_query_intent"), intent)
+            self.context["last_query_intent"] = intent # Store last intent
+            with span("cancel_prefetch"):
+                self.cancel_stale_prefetches()
+
+            budget = deadline_s if deadline_s is not None else self.deadlines.get(intent, self.deadlines["default"])
+            try:
+                with deadline(budget), span(f"dispatch:{intent}"):
+                    response = self.dispatch(intent, user_input, past_context)
+            except DeadlineExceeded:
+                if intent in ("itinerary", "full_planning"):
+                    self.missing_outputs.append("itinerary")
+                    response = self.partial_answer()
+                else:
+                    self.missing_outputs.append(INTENT_AGENT.get(intent, intent))
+                    response = self.merged_output(INTENT_AGENT.get(intent, "travel_research"))
+            if self.missing_outputs:
+                response = f"{response}\n\n{self.missing_note()}".strip()
 
         # Store conversation memory in Redis
         memory_metadata = {
@@ -309,11 +835,21 @@ class ConversationalOrchestrator:
         }
         doc_id = f"{self.user_id}_{datetime.now().timestamp()}"
         memory_text = f"Q: {user_input}\nA: {response}"
-        add_memory(session_id=self.user_id,doc_id=doc_id, text=memory_text, metadata=memory_metadata)
+        with span("add_memory"):
+            add_memory(session_id=self.user_id,doc_id=doc_id, text=memory_text, metadata=memory_metadata)
+
+        with span("summarize"):
+            self.session.set("summary", fold_exchange(self.session.get("summary"), user_input, response, intent))
 
         # Update local conversation history
         self.conversation_history.append({"role": "user", "content": user_input})
         self.conversation_history.append({"role": "assistant", "content": self.format_output(response)})
+        with span("save_session"):
+            self.save_session()
+
+        if PREFETCH_ENABLED and local is None:
+            with span("schedule_prefetch"):
+                self.schedule_prefetch(intent)
 
         return {
             "intent": intent,
@@ -321,6 +857,39 @@ class ConversationalOrchestrator:
             "context": self.context
         }
 
+    # -------------------
+    # Local answers (see runtime/local_answer.py)
+    # -------------------
+    def local_answer(self, user_input: str) -> Optional[str]:
+        """The answer to a question about this session, if it can be given from the session alone."""
+        def output(agent_key: str) -> str:
+            if agent_key in ("itinerary", "hotel_booking"):
+                return self.format_output(self.agent_outputs.get(agent_key) or "")
+            return self.merged_output(agent_key)
+
+        def memories() -> List[str]:
+            results = query_memory(self.user_id, top_k=LOCAL_ANSWER_MEMORY_TURNS)
+            return (results.get("documents") or [[]])[0] if results else []
+
+        answered = answer_locally(user_input, self.context, output, self.conversation_history, memories,
+                                  labels=AGENT_LABELS)
+        return answered[1] if answered else None
+
+    # -------------------
+    # Conversation summary (see runtime/summary.py)
+    # -------------------
+    def conversation_summary(self) -> str:
+        """The rolling summary as prompt text; seeded from stored memories if the session has none yet."""
+        summary = self.session.get("summary")
+        if not summary and not self.conversation_history:
+            # A new session object (e.g. the in-memory store after a restart) while memories survive in Redis
+            memory_results = query_memory(self.user_id, top_k=SUMMARY_RECENT_TURNS)
+            documents = (memory_results.get("documents") or [[]])[0] if memory_results else []
+            if documents:
+                summary = summary_from_memories(documents)
+                self.session.set("summary", summary)
+        return render_summary(summary)
+
     # -------------------
     # Context Summary
     # -------------------
@@ -0,0 +1,106 @@
+# profile_report.py
+"""
+Aggregate hot spots across profiled chat turns (see runtime/profiling.py).
+
+Reads every `<turn>.prof` / `<turn>.json` pair under PROFILE_DIR (or one
+session's directory) and prints the spans that take the most wall-clock time
+per turn, then the functions with the most cumulative or own time across all
+turns:
+
+    python profile_report.py --top 25
+    python profile_report.py --session 3f2a... --sort tottime
+    python profile_report.py --spans-only --match "llm:|tool:"
+"""
+import argparse
+import glob
+import io
+import os
+import pstats
+import re
+from typing import Any, Dict, List
+
+import orjson
+
+from config.setting import PROFILE_DIR
+
+
+def load_turns(directory: str, session: str = None) -> List[Dict[str, Any]]:
+    pattern = os.path.join(directory, session or "*", "*.json")
+    turns = []
+    for path in sorted(glob.glob(pattern)):
+        try:
+            with open(path, "rb") as f:
+                turn = orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError) as e:
+            print(f"Skipping {path}: {e}")
+            continue
+        turn["path"] = path[:-len(".json")]
+        turns.append(turn)
+    return turns
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def span_table(turns: List[Dict[str, Any]], top: int, match: str = None) -> str:
+    """Per span name: turns it appears in, total/mean/p95 ms per turn and share of turn wall time."""
+    per_turn: Dict[str, List[float]] = {}
+    for turn in turns:
+        totals: Dict[str, float] = {}
+        for s in turn.get("spans", []):
+            if match and not re.search(match, s["name"]):
+                continue
+            totals[s["name"]] = totals.get(s["name"], 0.0) + s["ms"]
+        for name, ms in totals.items():
+            per_turn.setdefault(name, []).append(ms)
+    wall = sum(t.get("wall_ms", 0.0) for t in turns) or 1.0
+    rows = sorted(per_turn.items(), key=lambda item: sum(item[1]), reverse=True)[:top]
+    lines = [f"{'span':<42} {'turns':>5} {'total s':>9} {'mean ms':>9} {'p95 ms':>9} {'share':>6}"]
+    for name, values in rows:
+        lines.append(f"{name[:42]:<42} {len(values):>5} {sum(values) / 1000:>9.2f} "
+                     f"{sum(values) / len(values):>9.1f} {percentile(values, 0.95):>9.1f} "
+                     f"{sum(values) / wall:>6.0%}")
+    # Spans overlap (agents run concurrently, LLM calls sit inside agent runs), so shares can exceed 100%
+    return "\n".join(lines)
+
+
+def function_table(turns: List[Dict[str, Any]], top: int, sort: str) -> str:
+    paths = [t["path"] + ".prof" for t in turns if os.path.exists(t["path"] + ".prof")]
+    if not paths:
+        return "(no .prof files)"
+    out = io.StringIO()
+    stats = pstats.Stats(paths[0], stream=out)
+    for path in paths[1:]:
+        stats.add(path)
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+    return out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate profiled chat turns.")
+    parser.add_argument("--dir", default=PROFILE_DIR, help="Profile directory (PROFILE_DIR)")
+    parser.add_argument("--session", help="Only this session's turns")
+    parser.add_argument("--top", type=int, default=20, help="Rows per table")
+    parser.add_argument("--sort", default="cumulative", choices=["cumulative", "tottime", "ncalls"],
+                        help="Function table order")
+    parser.add_argument("--match", help="Regex on span names, e.g. 'llm:|tool:'")
+    parser.add_argument("--spans-only", action="store_true", help="Skip the function table")
+    args = parser.parse_args()
+
+    turns = load_turns(args.dir, args.session)
+    if not turns:
+        print(f"No profiled turns under {args.dir}")
+        return
+    walls = [t.get("wall_ms", 0.0) for t in turns]
+    print(f"{len(turns)} turns, {len({t['session_id'] for t in turns})} sessions; wall time per turn: "
+          f"mean {sum(walls) / len(walls):.0f} ms, p95 {percentile(walls, 0.95):.0f} ms\n")
+    print(span_table(turns, args.top, args.match))
+    if not args.spans_only:
+        print(f"\nTop functions by {args.sort}:")
+        print(function_table(turns, args.top, args.sort))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# runtime/deadline.py
+"""
+Per-turn time budgets.
+
+The orchestrator opens a `deadline(seconds)` scope for each turn. The deadline
+travels with the context (agent worker threads get a copy of it), so tools,
+the rate limiter and the LLM wrapper can shorten their timeouts to what is
+left and stop early with DeadlineExceeded once the budget is spent.
+Background work can also be cancelled outright: inside `cancellable(event)`,
+setting the event makes the remaining budget zero.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("turn_deadline", default=None)
+_cancel: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar("cancel_event", default=None)
+
+# Never hand out a network timeout shorter than this while time remains
+MIN_TIMEOUT_SECONDS = 0.5
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the current turn's time budget has run out."""
+
+
+class Cancelled(DeadlineExceeded):
+    """Raised when the enclosing `cancellable` scope was cancelled."""
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """Limit the enclosed work to `seconds` (an enclosing, tighter deadline still applies)."""
+    if seconds is None:
+        yield
+        return
+    until = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(until if current is None else min(current, until))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def cancellable(event: threading.Event):
+    """Stop the enclosed work at its next deadline check once `event` is set."""
+    token = _cancel.set(event)
+    try:
+        yield
+    finally:
+        _cancel.reset(token)
+
+
+def cancelled() -> bool:
+    event = _cancel.get()
+    return event is not None and event.is_set()
+
+
+def time_left() -> Optional[float]:
+    """Seconds left in the current budget, or None when no deadline is set."""
+    if cancelled():
+        return 0.0
+    until = _deadline.get()
+    return None if until is None else until - time.monotonic()
+
+
+def check_deadline(what: str = "call"):
+    if cancelled():
+        raise Cancelled(f"Cancelled before {what}")
+    left = time_left()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Time budget exhausted before {what}")
+
+
+def request_timeout(default: float) -> float:
+    """Network timeout for the next call: `default`, capped by the remaining budget."""
+    if cancelled():
+        raise Cancelled("Cancelled")
+    left = time_left()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("Time budget exhausted")
+    return max(MIN_TIMEOUT_SECONDS, min(default, left))
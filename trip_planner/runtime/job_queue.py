@@ -0,0 +1,409 @@
+# runtime/job_queue.py
+"""
+Agent runs as jobs on a Redis stream, executed by separate worker processes.
+
+With JOB_QUEUE_ENABLED the web process turns each agent run into a job (the
+task runner's import path, its JSON arguments, the turn's deadline and
+rate-limit priority) and adds it to JOB_QUEUE_STREAM. `JobQueue.submit`
+returns a Future, so the orchestrator waits on queued jobs exactly as on its
+own pool. Workers (`python worker.py`) read the stream through one consumer
+group:
+
+- a job stays pending in the group until the worker that read it has pushed
+  the result to the submitting process's reply list and acked it;
+- workers refresh the idle time of the jobs they are running, so a job idle
+  for JOB_VISIBILITY_TIMEOUT_SECONDS belongs to a worker that died and is
+  claimed by another one;
+- a job that raises runs again until it has run JOB_MAX_ATTEMPTS times
+  (jobs submitted with attempts=1, like bookings, never run twice); jobs out
+  of attempts are answered with the error and copied to `<stream>:dead`;
+- jobs past their deadline are answered with DeadlineExceeded unrun, and
+  cancelling the Future (deadline passed, trip changed) sets a flag that
+  stops the job before it starts or at its next LLM or tool call.
+"""
+import functools
+import importlib
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import orjson
+import redis
+
+from config.setting import (
+    JOB_MAX_ATTEMPTS,
+    JOB_QUEUE_GROUP,
+    JOB_QUEUE_MAXLEN,
+    JOB_QUEUE_STREAM,
+    JOB_RESULT_TTL_SECONDS,
+    JOB_VISIBILITY_TIMEOUT_SECONDS,
+    REDIS_DB,
+    REDIS_HOST,
+    REDIS_PORT,
+    WORKER_CONCURRENCY,
+)
+from runtime.deadline import Cancelled, DeadlineExceeded, cancellable, cancelled, deadline, time_left
+from runtime.rate_limiter import current_priority, priority
+
+# Jobs may only name functions in these packages
+RUNNER_MODULES = ("tasks.",)
+# How often a worker refreshes its running jobs and checks their cancel flags
+REFRESH_SECONDS = min(1.0, JOB_VISIBILITY_TIMEOUT_SECONDS / 3)
+# Consumers with nothing pending that have been idle this long are removed from the group
+STALE_CONSUMER_MS = 3600 * 1000
+
+
+class QueueUnavailable(Exception):
+    """Raised when a job cannot be added to the stream (Redis down)."""
+
+
+class JobFailed(Exception):
+    """A queued job raised on every attempt; the message carries the worker's error."""
+
+
+def _dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=lambda o: o.model_dump(mode="json"))
+
+
+def _cancel_key(stream: str, job_id: str) -> str:
+    return f"{stream}:cancel:{job_id}"
+
+
+def runner_spec(runner: Callable, args: tuple, kwargs: Dict[str, Any]) -> Tuple[str, list, Dict[str, Any]]:
+    """Import path of a task runner plus its arguments, with those bound by functools.partial folded in."""
+    while isinstance(runner, functools.partial):
+        args = runner.args + tuple(args)
+        kwargs = {**runner.keywords, **kwargs}
+        runner = runner.func
+    name = f"{runner.__module__}:{runner.__qualname__}"
+    if not runner.__module__.startswith(RUNNER_MODULES):
+        raise ValueError(f"Only task runners can be queued, not {name}")
+    return name, list(args), kwargs
+
+
+def resolve_runner(name: str) -> Callable:
+    module, _, attr = name.partition(":")
+    if not module.startswith(RUNNER_MODULES):
+        raise ValueError(f"Not a task runner: {name}")
+    return getattr(importlib.import_module(module), attr)
+
+
+def job_error(reply: Dict[str, Any]) -> Exception:
+    kind, message = reply["error"], reply.get("message", "")
+    if kind == "Cancelled":
+        return Cancelled(message)
+    if kind == "DeadlineExceeded":
+        return DeadlineExceeded(message)
+    return JobFailed(f"{kind}: {message}")
+
+
+class JobQueue:
+    """Submitting side: adds jobs to the stream and resolves their Futures from this process's reply list."""
+
+    def __init__(self, client: Optional[redis.Redis] = None, stream: str = JOB_QUEUE_STREAM,
+                 group: str = JOB_QUEUE_GROUP):
+        self.r = client or redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
+        self.stream = stream
+        self.group = group
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._reply_key: Optional[str] = None
+        self._pid: Optional[int] = None
+
+    def _reply_list(self) -> str:
+        """This process's reply list, with its listener thread started on first use (again after a fork)."""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._pending = {}
+                self._reply_key = f"{self.stream}:replies:{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:8]}"
+                threading.Thread(target=self._listen, args=(self._reply_key,), name="job-replies",
+                                 daemon=True).start()
+            return self._reply_key
+
+    def submit(self, runner: Callable, *args, attempts: int = JOB_MAX_ATTEMPTS, **kwargs) -> Future:
+        """Queue `runner(*args, **kwargs)` under the current deadline and priority; the Future gets its result."""
+        name, args, kwargs = runner_spec(runner, args, kwargs)
+        left = time_left()
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "runner": name,
+            "args": args,
+            "kwargs": kwargs,
+            "reply": self._reply_list(),
+            # Wall-clock, so it means the same on every worker host
+            "deadline": None if left is None else time.time() + max(left, 0.0),
+            "priority": current_priority(),
+            "max_attempts": max(1, attempts),
+        }
+        future = Future()
+        with self._lock:
+            self._pending[job_id] = future
+        try:
+            self.r.xadd(self.stream, {"job": _dumps(job), "attempt": 1}, maxlen=JOB_QUEUE_MAXLEN, approximate=True)
+        except redis.RedisError as e:
+            with self._lock:
+                self._pending.pop(job_id, None)
+            raise QueueUnavailable(str(e)) from e
+        future.add_done_callback(lambda f: self._done(job_id, f))
+        return future
+
+    def run(self, runner: Callable, *args, attempts: int = JOB_MAX_ATTEMPTS, **kwargs) -> Any:
+        """Queue a job and wait for it within the current deadline; cancelling the scope cancels the job."""
+        future = self.submit(runner, *args, attempts=attempts, **kwargs)
+        try:
+            while True:
+                left = time_left()
+                if left is not None and left <= 0:
+                    raise Cancelled("Cancelled") if cancelled() else DeadlineExceeded("Time budget exhausted")
+                try:
+                    return future.result(timeout=REFRESH_SECONDS if left is None else min(left, REFRESH_SECONDS))
+                except FutureTimeout:
+                    continue
+        finally:
+            future.cancel()
+
+    def _done(self, job_id: str, future: Future):
+        with self._lock:
+            self._pending.pop(job_id, None)
+        if future.cancelled():
+            try:
+                self.r.set(_cancel_key(self.stream, job_id), 1, ex=JOB_RESULT_TTL_SECONDS)
+            except redis.RedisError as e:
+                print(f"Could not cancel job {job_id}: {e}")
+
+    def _listen(self, reply_key: str):
+        while self._reply_key == reply_key:
+            try:
+                item = self.r.blpop([reply_key], timeout=5)
+            except redis.RedisError as e:
+                print(f"Job reply listener: {e}")
+                time.sleep(1)
+                continue
+            if item is None:
+                continue
+            reply = orjson.loads(item[1])
+            with self._lock:
+                future = self._pending.get(reply["id"])
+            # None: answered already (a job retried after a lost worker) or given up on
+            if future is None:
+                continue
+            try:
+                if "error" in reply:
+                    future.set_exception(job_error(reply))
+                else:
+                    future.set_result(reply.get("result"))
+            except InvalidStateError:
+                pass  # cancelled meanwhile
+
+    def stats(self) -> Dict[str, int]:
+        try:
+            pending = self.r.xpending(self.stream, self.group)["pending"]
+        except redis.ResponseError:
+            pending = 0  # no worker has created the group yet
+        return {"in_stream": self.r.xlen(self.stream), "running": pending,
+                "dead": self.r.xlen(f"{self.stream}:dead")}
+
+
+class Worker:
+    """Consuming side: runs up to `concurrency` jobs at a time from the stream's consumer group."""
+
+    def __init__(self, concurrency: int = WORKER_CONCURRENCY, client: Optional[redis.Redis] = None,
+                 stream: str = JOB_QUEUE_STREAM, group: str = JOB_QUEUE_GROUP, name: Optional[str] = None):
+        self.r = client or redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
+        self.stream = stream
+        self.group = group
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.concurrency = concurrency
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._slot_free = threading.Condition(self._lock)
+        # stream message id -> (job id, cancel event) of the jobs running here
+        self._active: Dict[str, Tuple[str, threading.Event]] = {}
+        self._stop = threading.Event()
+        self._stats = {"completed": 0, "failed": 0, "retried": 0, "reclaimed": 0, "expired": 0,
+                       "cancelled": 0, "dead": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def ensure_group(self):
+        try:
+            self.r.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def free_slots(self) -> int:
+        with self._lock:
+            return self.concurrency - len(self._active)
+
+    def run(self):
+        """Serve jobs until `stop()`; jobs still running are finished (or left to be reclaimed) on the way out."""
+        self.ensure_group()
+        last_refresh = last_reclaim = 0.0
+        while not self._stop.is_set():
+            try:
+                now = time.monotonic()
+                if now - last_refresh >= REFRESH_SECONDS:
+                    self.refresh()
+                    last_refresh = now
+                if now - last_reclaim >= JOB_VISIBILITY_TIMEOUT_SECONDS / 2:
+                    self.reclaim()
+                    last_reclaim = now
+                with self._slot_free:
+                    if not self._slot_free.wait_for(lambda: len(self._active) < self.concurrency,
+                                                    timeout=REFRESH_SECONDS):
+                        continue
+                block_ms = int(REFRESH_SECONDS * 1000)
+                reply = self.r.xreadgroup(self.group, self.name, {self.stream: ">"}, count=self.free_slots(),
+                                          block=block_ms)
+                for _, messages in reply or []:
+                    for message_id, fields in messages:
+                        self._start(message_id, fields)
+            except redis.RedisError as e:
+                print(f"Worker {self.name}: {e}")
+                time.sleep(1)
+        self._pool.shutdown(wait=True)
+
+    def stop(self):
+        self._stop.set()
+
+    def _start(self, message_id: str, fields: Dict[str, str]):
+        try:
+            job = orjson.loads(fields["job"])
+        except (KeyError, orjson.JSONDecodeError) as e:
+            print(f"Dropping unreadable job {message_id}: {e}")
+            self.r.xack(self.stream, self.group, message_id)
+            return
+        event = threading.Event()
+        with self._lock:
+            self._active[message_id] = (job["id"], event)
+        self._pool.submit(self._process, message_id, fields["job"], job, int(fields.get("attempt", 1)), event)
+
+    def _process(self, message_id: str, raw: str, job: Dict[str, Any], attempt: int, event: threading.Event):
+        try:
+            self._execute(message_id, raw, job, attempt, event)
+        except redis.RedisError as e:
+            # Not acked: another worker takes the job over after the visibility timeout
+            print(f"Job {job['runner']} ({message_id}) could not be completed: {e}")
+        finally:
+            with self._slot_free:
+                self._active.pop(message_id, None)
+                self._slot_free.notify()
+
+    def _execute(self, message_id: str, raw: str, job: Dict[str, Any], attempt: int, event: threading.Event):
+        if event.is_set() or self.r.exists(_cancel_key(self.stream, job["id"])):
+            # The submitter has given up on it; nobody is waiting for a reply
+            self._count("cancelled")
+            self._finish(message_id, job)
+            return
+        left = None if job.get("deadline") is None else job["deadline"] - time.time()
+        if left is not None and left <= 0:
+            self._count("expired")
+            self._finish(message_id, job, {"error": "DeadlineExceeded", "message": "Deadline passed while queued"})
+            return
+        try:
+            runner = resolve_runner(job["runner"])
+            with priority(job.get("priority") or "interactive"), deadline(left), cancellable(event):
+                result = runner(*job["args"], **job["kwargs"])
+        except DeadlineExceeded as e:
+            self._count("cancelled" if isinstance(e, Cancelled) else "expired")
+            self._finish(message_id, job, {"error": type(e).__name__, "message": str(e)})
+            return
+        except Exception as e:
+            still_wanted = not event.is_set() and (job.get("deadline") is None or job["deadline"] > time.time())
+            if attempt < job.get("max_attempts", JOB_MAX_ATTEMPTS) and still_wanted:
+                print(f"Job {job['runner']} failed on attempt {attempt}, retrying: {type(e).__name__}: {e}")
+                self._count("retried")
+                with self.r.pipeline() as pipe:
+                    pipe.xadd(self.stream, {"job": raw, "attempt": attempt + 1}, maxlen=JOB_QUEUE_MAXLEN,
+                              approximate=True)
+                    pipe.xack(self.stream, self.group, message_id)
+                    pipe.xdel(self.stream, message_id)
+                    pipe.execute()
+                return
+            print(f"Job {job['runner']} failed after {attempt} attempt(s): {type(e).__name__}: {e}")
+            self._count("failed")
+            self._finish(message_id, job, {"error": type(e).__name__, "message": str(e)}, dead_letter=raw)
+            return
+        self._count("completed")
+        self._finish(message_id, job, {"result": result})
+
+    def _finish(self, message_id: str, job: Dict[str, Any], reply: Optional[Dict[str, Any]] = None,
+                dead_letter: Optional[str] = None):
+        """Publish the reply, if any, and ack the job in one transaction."""
+        if reply is not None:
+            try:
+                encoded = _dumps({"id": job["id"], **reply})
+            except TypeError:
+                encoded = _dumps({"id": job["id"], "result": str(reply.get("result"))})
+        with self.r.pipeline() as pipe:
+            if reply is not None:
+                pipe.rpush(job["reply"], encoded)
+                pipe.expire(job["reply"], JOB_RESULT_TTL_SECONDS)
+            if dead_letter is not None:
+                pipe.xadd(f"{self.stream}:dead", {"job": dead_letter, "error": reply.get("message", "")},
+                          maxlen=JOB_QUEUE_MAXLEN, approximate=True)
+            pipe.xack(self.stream, self.group, message_id)
+            pipe.xdel(self.stream, message_id)
+            pipe.execute()
+
+    # -------------------
+    # Visibility timeout
+    # -------------------
+    def refresh(self):
+        """Reset the idle time of the jobs running here and pass on cancellations."""
+        with self._lock:
+            active = list(self._active.items())
+        if not active:
+            return
+        # JUSTID: re-claiming for ourselves only resets the idle time, not the delivery count
+        self.r.xclaim(self.stream, self.group, self.name, 0, [message_id for message_id, _ in active], justid=True)
+        flags = self.r.mget([_cancel_key(self.stream, job_id) for _, (job_id, _) in active])
+        for (_, (_, event)), flag in zip(active, flags):
+            if flag:
+                event.set()
+
+    def reclaim(self):
+        """Take over jobs no worker has refreshed for JOB_VISIBILITY_TIMEOUT_SECONDS."""
+        free = self.free_slots()
+        if free > 0:
+            claimed = self.r.xautoclaim(self.stream, self.group, self.name,
+                                        int(JOB_VISIBILITY_TIMEOUT_SECONDS * 1000), start_id="0-0", count=free)
+            for message_id, fields in claimed[1]:
+                if not fields:
+                    # Trimmed from the stream while pending
+                    self.r.xack(self.stream, self.group, message_id)
+                    continue
+                self._count("reclaimed")
+                pending = self.r.xpending_range(self.stream, self.group, message_id, message_id, 1)
+                deliveries = pending[0]["times_delivered"] if pending else 1
+                job = orjson.loads(fields["job"])
+                if deliveries > job.get("max_attempts", JOB_MAX_ATTEMPTS):
+                    print(f"Job {job['runner']} lost its worker {deliveries - 1} time(s); giving up")
+                    self._count("dead")
+                    self._finish(message_id, job, {"error": "JobFailed",
+                                                   "message": f"Worker lost {deliveries - 1} time(s)"},
+                                 dead_letter=fields["job"])
+                    continue
+                self._start(message_id, fields)
+        for consumer in self.r.xinfo_consumers(self.stream, self.group):
+            if consumer["name"] != self.name and not consumer["pending"] and consumer["idle"] > STALE_CONSUMER_MS:
+                self.r.xgroup_delconsumer(self.stream, self.group, consumer["name"])
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["running"] = len(self._active)
+        return stats
+
+
+job_queue = JobQueue()
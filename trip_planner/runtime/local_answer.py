@@ -0,0 +1,285 @@
+# runtime/local_answer.py
+"""
+Answers to questions about the session itself, without agents or a model call.
+
+"What dates did I pick?", "which hotel am I booking?", "repeat the weather"
+used to be classified like any other turn and start a crew (often research
+with web search) or, worse, the booking flow. They are answered here from
+what the session already holds:
+
+- trip facts (dates, destination and route, travellers, budget, travel mode,
+  the hotel being booked) from the trip context, by template;
+- "repeat"/"show again" requests from the stored agent outputs, rendered as
+  they were first shown;
+- "what did you say about X" from the earlier exchange that best matches X,
+  in the conversation history or, for a session restored without one, the
+  stored memories.
+
+Only questions that are clearly about the session are taken: they need a
+recall cue and must not ask for anything new (cheaper, other, search, book
+it, is it enough, ...). Everything else returns None and goes to the agents.
+"""
+import re
+import threading
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {"checked": 0, "answered": 0}
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {"the", "a", "an", "in", "on", "for", "to", "of", "and", "or", "is", "are", "what", "how", "me",
+              "my", "we", "i", "it", "be", "with", "about", "at", "from", "there", "this", "that", "can", "you",
+              "did", "do", "say", "said", "tell", "told", "again", "was", "were", "your", "our", "us"}
+
+# Looks like a question or a request to recall something
+_ASKS = re.compile(r"\?\s*$|^\s*(?:what|what's|which|when|where|who|how|remind|tell|show|recap|summari[sz]e|repeat|"
+                   r"did|do|am|are|have|is|was|say|give|list|go over)\b")
+# Asks for new work or a judgement, not for what is already known
+_NEW_WORK = re.compile(
+    r"\b(?:change|update|switch|find|search|look (?:up|for)|suggest|recommend (?:me|some|a|other)|cheaper|"
+    r"another|other|alternatives?|different|new|instead|better|best|add|remove|cancel|compare|optimi[sz]e|"
+    r"should|could|would|can i|can we|will|forecast for|plan (?:a|an|my|our|the|it|out)|book (?:it|the|a|me)|"
+    r"yes|confirm|need|want|enough|afford|fit|within|cover|break ?down|split|allocate|safe|worth|try)\b"
+)
+_REPEAT = re.compile(
+    r"\b(?:repeat|again|once more|what (?:did|was it) (?:you|the \w+) (?:say|said|tell|told|suggest\w*|recommend\w*|find|found)|"
+    r"what (?:was|were) (?:the|your) (?:last |previous |earlier )?(?:answer|reply|response|suggestions?|"
+    r"recommendations?)|remind me (?:of|about|what)|(?:last|previous|earlier) (?:answer|reply|response|message))\b"
+)
+_REPEAT_BLOCK = re.compile(r"\b(?:cheaper|another|other|different|new|updated?|latest|instead|more|search|find|look|"
+                           r"check|recalculate|redo|try|plan (?:a|an|my|our|the|it|for|out)|book)\b")
+_THAT = re.compile(r"\b(?:that|it|your (?:last |previous )?(?:answer|reply|response|message)|"
+                   r"(?:last|previous) (?:answer|reply|response|message))\b")
+_ABOUT = re.compile(r"\b(?:about|on|regarding|for)\s+(.+?)\s*\??$")
+
+# Stored output a "repeat ..." question refers to, first match wins
+OUTPUT_TOPICS = (
+    ("itinerary", re.compile(r"itinerar|day[- ]by[- ]day|schedule|\bplan\b")),
+    ("weather_advice", re.compile(r"weather|forecast|temperature|\brain|climate")),
+    ("hotel_booking", re.compile(r"booking (?:confirmation|status|result)|reservation")),
+    ("hotel_recommendation", re.compile(r"hotel|\bstay|accommodation|hostel")),
+    ("transport_advice", re.compile(r"transport|train|\bbus|flight|getting (?:there|around)|route|how to reach")),
+    ("budget_optimizer", re.compile(r"budget|\bcost|price|expens")),
+    ("travel_research", re.compile(r"research|attraction|sights?\b|things to do|places|food|overview")),
+)
+
+# Words that may follow a trip-fact question without making it about something else
+# ("what dates did I pick?" yes, "where are we going for dinner?" no)
+_SLOT_TAIL = {"i", "we", "me", "you", "it", "a", "the", "my", "our", "this", "to", "for", "on", "in", "of", "so", "far",
+              "am", "is", "are", "was", "were", "be", "do", "did", "does", "have", "has", "had", "will", "again", "now",
+              "please", "with", "us", "exactly", "then", "currently", "right", "total", "trip", "there", "going", "booking",
+              "staying", "travelling", "traveling", "coming", "leaving", "pick", "picked", "choose", "chose",
+              "chosen", "select", "selected", "set", "give", "gave", "enter", "entered", "tell", "told", "say",
+              "said", "book", "booked", "plan", "planned", "start", "starts", "end", "ends", "begin", "begins"}
+
+# Trip facts, first match wins; anything but _SLOT_TAIL words after the match rules it out
+SLOTS = (
+    ("hotel", re.compile(r"\b(?:which|what) hotel\b|\bhotel (?:am i|are we|did i|did we|have i|have we)\b|"
+                         r"\b(?:am i|are we) (?:booking|staying)\b|\b(?:my|our) (?:hotel|booking|reservation)\b|"
+                         r"\bwhere (?:am i|are we) staying\b")),
+    ("trip", re.compile(r"\b(?:my|our|the) trip (?:details|so far|summary)\b|"
+                        r"\b(?:recap|summari[sz]e|summary of)\b.*\b(?:trip|plan|details|so far)\b|"
+                        r"\bwhat do you know about (?:my|our|the) trip\b|\bwhat(?:'s| is) (?:my|our) trip\b|"
+                        r"\bwhat have (?:i|we) (?:planned|picked|chosen|told you)\b")),
+    ("dates", re.compile(r"\b(?:my|our|the|which|what) (?:travel |trip )?dates?\b|\bdates? (?:did|have) (?:i|we)\b|"
+                         r"\bwhen (?:am i|are we|do i|do we) (?:going|leaving|travell?ing|flying|arriving|"
+                         r"coming back|returning)\b|\bwhen (?:is|does) (?:my|our) trip\b|"
+                         r"\bhow (?:long|many (?:days|nights)) (?:is|will be) (?:my|our|the) trip\b|"
+                         r"\b(?:my|our) check[- ]?(?:in|out)\b")),
+    ("travelers", re.compile(r"\bhow many (?:people|persons|travell?ers|guests|of us|adults)\b|"
+                             r"\b(?:number of|my|our) (?:travell?ers|guests|group size)\b")),
+    ("budget", re.compile(r"\b(?:my|our) (?:total |trip )?budget\b|\bhow much (?:did|have) (?:i|we) (?:set|budget)")),
+    ("origin", re.compile(r"\bwhere (?:am i|are we) (?:leaving|starting|travell?ing|flying|coming) from\b|"
+                          r"\b(?:my|our) (?:origin|starting point|departure city|home city)\b")),
+    ("destination", re.compile(r"\bwhere (?:am i|are we|do i|do we) (?:going|headed|heading|travell?ing|off to)\b|"
+                               r"\b(?:my|our) (?:destination|route|stops)\b|"
+                               r"\bwhich (?:city|cities|destination) (?:am i|are we|did i|did we)\b")),
+    ("mode", re.compile(r"\b(?:my|our) (?:travel |transport )?mode\b|\bhow (?:am i|are we) (?:travell?ing|getting there)\b|"
+                        r"\b(?:travel|transport) mode did (?:i|we)\b")),
+)
+
+
+def _count(kind: Optional[str]):
+    with _stats_lock:
+        _stats["checked"] += 1
+        if kind:
+            _stats["answered"] += 1
+            _stats[kind] = _stats.get(kind, 0) + 1
+
+
+def local_answer_stats() -> Dict[str, float]:
+    """How many turns were checked and answered locally, by kind."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["hit_rate"] = stats["answered"] / stats["checked"] if stats["checked"] else 0.0
+    return stats
+
+
+def _days(start: Optional[str], end: Optional[str]) -> str:
+    try:
+        days = (date.fromisoformat(end) - date.fromisoformat(start)).days + 1
+    except (TypeError, ValueError):
+        return ""
+    return f" ({days} day{'s' if days != 1 else ''})" if days > 0 else ""
+
+
+def _route(ctx: Dict[str, Any]) -> str:
+    legs = [leg for leg in ctx.get("legs") or [] if isinstance(leg, dict)]
+    if len(legs) > 1:
+        return " → ".join(f"{leg['destination']} ({leg.get('start_date') or '?'} to {leg.get('end_date') or '?'})"
+                          for leg in legs)
+    return ctx.get("destination") or ""
+
+
+def slot_answer(slot: str, ctx: Dict[str, Any], done: List[str]) -> str:
+    if slot == "hotel":
+        hotel = ctx.get("hotel_name")
+        if not hotel:
+            return ("You haven't picked a hotel to book yet. Tell me which one, e.g. "
+                    "“book <hotel> from YYYY-MM-DD to YYYY-MM-DD for 2 guests”.")
+        text = f"You're booking {hotel}"
+        if ctx.get("check_in_date") or ctx.get("check_out_date"):
+            text += f" from {ctx.get('check_in_date') or '?'} to {ctx.get('check_out_date') or '?'}"
+        if ctx.get("travelers"):
+            text += f" for {ctx['travelers']} guest{'s' if ctx['travelers'] != 1 else ''}"
+        if ctx.get("booking_pending_confirmation"):
+            return text + ". It isn't booked yet: reply “yes” to confirm."
+        return text + "."
+    if slot == "dates":
+        if not ctx.get("start_date"):
+            return "You haven't given travel dates yet; tell me e.g. “2025-03-10 to 2025-03-14”."
+        text = f"Your trip runs from {ctx['start_date']} to {ctx.get('end_date') or '?'}" \
+               f"{_days(ctx['start_date'], ctx.get('end_date'))}."
+        if len(ctx.get("legs") or []) > 1:
+            text += f" Route: {_route(ctx)}."
+        if ctx.get("check_in_date") and ctx.get("hotel_name"):
+            text += f" Hotel check-in {ctx['check_in_date']}, check-out {ctx.get('check_out_date') or '?'}."
+        return text
+    if slot == "travelers":
+        n = ctx.get("travelers") or 1
+        return f"The trip is planned for {n} traveller{'s' if n != 1 else ''}."
+    if slot == "budget":
+        if not ctx.get("budget_total"):
+            return "You haven't set a budget yet; tell me e.g. “budget 50000”."
+        return f"Your total budget is ₹{ctx['budget_total']:,}."
+    if slot == "origin":
+        return f"You're starting from {ctx['origin']}." if ctx.get("origin") else "You haven't told me where you're starting from yet."
+    if slot == "destination":
+        route = _route(ctx)
+        if not route:
+            return "You haven't picked a destination yet."
+        return f"Your route is {route}." if len(ctx.get("legs") or []) > 1 else f"You're going to {route}."
+    if slot == "mode":
+        mode = ctx.get("travel_mode_preference")
+        return f"You prefer to travel by {mode}." if mode else "You haven't picked a travel mode (car, train or flight) yet."
+    # Whole trip
+    facts = []
+    if _route(ctx):
+        facts.append(f"Destination: {_route(ctx)}")
+    if ctx.get("origin"):
+        facts.append(f"From: {ctx['origin']}")
+    if ctx.get("start_date"):
+        facts.append(f"Dates: {ctx['start_date']} to {ctx.get('end_date') or '?'}{_days(ctx['start_date'], ctx.get('end_date'))}")
+    facts.append(f"Travellers: {ctx.get('travelers') or 1}")
+    if ctx.get("budget_total"):
+        facts.append(f"Budget: ₹{ctx['budget_total']:,}")
+    if ctx.get("travel_mode_preference"):
+        facts.append(f"Travel mode: {ctx['travel_mode_preference']}")
+    if ctx.get("hotel_name"):
+        facts.append(f"Hotel: {ctx['hotel_name']}" + (" (awaiting your confirmation)" if ctx.get("booking_pending_confirmation") else ""))
+    if done:
+        facts.append(f"Ready to show again: {', '.join(done)}")
+    return "Here's your trip so far:\n" + "\n".join(f"- {fact}" for fact in facts)
+
+
+def _exchanges(history: List[Dict[str, str]], memories: Callable[[], List[str]]) -> List[Tuple[str, str]]:
+    """(question, answer) pairs, oldest first."""
+    pairs = []
+    for asked, answered in zip(history[::2], history[1::2]):
+        if asked.get("role") == "user" and answered.get("role") == "assistant":
+            pairs.append((asked["content"], answered["content"]))
+    if pairs:
+        return pairs
+    for text in reversed(memories() or []):
+        question, _, answer = text.partition("\nA: ")
+        pairs.append((question.removeprefix("Q: "), answer))
+    return pairs
+
+
+def _stem(word: str) -> str:
+    """Singular of a plural word, closely enough that "trains" and "train" or "cities" and "city" match."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def _terms(text: str) -> set:
+    return {_stem(word) for word in _WORD.findall(text.lower())}
+
+
+def _best_exchange(topic: str, pairs: List[Tuple[str, str]]) -> Optional[Tuple[str, str]]:
+    wanted = {_stem(word) for word in _WORD.findall(topic.lower()) if word not in _STOPWORDS}
+    if not wanted:
+        return None
+    best, best_score = None, 0
+    # Newest first, so the latest of equally good matches wins
+    for question, answer in reversed(pairs):
+        score = len(wanted & _terms(question)) * 2 + len(wanted & _terms(answer))
+        if score > best_score:
+            best, best_score = (question, answer), score
+    return best if best_score >= 2 else None
+
+
+def answer_locally(question: str, ctx: Dict[str, Any], output: Callable[[str], str], history: List[Dict[str, str]],
+                   memories: Callable[[], List[str]] = lambda: [], labels: Optional[Dict[str, str]] = None
+                   ) -> Optional[Tuple[str, str]]:
+    """
+    (kind, answer) when `question` asks about the session and can be answered from it, else None.
+    `output(agent_key)` renders a stored agent output ("" if there is none); `memories()` returns
+    stored "Q: ...\\nA: ..." memories, newest first, and is only called when the history is empty.
+    """
+    q = " ".join(question.lower().split())
+    kind, answer = None, None
+    if q and _ASKS.search(q):
+        if _REPEAT.search(q) and not _REPEAT_BLOCK.search(q):
+            kind, answer = _repeat(q, output, history, memories)
+        elif not _NEW_WORK.search(q):
+            for slot, pattern in SLOTS:
+                match = pattern.search(q)
+                if match and set(_WORD.findall(q[match.end():])) <= _SLOT_TAIL:
+                    done = [(labels or {}).get(key, key) for key, _ in OUTPUT_TOPICS if output(key)] if slot == "trip" else []
+                    kind, answer = slot, slot_answer(slot, ctx, done)
+                    break
+    _count(kind)
+    return (kind, answer) if kind else None
+
+
+def _repeat(q: str, output: Callable[[str], str], history: List[Dict[str, str]],
+            memories: Callable[[], List[str]]) -> Tuple[Optional[str], Optional[str]]:
+    for agent_key, pattern in OUTPUT_TOPICS:
+        if pattern.search(q):
+            text = output(agent_key)
+            if text:
+                return "repeat", text
+            # No stored output for it; an earlier answer may still have covered it
+            break
+    pairs = _exchanges(history, memories)
+    if not pairs:
+        return None, None
+    about = _ABOUT.search(q)
+    topic = about.group(1) if about and not _THAT.fullmatch(about.group(1)) else None
+    if topic is None and not _THAT.search(q):
+        topic = _REPEAT.sub(" ", q)
+    if topic:
+        match = _best_exchange(topic, pairs)
+        if match:
+            return "earlier_answer", f"Earlier you asked “{match[0]}”. My answer was:\n\n{match[1]}"
+        return None, None
+    if _THAT.search(q):
+        return "repeat", pairs[-1][1]
+    return None, None
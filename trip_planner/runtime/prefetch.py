@@ -0,0 +1,205 @@
+# runtime/prefetch.py
+"""
+Speculative prefetch of the agents a user is likely to ask for next.
+
+A first-order transition model over classified intents (shared by all
+sessions through Redis, seeded with PREFETCH_PRIOR) predicts the next intent
+after each turn. The orchestrator hands the matching agent runs to the
+Prefetcher, which runs them in the background at `prefetch` rate-limit
+priority and writes the results into the session's `agent_outputs`, tagged
+with a fingerprint of the inputs they were computed for. A follow-up turn
+with the same inputs uses the stored output (or waits for the one still
+running) instead of starting a new crew.
+
+Cost is capped per turn (PREFETCH_MAX_JOBS_PER_TURN) and per hour across
+processes (PREFETCH_HOURLY_BUDGET). Jobs are cancellable: a queued job is
+dropped and a running one stops at its next LLM or tool call.
+"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import redis
+
+from config.setting import (
+    PREFETCH_DEADLINE_SECONDS,
+    PREFETCH_HOURLY_BUDGET,
+    PREFETCH_PRIOR,
+    PREFETCH_WORKERS,
+    REDIS_DB,
+    REDIS_HOST,
+    REDIS_PORT,
+)
+from db.session_store import BaseSessionStore, SessionMap
+from runtime.deadline import DeadlineExceeded, cancellable, deadline
+from runtime.rate_limiter import priority
+
+
+class IntentTransitions:
+    """Counts of intent -> next intent, in Redis (falling back to process memory)."""
+
+    def __init__(self, client: Optional[redis.Redis] = None, prior: Optional[Dict[str, Dict[str, float]]] = None):
+        self.r = client or redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
+        self.prior = prior if prior is not None else PREFETCH_PRIOR
+        self._local: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, previous: str, current: str):
+        try:
+            self.r.hincrby(f"prefetch:transitions:{previous}", current, 1)
+        except redis.RedisError:
+            with self._lock:
+                row = self._local.setdefault(previous, {})
+                row[current] = row.get(current, 0) + 1
+
+    def counts(self, previous: str) -> Dict[str, float]:
+        counts = dict(self.prior.get(previous, {}))
+        try:
+            observed = self.r.hgetall(f"prefetch:transitions:{previous}")
+        except redis.RedisError:
+            with self._lock:
+                observed = dict(self._local.get(previous, {}))
+        for intent, n in observed.items():
+            counts[intent] = counts.get(intent, 0) + float(n)
+        return counts
+
+    def predict(self, previous: str, k: int = 2, min_probability: float = 0.0) -> List[Tuple[str, float]]:
+        """Up to `k` most likely next intents with their probabilities."""
+        counts = self.counts(previous)
+        total = sum(counts.values())
+        if not total:
+            return []
+        ranked = sorted(((intent, n / total) for intent, n in counts.items()), key=lambda x: x[1], reverse=True)
+        return [(intent, p) for intent, p in ranked[:k] if p >= min_probability]
+
+
+class Prefetcher:
+    def __init__(self, workers: int = PREFETCH_WORKERS, hourly_budget: int = PREFETCH_HOURLY_BUDGET,
+                 client: Optional[redis.Redis] = None):
+        self.r = client or redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
+        self.hourly_budget = hourly_budget
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        # (session_id, output key) -> (fingerprint, future, cancel event)
+        self._jobs: Dict[Tuple[str, str], Tuple[str, Future, threading.Event]] = {}
+        self._local_budget: Dict[str, int] = {}
+        self._stats = {"scheduled": 0, "completed": 0, "cancelled": 0, "failed": 0, "over_budget": 0,
+                       "used": 0, "joined": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _take_budget(self) -> bool:
+        if not self.hourly_budget:
+            return True
+        key = f"prefetch:budget:{time.strftime('%Y%m%d%H', time.gmtime())}"
+        try:
+            with self.r.pipeline() as pipe:
+                pipe.incr(key)
+                pipe.expire(key, 7200)
+                used = pipe.execute()[0]
+        except redis.RedisError:
+            with self._lock:
+                used = self._local_budget[key] = self._local_budget.get(key, 0) + 1
+        return used <= self.hourly_budget
+
+    # -------------------
+    # Scheduling
+    # -------------------
+    def schedule(self, session_id: str, store: BaseSessionStore, key: str, fingerprint: str,
+                 runner: Callable[..., Any], args: tuple) -> bool:
+        """Run `runner(*args)` in the background and store its output under `key` in the session."""
+        with self._lock:
+            existing = self._jobs.get((session_id, key))
+            if existing and existing[0] == fingerprint and not existing[1].done():
+                return False
+        if not self._take_budget():
+            self._count("over_budget")
+            return False
+        event = threading.Event()
+        future = self._pool.submit(self._run, session_id, store, key, fingerprint, runner, args, event)
+        with self._lock:
+            previous = self._jobs.get((session_id, key))
+            self._jobs[(session_id, key)] = (fingerprint, future, event)
+            self._stats["scheduled"] += 1
+        if previous:
+            previous[2].set()
+        future.add_done_callback(lambda f: self._forget(session_id, key, f))
+        return True
+
+    def _forget(self, session_id: str, key: str, future: Future):
+        with self._lock:
+            job = self._jobs.get((session_id, key))
+            if job and job[1] is future:
+                del self._jobs[(session_id, key)]
+
+    def _run(self, session_id: str, store: BaseSessionStore, key: str, fingerprint: str,
+             runner: Callable[..., Any], args: tuple, event: threading.Event) -> Any:
+        if event.is_set():
+            self._count("cancelled")
+            return None
+        try:
+            with priority("prefetch"), deadline(PREFETCH_DEADLINE_SECONDS), cancellable(event):
+                output = runner(*args)
+        except DeadlineExceeded:
+            self._count("cancelled")
+            raise
+        except Exception as e:
+            print(f"Prefetch of {key} failed: {e}")
+            self._count("failed")
+            raise
+        if event.is_set():
+            self._count("cancelled")
+            return output
+        state = store.load(session_id, {"agent_outputs": {}, "prefetched": {}})
+        SessionMap(state, "agent_outputs")[key] = output
+        prefetched = dict(state.get("prefetched") or {})
+        prefetched[key] = fingerprint
+        state.set("prefetched", prefetched)
+        state.save()
+        self._count("completed")
+        return output
+
+    # -------------------
+    # Use and cancellation
+    # -------------------
+    def pending(self, session_id: str, key: str, fingerprint: str) -> Optional[Future]:
+        """The running prefetch for `key` if it was computed for the same inputs."""
+        with self._lock:
+            job = self._jobs.get((session_id, key))
+        if job and job[0] == fingerprint and not job[2].is_set():
+            self._count("joined")
+            return job[1]
+        return None
+
+    def cancel(self, session_id: str, keep: Optional[Dict[str, str]] = None) -> int:
+        """Cancel the session's prefetches, except those whose key maps to the same fingerprint in `keep`."""
+        keep = keep or {}
+        cancelled = 0
+        with self._lock:
+            jobs = [(key, job) for (sid, key), job in self._jobs.items() if sid == session_id]
+        for key, (fingerprint, future, event) in jobs:
+            if keep.get(key) == fingerprint:
+                continue
+            event.set()
+            future.cancel()
+            cancelled += 1
+        return cancelled
+
+    def record_use(self):
+        self._count("used")
+
+    def metrics(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["running"] = sum(1 for _, f, _ in self._jobs.values() if not f.done())
+        # Share of prefetches a later turn actually used
+        scheduled = stats["scheduled"]
+        stats["hit_rate"] = (stats["used"] + stats["joined"]) / scheduled if scheduled else 0.0
+        return stats
+
+
+transitions = IntentTransitions()
+prefetcher = Prefetcher()
@@ -0,0 +1,183 @@
+# runtime/profiling.py
+"""
+Opt-in profiling of chat turns.
+
+When enabled (PROFILE_TURNS=1, or `profile=True` on a single turn), a turn
+runs under `profile_turn()`, which records:
+
+- a cProfile sample of the calling thread and of every agent job it runs on
+  the pool (`profiled_job`), merged into one `.prof` file per turn;
+- wall-clock spans (`span` / `traced`) for the orchestrator phases, agent
+  runs, crew kickoffs, LLM calls, rate-limiter waits and tool calls, from
+  every thread of the turn, in a `.json` file next to it;
+- with PROFILE_BACKEND=pyinstrument (if installed), an HTML flame graph of
+  the calling thread.
+
+Files go to PROFILE_DIR/<session>/<turn>.*; `profile_report.py` aggregates
+the hot spots across turns. When no turn is being profiled, `span` costs a
+context-variable lookup.
+"""
+import contextvars
+import cProfile
+import functools
+import os
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+
+from config.setting import PROFILE_BACKEND, PROFILE_DIR, PROFILE_TURNS
+
+
+class TurnProfile:
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.turn_id: Optional[str] = None
+        self.meta: Dict[str, Any] = {}
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, start: float, end: float):
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "start_ms": round((start - self.started) * 1000, 3),
+                "ms": round((end - start) * 1000, 3),
+                "thread": threading.current_thread().name,
+            })
+
+    def add_profile(self, profile: cProfile.Profile):
+        with self._lock:
+            self.profiles.append(profile)
+
+
+_turn: contextvars.ContextVar[Optional[TurnProfile]] = contextvars.ContextVar("profile_turn", default=None)
+
+
+def profiling_enabled(requested: Optional[bool] = None) -> bool:
+    """Per-turn flag if given, otherwise PROFILE_TURNS."""
+    return PROFILE_TURNS if requested is None else bool(requested)
+
+
+def active() -> Optional[TurnProfile]:
+    return _turn.get()
+
+
+@contextmanager
+def span(name: str):
+    """Wall-clock span of the enclosed block, recorded only while a turn is profiled."""
+    turn = _turn.get()
+    if turn is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        turn.add_span(name, start, time.perf_counter())
+
+
+def traced(name: str):
+    """Decorator form of `span`."""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def profiled_job(name: str, fn: Callable) -> Callable:
+    """Wrap a pool job so it gets a span and its own cProfile sample while its turn is profiled."""
+    def job(*args, **kwargs):
+        turn = _turn.get()
+        if turn is None:
+            return fn(*args, **kwargs)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler per process; the turn's own sample covers it
+            profile = None
+        try:
+            with span(name):
+                return fn(*args, **kwargs)
+        finally:
+            if profile is not None:
+                profile.disable()
+                turn.add_profile(profile)
+    return job
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", value)[:80] or "anonymous"
+
+
+@contextmanager
+def profile_turn(session_id: str, backend: str = PROFILE_BACKEND):
+    """
+    Profile the enclosed turn. The caller may set `turn_id` and `meta` on the
+    yielded TurnProfile; files are written when the block exits, even on error.
+    """
+    turn = TurnProfile(session_id)
+    token = _turn.set(turn)
+    sampler = None
+    if backend == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+            sampler = Profiler()
+        except ImportError:
+            print("pyinstrument is not installed; profiling with cProfile only")
+    profile = cProfile.Profile()
+    if sampler is not None:
+        sampler.start()
+    profile.enable()
+    error = None
+    try:
+        yield turn
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        profile.disable()
+        if sampler is not None:
+            sampler.stop()
+        _turn.reset(token)
+        turn.add_profile(profile)
+        turn.meta["wall_ms"] = round((time.perf_counter() - turn.started) * 1000, 3)
+        if error is not None:
+            turn.meta["error"] = f"{type(error).__name__}: {error}"
+        try:
+            save_turn(turn, sampler)
+        except Exception as e:
+            print(f"Error saving turn profile: {e}")
+
+
+def save_turn(turn: TurnProfile, sampler: Any = None) -> str:
+    """Write `<turn>.prof`, `<turn>.json` (and `<turn>.html` for pyinstrument); returns the path stem."""
+    directory = os.path.join(PROFILE_DIR, _safe_name(turn.session_id))
+    os.makedirs(directory, exist_ok=True)
+    turn_id = turn.turn_id or time.strftime("%Y%m%d-%H%M%S")
+    stem = os.path.join(directory, _safe_name(turn_id))
+
+    stats = pstats.Stats(turn.profiles[0])
+    for profile in turn.profiles[1:]:
+        stats.add(profile)
+    stats.dump_stats(stem + ".prof")
+
+    record = {"session_id": turn.session_id, "turn_id": turn_id, "created_at": time.time(),
+              **turn.meta, "spans": sorted(turn.spans, key=lambda s: s["start_ms"])}
+    with open(stem + ".json", "wb") as f:
+        f.write(orjson.dumps(record, option=orjson.OPT_INDENT_2))
+
+    if sampler is not None:
+        with open(stem + ".html", "w", encoding="utf-8") as f:
+            f.write(sampler.output_html())
+    return stem
@@ -0,0 +1,342 @@
+# runtime/rate_limiter.py
+"""
+Shared rate limiter and quota governor for LLM and tool calls.
+
+Every provider has token buckets (requests/min and, for LLMs, tokens/min)
+and an optional daily request quota, all kept in Redis so the limits hold
+across Streamlit workers, batch runs and agent workers. If Redis is
+unreachable the limiter falls back to process-local buckets.
+
+Callers run under a priority class (`interactive`, `prefetch`, `batch`).
+Lower classes may only draw from a bucket while it stays above a reserved
+share (PRIORITY_RESERVE), so interactive turns go first under contention.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import redis
+
+from config.setting import PRIORITY_RESERVE, PROVIDER_BUDGETS, REDIS_DB, REDIS_HOST, REDIS_PORT
+from runtime.deadline import DeadlineExceeded, time_left
+from runtime.profiling import span
+
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar("rate_limit_priority", default="interactive")
+
+# Longest single sleep before re-checking the bucket (others may have been refunded or unblocked)
+MAX_SLEEP_SECONDS = 1.0
+
+
+class QuotaExceededError(Exception):
+    """Raised when a provider's daily quota is used up for the caller's priority class."""
+
+
+@contextmanager
+def priority(name: str):
+    """Run the enclosed calls under priority class `name`."""
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+# Atomically refill and take `cost` tokens if the bucket stays above `floor`.
+# Returns 0 when taken, otherwise the seconds until enough tokens will be available.
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local floor = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local blocked = tonumber(redis.call('GET', KEYS[2]) or '0')
+if blocked > now then
+  return tostring(blocked - now)
+end
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+
+local wait = 0
+if tokens - cost >= floor then
+  tokens = tokens - cost
+else
+  wait = (cost + floor - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(wait)
+"""
+
+# Count one call against the daily quota unless that would pass `allowed`.
+# Returns 1 when counted, 0 when refused (refused calls are not counted).
+_DAILY_SCRIPT = """
+local allowed = tonumber(ARGV[1])
+local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+if used + 1 > allowed then
+  return 0
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+return 1
+"""
+
+# Refill a bucket to now, then add `amount` tokens (negative: charge them), capped at capacity.
+_ADJUST_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local amount = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, math.min(capacity, tokens + (now - ts) * rate) + amount)
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(tokens)
+"""
+
+
+class _LocalBuckets:
+    """Process-local equivalent of the Redis buckets, used when Redis is down."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, list] = {}
+        self._blocked: Dict[str, float] = {}
+        self._daily: Dict[str, int] = {}
+
+    def take(self, key: str, block_key: str, capacity: float, rate: float, cost: float, floor: float) -> float:
+        with self._lock:
+            now = time.time()
+            if self._blocked.get(block_key, 0) > now:
+                return self._blocked[block_key] - now
+            tokens, ts = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - ts) * rate)
+            wait = 0.0
+            if tokens - cost >= floor:
+                tokens -= cost
+            else:
+                wait = (cost + floor - tokens) / rate
+            self._buckets[key] = [tokens, now]
+            return wait
+
+    def adjust(self, key: str, capacity: float, rate: float, amount: float):
+        with self._lock:
+            now = time.time()
+            tokens, ts = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - ts) * rate)
+            self._buckets[key] = [min(capacity, tokens + amount), now]
+
+    def block(self, block_key: str, seconds: float):
+        with self._lock:
+            self._blocked[block_key] = max(self._blocked.get(block_key, 0), time.time() + seconds)
+
+    def count_daily(self, key: str, allowed: float) -> bool:
+        with self._lock:
+            used = self._daily.get(key, 0)
+            if used + 1 > allowed:
+                return False
+            self._daily[key] = used + 1
+            return True
+
+
+class RateLimiter:
+    def __init__(self, budgets: Dict[str, Dict[str, int]], reserves: Dict[str, float],
+                 client: Optional[redis.Redis] = None):
+        self.budgets = {provider: dict(budget) for provider, budget in budgets.items()}
+        self.reserves = dict(reserves)
+        self.r = client or redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
+        self._take = self.r.register_script(_TAKE_SCRIPT)
+        self._count = self.r.register_script(_DAILY_SCRIPT)
+        self._add = self.r.register_script(_ADJUST_SCRIPT)
+        self._local = _LocalBuckets()
+        self._redis_down_until = 0.0
+        self._metrics_lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    # -------------------
+    # Configuration
+    # -------------------
+    def set_limit(self, provider: str, rpm: Optional[int] = None, tpm: Optional[int] = None,
+                  daily: Optional[int] = None):
+        budget = self.budgets.setdefault(provider, {})
+        for name, value in (("rpm", rpm), ("tpm", tpm), ("daily", daily)):
+            if value is not None:
+                budget[name] = value
+
+    # -------------------
+    # Redis with local fallback
+    # -------------------
+    def _redis_ok(self) -> bool:
+        return time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self):
+        # Retry Redis after a short pause instead of on every call
+        self._redis_down_until = time.monotonic() + 30
+
+    def _take_tokens(self, provider: str, dimension: str, per_minute: int, cost: float, prio: str) -> float:
+        capacity = float(per_minute)
+        rate = per_minute / 60.0
+        floor = capacity * self.reserves.get(prio, 0.0)
+        key = f"ratelimit:{provider}:{dimension}"
+        block_key = f"ratelimit:{provider}:blocked"
+        if self._redis_ok():
+            try:
+                return float(self._take(keys=[key, block_key], args=[capacity, rate, cost, floor]))
+            except redis.RedisError:
+                self._redis_failed()
+        return self._local.take(key, block_key, capacity, rate, cost, floor)
+
+    def _count_daily(self, provider: str, daily: int, prio: str):
+        day = datetime.now(timezone.utc).strftime("%Y%m%d")
+        key = f"ratelimit:{provider}:daily:{day}"
+        allowed = daily * (1.0 - self.reserves.get(prio, 0.0))
+        counted = None
+        if self._redis_ok():
+            try:
+                counted = bool(int(self._count(keys=[key], args=[allowed, 2 * 86400])))
+            except redis.RedisError:
+                self._redis_failed()
+        if counted is None:
+            counted = self._local.count_daily(key, allowed)
+        if not counted:
+            self._record(provider, prio, waited=0.0, rejected=True)
+            raise QuotaExceededError(f"Daily quota for {provider} exhausted for {prio} calls ({daily}/day)")
+
+    # -------------------
+    # Public API
+    # -------------------
+    def acquire(self, provider: str, tokens: int = 0, prio: Optional[str] = None) -> float:
+        """
+        Block until `provider` may be called (one request plus `tokens` LLM tokens).
+        Returns the seconds spent queued; raises QuotaExceededError when the daily
+        quota is exhausted.
+        """
+        with span(f"rate_limit:{provider}"):
+            return self._acquire(provider, tokens, prio or current_priority())
+
+    def _acquire(self, provider: str, tokens: int, prio: str) -> float:
+        budget = self.budgets.get(provider, {})
+        waited = 0.0
+        taken = []  # (dimension, per_minute, cost) charged so far, given back if the call is not made
+        try:
+            for dimension, per_minute, cost in (("rpm", budget.get("rpm"), 1), ("tpm", budget.get("tpm"), tokens)):
+                if not per_minute or not cost:
+                    continue
+                # A single request larger than the whole bucket could never fit; cap it at capacity
+                cost = min(cost, per_minute)
+                while True:
+                    wait = self._take_tokens(provider, dimension, per_minute, cost, prio)
+                    if wait <= 0:
+                        taken.append((dimension, per_minute, cost))
+                        break
+                    left = time_left()
+                    if left is not None and wait > left:
+                        raise DeadlineExceeded(f"{provider} budget frees up in {wait:.1f}s, after the turn deadline")
+                    sleep_for = min(wait, MAX_SLEEP_SECONDS)
+                    time.sleep(sleep_for)
+                    waited += sleep_for
+            # Last step: a call counted against the daily quota is always made
+            if budget.get("daily"):
+                self._count_daily(provider, budget["daily"], prio)
+        except (DeadlineExceeded, QuotaExceededError):
+            for dimension, per_minute, cost in taken:
+                self._adjust(provider, dimension, per_minute, cost)
+            raise
+        self._record(provider, prio, waited)
+        return waited
+
+    def debit(self, provider: str, tokens: int):
+        """Charge tokens after the fact (e.g. LLM completion tokens), without waiting."""
+        per_minute = self.budgets.get(provider, {}).get("tpm")
+        if not per_minute or tokens <= 0:
+            return
+        self._adjust(provider, "tpm", per_minute, -tokens)
+
+    def _adjust(self, provider: str, dimension: str, per_minute: int, amount: float):
+        """Refill a bucket, then add `amount` tokens (negative: charge them), capped at capacity."""
+        key = f"ratelimit:{provider}:{dimension}"
+        capacity, rate = float(per_minute), per_minute / 60.0
+        if self._redis_ok():
+            try:
+                self._add(keys=[key], args=[capacity, rate, amount])
+                return
+            except redis.RedisError:
+                self._redis_failed()
+        self._local.adjust(key, capacity, rate, amount)
+
+    def backoff(self, provider: str, seconds: float):
+        """Pause all callers of `provider` (in every process), e.g. after an upstream 429."""
+        block_key = f"ratelimit:{provider}:blocked"
+        if self._redis_ok():
+            try:
+                until = time.time() + seconds
+                current = float(self.r.get(block_key) or 0)
+                if until > current:
+                    self.r.set(block_key, until, px=int(seconds * 1000) + 1000)
+                return
+            except redis.RedisError:
+                self._redis_failed()
+        self._local.block(block_key, seconds)
+
+    # -------------------
+    # Metrics
+    # -------------------
+    def _record(self, provider: str, prio: str, waited: float, rejected: bool = False):
+        name = f"{provider}:{prio}"
+        with self._metrics_lock:
+            m = self._metrics.setdefault(name, {"calls": 0, "throttled": 0, "rejected": 0,
+                                                "queued_seconds": 0.0, "max_wait_seconds": 0.0})
+            if rejected:
+                m["rejected"] += 1
+                return
+            m["calls"] += 1
+            if waited > 0:
+                m["throttled"] += 1
+                m["queued_seconds"] += waited
+                m["max_wait_seconds"] = max(m["max_wait_seconds"], waited)
+        if waited > 0 and self._redis_ok():
+            # Cross-process totals for dashboards
+            try:
+                with self.r.pipeline() as pipe:
+                    pipe.hincrby("ratelimit:metrics:throttled", name, 1)
+                    pipe.hincrbyfloat("ratelimit:metrics:queued_seconds", name, waited)
+                    pipe.execute()
+            except redis.RedisError:
+                self._redis_failed()
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Per provider:priority counters for this process."""
+        with self._metrics_lock:
+            return {name: dict(m) for name, m in self._metrics.items()}
+
+    def format_metrics(self) -> str:
+        lines = []
+        for name, m in sorted(self.metrics().items()):
+            lines.append(
+                f"{name}: {m['calls']} calls, {m['throttled']} throttled, {m['rejected']} rejected, "
+                f"queued {m['queued_seconds']:.1f}s (max {m['max_wait_seconds']:.1f}s)"
+            )
+        return "\n".join(lines)
+
+
+limiter = RateLimiter(PROVIDER_BUDGETS, PRIORITY_RESERVE)
+
+
+def throttle(provider: str, tokens: int = 0) -> float:
+    """Wait for the shared limiter before calling `provider`."""
+    return limiter.acquire(provider, tokens=tokens)
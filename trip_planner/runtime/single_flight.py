@@ -0,0 +1,205 @@
+# runtime/single_flight.py
+"""
+Request coalescing for identical agent runs.
+
+Concurrent calls with the same key share one execution: within a process
+followers wait on the leader's Future; across processes the leader holds a
+Redis lock and publishes its result, which followers in other processes
+receive instead of running the agent themselves. If the leader fails (or
+Redis is unavailable) followers simply run the call on their own; so do local
+followers whose leader ran out of its own time budget or was cancelled.
+Followers wait no longer than their own turn's budget allows.
+"""
+import functools
+import hashlib
+import inspect
+import threading
+import time
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Tuple
+
+import orjson
+import redis
+
+from config.setting import REDIS_DB, REDIS_HOST, REDIS_PORT
+from runtime.deadline import DeadlineExceeded, check_deadline, time_left
+
+# Compare-and-delete so a leader never releases a lock that expired and was re-taken
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0])) if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def coalesce_key(name: str, *args: Any, **kwargs: Any) -> str:
+    """Key for `name` called with these inputs, ignoring case, spacing and unset (None) fields."""
+    payload = orjson.dumps([name, _normalize(list(args)), _normalize(kwargs)], default=str)
+    return f"{name}:{hashlib.sha1(payload).hexdigest()}"
+
+
+class SingleFlight:
+    def __init__(self, client: redis.Redis = None, lock_ttl: int = 300, result_ttl: int = 15):
+        self.r = client or redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
+        self._release = self.r.register_script(_RELEASE_SCRIPT)
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._stats = {"calls": 0, "executed": 0, "coalesced_local": 0, "coalesced_remote": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def do(self, key: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run `fn(*args, **kwargs)` once for all concurrent callers using `key`."""
+        with self._lock:
+            self._stats["calls"] += 1
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        if not leader:
+            try:
+                # Our own turn's budget bounds the wait, not the leader's
+                result = future.result(timeout=time_left())
+            except FutureTimeout:
+                raise DeadlineExceeded("Time budget exhausted waiting for an identical call") from None
+            except DeadlineExceeded:
+                # The leader ran out of its own budget (or was cancelled); ours may still allow the call
+                check_deadline("call")
+                return self._execute(fn, args, kwargs)
+            self._count("coalesced_local")
+            return result
+
+        try:
+            result = self._do_across_processes(key, fn, args, kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _execute(self, fn, args, kwargs):
+        self._count("executed")
+        return fn(*args, **kwargs)
+
+    def _do_across_processes(self, key: str, fn, args, kwargs) -> Any:
+        lock_key = f"singleflight:lock:{key}"
+        result_key = f"singleflight:result:{key}"
+        token = uuid.uuid4().hex
+        try:
+            is_leader = self.r.set(lock_key, token, nx=True, px=self.lock_ttl * 1000)
+        except redis.RedisError:
+            return self._execute(fn, args, kwargs)
+
+        if is_leader:
+            try:
+                result = self._execute(fn, args, kwargs)
+            except BaseException:
+                self._publish(key, {"ok": False}, lock_key, token)
+                raise
+            self._publish(key, {"ok": True, "value": result}, lock_key, token)
+            return result
+
+        payload = self._wait_for_leader(key, lock_key, result_key)
+        if payload is not None and payload.get("ok"):
+            self._count("coalesced_remote")
+            return payload["value"]
+        # Leader failed or vanished: run it ourselves
+        return self._execute(fn, args, kwargs)
+
+    def _publish(self, key: str, payload: Dict[str, Any], lock_key: str, token: str):
+        try:
+            data = orjson.dumps(payload, default=lambda o: o.model_dump(mode="json"))
+        except TypeError:
+            data = orjson.dumps({"ok": False})
+        try:
+            with self.r.pipeline() as pipe:
+                # The result key covers followers that subscribe just after the publish
+                pipe.set(f"singleflight:result:{key}", data, px=self.result_ttl * 1000)
+                pipe.publish(f"singleflight:done:{key}", data)
+                pipe.execute()
+            self._release(keys=[lock_key], args=[token])
+        except redis.RedisError:
+            pass
+
+    def _wait_for_leader(self, key: str, lock_key: str, result_key: str):
+        try:
+            pubsub = self.r.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(f"singleflight:done:{key}")
+        except redis.RedisError:
+            return None
+        try:
+            left = time_left()
+            deadline = time.monotonic() + (self.lock_ttl if left is None else min(self.lock_ttl, left))
+            while time.monotonic() < deadline:
+                check_deadline("call")
+                raw = self.r.get(result_key)
+                if raw is not None:
+                    return orjson.loads(raw)
+                message = pubsub.get_message(timeout=max(min(1.0, deadline - time.monotonic()), 0.0))
+                if message is not None:
+                    return orjson.loads(message["data"])
+                if not self.r.exists(lock_key):
+                    # Lock released or expired without a published result
+                    raw = self.r.get(result_key)
+                    return orjson.loads(raw) if raw is not None else None
+            check_deadline("call")
+            return None
+        except redis.RedisError:
+            return None
+        finally:
+            pubsub.close()
+
+    def metrics(self) -> Dict[str, float]:
+        """Call counts and the share of calls served by another caller's execution."""
+        with self._lock:
+            stats = dict(self._stats)
+        coalesced = stats["coalesced_local"] + stats["coalesced_remote"]
+        stats["coalescing_rate"] = coalesced / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+
+single_flight = SingleFlight()
+
+
+def coalesced(name: str, digested: Tuple[str, ...] = ("conversation",)):
+    """
+    Decorator: concurrent calls with equal (normalized) arguments share one execution.
+    Arguments in `digested` (the conversation summary) enter the key as a hash of their
+    normalized text: sessions whose conversations summarize the same share a run, and an
+    answer shaped by one conversation never goes to a session with another.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                inputs = dict(signature.bind(*args, **kwargs).arguments)
+            except TypeError:
+                return single_flight.do(coalesce_key(name, *args, **kwargs), fn, *args, **kwargs)
+            for arg in digested:
+                if inputs.get(arg):
+                    inputs[arg] = hashlib.sha1(" ".join(str(inputs[arg]).lower().split()).encode()).hexdigest()
+            return single_flight.do(coalesce_key(name, **inputs), fn, *args, **kwargs)
+        return wrapper
+    return decorator
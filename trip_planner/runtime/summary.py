@@ -0,0 +1,170 @@
+# runtime/summary.py
+"""
+Rolling conversation summary.
+
+Agents get the structured trip context plus this summary instead of the chat
+history, so follow-up questions ("cheaper ones?", "and the second day?") keep
+their context at a bounded prompt size. After every turn the new exchange is
+folded in:
+
+- the question and the answer's most informative sentences become one line
+  (extractive, no model call);
+- the last SUMMARY_RECENT_TURNS lines are kept as they are; older ones move
+  into a running digest;
+- preferences the user states ("we're vegetarian", "no night buses") are kept
+  on their own, newest first, so they do not age out with the digest;
+- only when the rendered summary exceeds SUMMARY_MAX_TOKENS is the digest
+  condensed by the small-tier model; if that call fails its oldest exchanges
+  are dropped instead.
+
+The summary is a plain dict, stored as the session's `summary` field.
+"""
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from config.setting import (
+    SUMMARY_LINE_CHARS,
+    SUMMARY_MAX_PREFERENCES,
+    SUMMARY_MAX_TOKENS,
+    SUMMARY_RECENT_TURNS,
+)
+from model import estimate_tokens, get_llm
+
+EMPTY = {"digest": "", "recent": [], "preferences": [], "turns": 0, "condensed": 0}
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n+")
+_MARKUP = re.compile(r"[*_#>`|]+|^\s*[-•]\s*|\[(.*?)\]\(.*?\)")
+_WORD = re.compile(r"[a-z0-9₹$€£]+")
+_FACT = re.compile(r"\d|₹|\$|€|£|°c|\b(?:safe|unsafe|booked|confirm\w*|recommend\w*)\b", re.I)
+_PREFERENCE = re.compile(
+    r"\b(?:i|we)\s*(?:'d|would)?\s*(?:prefer|like|love|want|need|hate|avoid|don't|do not|can't|cannot|"
+    r"am|are|'m|'re)\b|\b(?:vegetarian|vegan|halal|kosher|wheelchair|allerg\w*|no (?:flights?|night|trains?|buses?))\b",
+    re.I,
+)
+_STOPWORDS = {"the", "a", "an", "in", "on", "for", "to", "of", "and", "or", "is", "are", "what", "how", "me",
+              "my", "we", "i", "it", "be", "with", "about", "at", "from", "there", "this", "that", "can", "you"}
+
+
+def _clean(text: str) -> str:
+    return " ".join(_MARKUP.sub(lambda m: m.group(1) or " ", text).split())
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[: limit - 1].rsplit(" ", 1)[0] + "…"
+
+
+def key_sentences(answer: str, question: str, limit: int = SUMMARY_LINE_CHARS) -> str:
+    """The answer's most informative sentences (facts, figures, words of the question), in order, within `limit`."""
+    sentences = [_clean(s) for s in _SENTENCE.split(answer or "")]
+    sentences = [s for s in sentences if len(s) > 12]
+    if not sentences:
+        return ""
+    asked = set(_WORD.findall(question.lower())) - _STOPWORDS
+    scored = []
+    for i, sentence in enumerate(sentences):
+        words = set(_WORD.findall(sentence.lower()))
+        score = len(words & asked) + 2 * bool(_FACT.search(sentence)) - i * 0.1
+        scored.append((score, i))
+    picked, used = [], 0
+    for _, i in sorted(scored, reverse=True):
+        if used + len(sentences[i]) > limit and picked:
+            continue
+        picked.append(i)
+        used += len(sentences[i]) + 1
+        if used >= limit or len(picked) == 2:
+            break
+    return _clip(" ".join(sentences[i] for i in sorted(picked)), limit)
+
+
+def exchange_line(question: str, answer: str, intent: str) -> str:
+    q = _clip(_clean(question), SUMMARY_LINE_CHARS // 3)
+    a = key_sentences(answer, question, SUMMARY_LINE_CHARS - len(q))
+    return f"({intent}) User: {q} — Answer: {a}" if a else f"({intent}) User: {q}"
+
+
+def preferences_in(question: str) -> List[str]:
+    return [_clip(_clean(s), 160) for s in _SENTENCE.split(question) if _PREFERENCE.search(s)]
+
+
+def render_summary(summary: Optional[Dict[str, Any]]) -> str:
+    """Prompt text for the summary ("" before the first turn)."""
+    if not summary or not summary.get("turns"):
+        return ""
+    parts = []
+    if summary.get("digest"):
+        parts.append(f"Earlier: {summary['digest']}")
+    if summary.get("recent"):
+        parts.append("Recent turns:\n" + "\n".join(f"- {line}" for line in summary["recent"]))
+    if summary.get("preferences"):
+        parts.append("User preferences: " + "; ".join(summary["preferences"]))
+    return "\n".join(parts)
+
+
+def condense_with_llm(text: str, target_tokens: int) -> str:
+    prompt = (
+        f"Condense these notes on a travel-planning chat to at most {target_tokens * 3 // 4} words. Keep "
+        "destinations, dates, prices, choices the user made and open questions; drop pleasantries. "
+        f"Reply with the condensed notes only.\n\nNotes: {text}"
+    )
+    return " ".join(str(get_llm("conversation_summarizer").call([{"role": "user", "content": prompt}])).split())
+
+
+def trim_oldest(text: str, target_tokens: int) -> str:
+    """Drop the oldest exchanges (" | "-separated) until `text` fits, then the oldest sentences of what is left."""
+    exchanges = [e.strip() for e in text.split(" | ") if e.strip(" |")]
+    while len(exchanges) > 1 and estimate_tokens(" | ".join(exchanges)) > target_tokens:
+        exchanges.pop(0)
+    if exchanges and estimate_tokens(exchanges[0]) > target_tokens:
+        sentences = [s for s in re.split(r"(?<=[.!?…])\s+", exchanges[0]) if s]
+        while len(sentences) > 1 and estimate_tokens(" ".join(sentences)) > target_tokens:
+            sentences.pop(0)
+        exchanges[0] = " ".join(sentences)
+    return _clip(" | ".join(exchanges), target_tokens * 4)
+
+
+def fold_exchange(summary: Optional[Dict[str, Any]], question: str, answer: str, intent: str,
+         condense: Callable[[str, int], str] = condense_with_llm) -> Dict[str, Any]:
+    """A new summary with this exchange folded in, rendered within SUMMARY_MAX_TOKENS."""
+    summary = {**EMPTY, **(summary or {})}
+    recent = list(summary["recent"]) + [exchange_line(question, answer, intent)]
+    digest = summary["digest"]
+    while len(recent) > SUMMARY_RECENT_TURNS:
+        digest = f"{digest} | {recent.pop(0)}" if digest else recent.pop(0)
+
+    preferences = list(summary["preferences"])
+    for preference in preferences_in(question):
+        if preference in preferences:
+            preferences.remove(preference)
+        preferences.insert(0, preference)
+    summary.update(recent=recent, digest=digest, preferences=preferences[:SUMMARY_MAX_PREFERENCES],
+                   turns=summary["turns"] + 1)
+
+    overflow = estimate_tokens(render_summary(summary)) - SUMMARY_MAX_TOKENS
+    if overflow > 0 and digest:
+        # Room the digest may take once everything else is rendered
+        target = max(estimate_tokens(digest) - overflow, SUMMARY_MAX_TOKENS // 4)
+        try:
+            condensed = condense(digest, target)
+        except Exception as e:
+            print(f"Summary condensation failed, trimming instead: {e}")
+            condensed = ""
+        if condensed and estimate_tokens(condensed) <= target:
+            summary["condensed"] += 1
+        else:
+            condensed = trim_oldest(condensed or digest, target)
+        summary["digest"] = condensed
+    # Small SUMMARY_MAX_TOKENS settings: recent lines and preferences alone may not fit
+    while estimate_tokens(render_summary(summary)) > SUMMARY_MAX_TOKENS and len(summary["preferences"]) > 1:
+        summary["preferences"].pop()
+    while estimate_tokens(render_summary(summary)) > SUMMARY_MAX_TOKENS and len(summary["recent"]) > 1:
+        summary["recent"].pop(0)
+    return summary
+
+
+def summary_from_memories(documents: List[str]) -> Dict[str, Any]:
+    """Rebuild a summary from stored "Q: ...\\nA: ..." memories (newest first), extractively."""
+    summary = dict(EMPTY)
+    for text in reversed(documents):
+        question, _, answer = text.partition("\nA: ")
+        summary = fold_exchange(summary, question.removeprefix("Q: "), answer, "earlier", condense=lambda t, n: "")
+    return summary
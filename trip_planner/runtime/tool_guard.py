@@ -0,0 +1,168 @@
+# runtime/tool_guard.py
+"""
+Per-kickoff guard on agent tool calls.
+
+Every task runs its crew inside `tool_run(agent_name, agent)`, and every tool's
+`_run` is wrapped with `@guarded`. Within one run:
+
+- an identical call (same tool, same arguments ignoring case, spacing and
+  defaults) is answered from the first call's observation instead of hitting
+  the network again;
+- a call that repeats a loop (the same call, or the same short cycle of
+  calls, TOOL_LOOP_REPEATS times in a row) gets the earlier observation back
+  with an instruction to stop calling tools and answer;
+- once the agent's tool-call budget is spent, further calls are refused with
+  an instruction to answer from what it has; its iteration budget is set as
+  the agent's `max_iter`, after which crewai forces a final answer.
+
+Calls outside a run (tool self-tests, tools used by other tools) go straight
+through. Counts are reported per kickoff: in the turn profile, as one log line
+when calls were saved or refused, and in `tool_guard_stats()` totals.
+"""
+import contextvars
+import functools
+import inspect
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from config.setting import AGENT_TOOL_BUDGETS, TOOL_LOOP_MAX_CYCLE, TOOL_LOOP_REPEATS
+from runtime.profiling import active
+from runtime.single_flight import coalesce_key
+
+REPEATED_NOTE = "(Same call as earlier in this task; earlier result repeated.)"
+LOOP_NOTE = ("You have repeated the same tool calls {times} times in a row in this task. Do not call them "
+             "again; write your answer from the results you already have.")
+BUDGET_NOTE = ("The tool call budget for this task ({budget} calls) is used up. Do not call more tools; "
+               "write your answer from the results you already have.")
+
+
+class ToolRun:
+    """Tool calls of one crew kickoff."""
+
+    def __init__(self, agent: str, max_calls: int):
+        self.agent = agent
+        self.max_calls = max_calls
+        self.observations: Dict[str, str] = {}
+        self.sequence: List[str] = []
+        self.counts = Counter()  # calls, executed, repeated, loops_cut, over_budget, errors
+        self.by_tool = Counter()
+        self._lock = threading.Lock()
+
+    def loop_repeats(self) -> int:
+        """How many times the tail of the call sequence repeats its last cycle (1: no loop)."""
+        longest = 1
+        for cycle in range(1, TOOL_LOOP_MAX_CYCLE + 1):
+            tail = self.sequence[-cycle:]
+            if len(tail) < cycle:
+                break
+            times, end = 1, len(self.sequence) - cycle
+            while end >= cycle and self.sequence[end - cycle:end] == tail:
+                times, end = times + 1, end - cycle
+            longest = max(longest, times)
+        return longest
+
+    def report(self) -> Dict[str, Any]:
+        return {"agent": self.agent, **{k: self.counts[k] for k in ("calls", "executed", "repeated", "loops_cut",
+                                                                     "over_budget", "errors")},
+                "by_tool": dict(self.by_tool)}
+
+
+_run: contextvars.ContextVar[Optional[ToolRun]] = contextvars.ContextVar("tool_run", default=None)
+# Set while a guarded tool executes, so tools called by other tools are not counted
+_inside: contextvars.ContextVar[bool] = contextvars.ContextVar("inside_tool", default=False)
+
+_totals_lock = threading.Lock()
+_totals = Counter()
+
+
+def budget_for(agent: str) -> Dict[str, int]:
+    return AGENT_TOOL_BUDGETS.get(agent, AGENT_TOOL_BUDGETS["default"])
+
+
+@contextmanager
+def tool_run(agent_name: str, agent: Any = None):
+    """
+    Guard the tool calls of the enclosed kickoff with `agent_name`'s budgets.
+    `agent` is the run's own copy of the agent; its `max_iter` is set to the iteration budget.
+    """
+    budget = budget_for(agent_name)
+    if agent is not None:
+        agent.max_iter = budget["iterations"]
+    run = ToolRun(agent_name, budget["calls"])
+    token = _run.set(run)
+    try:
+        yield run
+    finally:
+        _run.reset(token)
+        _finish(run)
+
+
+def _finish(run: ToolRun):
+    report = run.report()
+    with _totals_lock:
+        _totals["kickoffs"] += 1
+        _totals.update({k: v for k, v in report.items() if isinstance(v, int)})
+    turn = active()
+    if turn is not None:
+        turn.meta.setdefault("tool_runs", []).append(report)
+    if report["repeated"] or report["loops_cut"] or report["over_budget"]:
+        print(f"Tool calls of {run.agent}: {report['calls']} made, {report['executed']} run, "
+              f"{report['repeated']} repeated, {report['loops_cut']} loops cut, {report['over_budget']} over budget")
+
+
+def tool_guard_stats() -> Dict[str, int]:
+    """Totals over all kickoffs in this process."""
+    with _totals_lock:
+        return dict(_totals)
+
+
+def guarded(fn: Callable) -> Callable:
+    """Wrap a tool's `_run` so its calls go through the current `tool_run`."""
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        run = _run.get()
+        if run is None or _inside.get():
+            return fn(self, *args, **kwargs)
+        try:
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            key = coalesce_key(self.name, **dict(list(bound.arguments.items())[1:]))
+        except TypeError:
+            key = coalesce_key(self.name, *args, **kwargs)  # let the tool report the bad arguments
+
+        with run._lock:
+            run.counts["calls"] += 1
+            run.by_tool[self.name] += 1
+            run.sequence.append(key)
+            repeats = run.loop_repeats()
+            earlier = run.observations.get(key)
+            if repeats >= TOOL_LOOP_REPEATS:
+                run.counts["loops_cut"] += 1
+                note = LOOP_NOTE.format(times=repeats)
+                return f"{earlier}\n\n{note}" if earlier is not None else note
+            if earlier is not None:
+                run.counts["repeated"] += 1
+                return f"{REPEATED_NOTE}\n{earlier}"
+            if run.counts["executed"] >= run.max_calls:
+                run.counts["over_budget"] += 1
+                return BUDGET_NOTE.format(budget=run.max_calls)
+            run.counts["executed"] += 1
+
+        token = _inside.set(True)
+        try:
+            observation = fn(self, *args, **kwargs)
+        except Exception:
+            with run._lock:
+                run.counts["errors"] += 1
+            raise
+        finally:
+            _inside.reset(token)
+        with run._lock:
+            run.observations.setdefault(key, observation)
+        return observation
+
+    return wrapper
@@ -2,8 +2,14 @@
 from crewai import Task, Crew
 from agents.budget_optimizer_agent import budget_optimizer
 import json
+from runtime.profiling import span
+from runtime.single_flight import coalesced
+from runtime.tool_guard import tool_run
+from tasks.outputs import BudgetReport, to_record
+from tasks.prompts import TASK_PROMPTS
 
-def run_budget_optimizer(user_prompt: str, context: dict):
+@coalesced("budget_optimizer")
+def run_budget_optimizer(user_prompt: str, context: dict, conversation: str = ""):
     """
     Runs the Budget Optimizer agent with user input and context.
     
@@ -12,43 +18,33 @@ def run_budget_optimizer(user_prompt: str, context: dict):
             (e.g., "Optimize trip for 7 days under $2000").
         context (dict): Prior task outputs 
             (e.g., transport_estimates, hotel_options, meal_estimate, activities).
+        conversation (str): Rolling summary of the chat so far, for follow-up questions.
     
     Returns:
-        dict: {
-            "raw": Raw Crew output,
-            "structured": JSON-like structured output (if parsing succeeds)
-        }
+        BudgetReport as a dict (raw text if the answer could not be parsed).
     """
-    description = (
-        "You are a Budget Optimizer. "
-        "Main request: {user_prompt}. "
-        "Additional context: {context}. "
-        "Use the provided context (transport_estimates, hotel_options, meal_estimate, activities) "
-        "along with the user prompt to create a cost-optimized trip plan. "
-        "Return strictly paragrapgh format with the following information:\n"
-        "- total_estimate\n"
-        "- per_day_breakdown (list of daily costs)\n"
-        "- per_component_costs (transport, hotel, meals, activities)\n"
-        "- suggested_savings (list)\n"
-        "- alternatives (list of cheaper options)\n"
-    )
+    prompt = TASK_PROMPTS["budget_optimizer"]
+    # Fresh copy per run: the module-level agent is a shared, read-only definition
+    agent = budget_optimizer.copy()
 
     task = Task(
-        description=description,
-        agent=budget_optimizer,
-        expected_output="A valid paragraph format with trip budget optimization details"
+        description=prompt.description,
+        agent=agent,
+        expected_output=prompt.expected_output,
+        output_pydantic=BudgetReport,
     )
 
     crew = Crew(
-        agents=[budget_optimizer],
+        agents=[agent],
         tasks=[task],
         verbose=False
     )
 
 
     context_str = ", ".join(f"{k}: {v}" for k, v in context.items()) if context else ""
-    inputs = {"user_prompt": str(user_prompt), "context": context_str}
+    inputs = prompt.inputs(user_prompt=user_prompt, conversation=conversation or "none", context=context_str)
 
-    result = crew.kickoff(inputs=inputs)
+    with span("kickoff:budget_optimizer"), tool_run("budget_optimizer", agent):
+        result = crew.kickoff(inputs=inputs)
 
-    return result.raw
+    return to_record(result)
@@ -1,34 +1,37 @@
 from crewai import Task, Crew
 from agents.hotel_booking_agent import hotel_booker
+from runtime.profiling import span
+from runtime.tool_guard import tool_run
+from tasks.prompts import TASK_PROMPTS
 
 def run_hotel_booking(hotel_name: str, check_in_date: str, check_out_date: str, num_guests: int):
     """
     Runs the Hotel Booking agent to book a hotel.
     """
-    description = (
-        f"Book the hotel {hotel_name} for {num_guests} guests "
-        f"from {check_in_date} to {check_out_date}."
-    )
+    prompt = TASK_PROMPTS["hotel_booking"]
+    # Fresh copy per run: the module-level agent is a shared, read-only definition
+    agent = hotel_booker.copy()
 
     task = Task(
-        description=description,
-        agent=hotel_booker,
-        expected_output="A confirmation message with a booking confirmation number."
+        description=prompt.description,
+        agent=agent,
+        expected_output=prompt.expected_output,
     )
 
     crew = Crew(
-        agents=[hotel_booker],
+        agents=[agent],
         tasks=[task],
         verbose=False,
     )
 
-    inputs = {
-        "hotel_name": hotel_name,
-        "check_in_date": check_in_date,
-        "check_out_date": check_out_date,
-        "num_guests": num_guests
-    }
+    inputs = prompt.inputs(
+        hotel_name=hotel_name,
+        check_in_date=check_in_date,
+        check_out_date=check_out_date,
+        num_guests=num_guests,
+    )
 
-    result = crew.kickoff(inputs=inputs)
+    with span("kickoff:hotel_booking"), tool_run("hotel_booker", agent):
+        result = crew.kickoff(inputs=inputs)
 
     return result.raw
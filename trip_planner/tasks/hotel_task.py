@@ -1,39 +1,57 @@
 # tasks/hotel_task.py
 from crewai import Task, Crew
-from agents.hotel_recommendation_agent import hotel_recommender
+from agents.hotel_recommendation_agent import hotel_recommender, nearby_hotels_tool
+from db.geo_index import learn_hotels
+from db.knowledge_packs import load_pack, pack_prompt
+from runtime.profiling import span
+from runtime.single_flight import coalesced
+from runtime.tool_guard import tool_run
+from tasks.outputs import HotelReport, to_record
+from tasks.prompts import TASK_PROMPTS, pack_field
 
-def run_hotel_recommendation(user_prompt: str, context: dict):
+@coalesced("hotel_recommendation")
+def run_hotel_recommendation(user_prompt: str, context: dict, use_pack: bool = True, conversation: str = ""):
     """
     Runs the Hotel Recommender agent.
     Context expected keys: destination, budget_per_night or total_budget, 
     travelers, neighborhoods_of_interest
-    Returns raw + structured (if parsed later).
+    With `use_pack`, answers from the destination's knowledge pack instead of searching.
+    `conversation` is the rolling summary of the chat so far.
+    Returns a HotelReport as a dict (raw text if the answer could not be parsed).
     """
-    description = (
-        "Recommend hotels/alternatives in destination within given budget and near attractions/neighborhoods. "
-        "Main request: {user_prompt}. "
-        "Additional context: {context}. "
-        "Output should be paragrapgh structure and include grouped suggestions "
-        "by budget (budget/mid/luxury), with name, brief notes, approximate price, "
-        "and booking tips."
-    )
+    prompt = TASK_PROMPTS["hotel_recommendation"]
+
+    # Fresh copy per run: multi-destination trips run this agent for several legs at once
+    agent = hotel_recommender.copy()
+
+    pack = load_pack(context.get("destination")) if use_pack else None
+    if pack:
+        # The geo index is local, so it stays available when answering from the pack
+        agent.tools = [nearby_hotels_tool]
 
     task = Task(
-        description=description,
-        agent=hotel_recommender,
-        expected_output="A valid paragraph format with Hotel recommendations grouped by budget"
+        description=prompt.description,
+        agent=agent,
+        expected_output=prompt.expected_output,
+        output_pydantic=HotelReport,
     )
 
     crew = Crew(
-        agents=[hotel_recommender],
+        agents=[agent],
         tasks=[task],
         verbose=False,
     )
 
     # stringify context for safe interpolation
     context_str = ", ".join(f"{k}: {v}" for k, v in context.items())
-    inputs = {"user_prompt": user_prompt, "context": context_str}
+    inputs = prompt.inputs(user_prompt=user_prompt, conversation=conversation or "none",
+                           context=context_str,
+                           knowledge_pack=pack_field(pack_prompt(pack, "hotels") if pack else ""))
 
-    result = crew.kickoff(inputs=inputs)
+    with span("kickoff:hotel_recommendation"), tool_run("hotel_recommender", agent):
+        result = crew.kickoff(inputs=inputs)
 
-    return result.raw
+    record = to_record(result)
+    # Geocode the hotels it named (in the background) so later proximity questions are answered locally
+    learn_hotels(context.get("destination"), record)
+    return record
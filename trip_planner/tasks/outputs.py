@@ -0,0 +1,274 @@
+# tasks/outputs.py
+"""
+Typed agent outputs.
+
+Each task asks its agent for one of these records (CrewAI `output_pydantic`)
+and the orchestrator stores them as compact dicts. Later stages read only
+the fields they need through `brief()`; prose for the user is produced by
+`render()` at the edge (chat replies, sidebar). A run whose answer could not
+be parsed is kept as its raw text, and both functions pass text through.
+"""
+from typing import Any, Dict, List, Literal, Optional, Type
+
+from pydantic import BaseModel, Field, ValidationError
+
+
+def _money(amount: Optional[float], currency: Optional[str]) -> str:
+    if amount is None:
+        return ""
+    return f"{currency or ''} {amount:,.0f}".strip()
+
+
+def _join(items: List[str], sep: str = "; ") -> str:
+    return sep.join(i for i in items if i)
+
+
+# -------------------
+# Travel research
+# -------------------
+class Attraction(BaseModel):
+    name: str
+    area: Optional[str] = None
+    why: Optional[str] = Field(None, description="One line on why it is worth visiting")
+
+
+class ResearchReport(BaseModel):
+    destination: str
+    summary: str = Field(..., description="Two or three sentences on the destination")
+    attractions: List[Attraction] = []
+    hidden_gems: List[Attraction] = []
+    food: List[str] = Field([], description="Dishes or places to eat")
+    tips: List[str] = []
+    sources: List[str] = Field([], description="URLs")
+
+    def brief(self) -> str:
+        parts = [self.summary, "Attractions: " + _join([a.name for a in self.attractions], ", ")]
+        if self.hidden_gems:
+            parts.append("Hidden gems: " + _join([a.name for a in self.hidden_gems], ", "))
+        if self.food:
+            parts.append("Food: " + _join(self.food, ", "))
+        return "\n".join(parts)
+
+    def render(self) -> str:
+        text = self.summary
+        if self.attractions:
+            text += "\n\nTop attractions: " + _join(
+                [f"{a.name}{f' ({a.area})' if a.area else ''}{f' – {a.why}' if a.why else ''}" for a in self.attractions]
+            ) + "."
+        if self.hidden_gems:
+            text += "\n\nHidden gems: " + _join(
+                [f"{a.name}{f' – {a.why}' if a.why else ''}" for a in self.hidden_gems]) + "."
+        if self.food:
+            text += f"\n\nDon't miss: {_join(self.food, ', ')}."
+        if self.tips:
+            text += f"\n\nTips: {_join(self.tips)}."
+        return text + _sources(self.sources)
+
+
+# -------------------
+# Weather
+# -------------------
+class WeatherDay(BaseModel):
+    date: str = Field(..., description="YYYY-MM-DD")
+    summary: str = Field(..., description="e.g. 'Sunny', 'Light rain'")
+    temp_min_c: Optional[float] = None
+    temp_max_c: Optional[float] = None
+    rain_chance_pct: Optional[float] = None
+
+
+class WeatherReport(BaseModel):
+    destination: str
+    summary: str
+    days: List[WeatherDay] = []
+    activity_advice: List[str] = []
+    travel_safety: Literal["Safe", "Unsafe"] = "Safe"
+    sources: List[str] = []
+
+    def brief(self) -> str:
+        days = [f"{d.date}: {d.summary}"
+                + (f" {d.temp_min_c:.0f}-{d.temp_max_c:.0f}°C" if d.temp_min_c is not None and d.temp_max_c is not None else "")
+                for d in self.days]
+        return _join([f"{self.travel_safety}. {self.summary}", *days], "\n")
+
+    def render(self) -> str:
+        text = f"{self.summary} Travel safety: {self.travel_safety}."
+        for d in self.days:
+            temps = (f", {d.temp_min_c:.0f}–{d.temp_max_c:.0f}°C"
+                     if d.temp_min_c is not None and d.temp_max_c is not None else "")
+            rain = f", {d.rain_chance_pct:.0f}% chance of rain" if d.rain_chance_pct is not None else ""
+            text += f"\n- {d.date}: {d.summary}{temps}{rain}"
+        if self.activity_advice:
+            text += f"\n\n{_join(self.activity_advice, ' ')}"
+        return text + _sources(self.sources)
+
+
+# -------------------
+# Hotels
+# -------------------
+class HotelOption(BaseModel):
+    name: str
+    tier: Literal["budget", "mid", "luxury"]
+    area: Optional[str] = None
+    price_per_night: Optional[float] = None
+    currency: str = "INR"
+    notes: Optional[str] = None
+
+
+class HotelReport(BaseModel):
+    destination: str
+    summary: str
+    options: List[HotelOption] = []
+    tips: List[str] = []
+    sources: List[str] = []
+
+    def brief(self) -> str:
+        return "\n".join(
+            f"{o.name} ({o.tier}{f', {o.area}' if o.area else ''}"
+            f"{f', {_money(o.price_per_night, o.currency)}/night' if o.price_per_night is not None else ''})"
+            for o in self.options
+        ) or self.summary
+
+    def render(self) -> str:
+        text = self.summary
+        for tier, label in (("budget", "Budget"), ("mid", "Mid-range"), ("luxury", "Luxury")):
+            options = [o for o in self.options if o.tier == tier]
+            if options:
+                text += f"\n\n**{label}**: " + _join([
+                    f"{o.name}{f' in {o.area}' if o.area else ''}"
+                    f"{f' (about {_money(o.price_per_night, o.currency)} a night)' if o.price_per_night is not None else ''}"
+                    f"{f' – {o.notes}' if o.notes else ''}"
+                    for o in options
+                ]) + "."
+        if self.tips:
+            text += f"\n\nBooking tips: {_join(self.tips)}."
+        return text + _sources(self.sources)
+
+
+# -------------------
+# Transport
+# -------------------
+class TransportLeg(BaseModel):
+    from_place: str
+    to_place: str
+    mode: str = Field(..., description="e.g. 'flight', 'train', 'bus', 'car'")
+    duration_hours: Optional[float] = None
+    cost: Optional[float] = Field(None, description="Per person")
+    currency: str = "INR"
+    notes: Optional[str] = None
+
+
+class TransportReport(BaseModel):
+    summary: str
+    legs: List[TransportLeg] = []
+    local_transport: List[str] = Field([], description="Ways of getting around the destination")
+    safety_advice: List[str] = []
+    sources: List[str] = []
+
+    def brief(self) -> str:
+        legs = [f"{l.from_place} → {l.to_place}: {l.mode}"
+                + (f", {l.duration_hours:g}h" if l.duration_hours is not None else "")
+                + (f", {_money(l.cost, l.currency)}" if l.cost is not None else "")
+                for l in self.legs]
+        if self.local_transport:
+            legs.append("Local: " + _join(self.local_transport, ", "))
+        return "\n".join(legs) or self.summary
+
+    def render(self) -> str:
+        text = self.summary
+        for l in self.legs:
+            details = _join([f"about {l.duration_hours:g} hours" if l.duration_hours is not None else "",
+                             f"around {_money(l.cost, l.currency)} per person" if l.cost is not None else ""], ", ")
+            text += f"\n- {l.from_place} → {l.to_place} by {l.mode}{f' ({details})' if details else ''}"
+            if l.notes:
+                text += f": {l.notes}"
+        if self.local_transport:
+            text += f"\n\nGetting around: {_join(self.local_transport)}."
+        if self.safety_advice:
+            text += f"\n\nSafety: {_join(self.safety_advice)}."
+        return text + _sources(self.sources)
+
+
+# -------------------
+# Budget
+# -------------------
+class BudgetLineItem(BaseModel):
+    category: Literal["transport", "hotel", "meals", "activities", "other"]
+    description: str
+    amount: float
+
+
+class BudgetReport(BaseModel):
+    currency: str = "INR"
+    total_estimate: float
+    line_items: List[BudgetLineItem] = []
+    per_day: List[float] = Field([], description="Estimated spend for each day, in order")
+    savings: List[str] = []
+    alternatives: List[str] = []
+
+    def brief(self) -> str:
+        totals: Dict[str, float] = {}
+        for item in self.line_items:
+            totals[item.category] = totals.get(item.category, 0.0) + item.amount
+        return f"Total {_money(self.total_estimate, self.currency)}: " + ", ".join(
+            f"{c} {_money(v, self.currency)}" for c, v in totals.items())
+
+    def render(self) -> str:
+        text = f"Estimated total: **{_money(self.total_estimate, self.currency)}**."
+        for item in self.line_items:
+            text += f"\n- {item.category.title()}: {item.description} – {_money(item.amount, self.currency)}"
+        if self.per_day:
+            text += "\n\nPer day: " + ", ".join(
+                f"day {i} {_money(v, self.currency)}" for i, v in enumerate(self.per_day, 1)) + "."
+        if self.savings:
+            text += f"\n\nWays to save: {_join(self.savings)}."
+        if self.alternatives:
+            text += f"\n\nCheaper alternatives: {_join(self.alternatives)}."
+        return text
+
+
+def _sources(sources: List[str]) -> str:
+    return f"\n\nSources: {' '.join(sources)}" if sources else ""
+
+
+# Output model per agent key (storage keys may carry a ":<leg>" suffix)
+OUTPUT_MODELS: Dict[str, Type[BaseModel]] = {
+    "travel_research": ResearchReport,
+    "weather_advice": WeatherReport,
+    "hotel_recommendation": HotelReport,
+    "transport_advice": TransportReport,
+    "budget_optimizer": BudgetReport,
+}
+
+
+def to_record(result: Any) -> Any:
+    """What a task returns: the typed output as a compact dict, or the raw text if it didn't parse."""
+    pydantic_output = getattr(result, "pydantic", None)
+    if pydantic_output is not None:
+        return pydantic_output.model_dump(mode="json", exclude_none=True)
+    return getattr(result, "raw", result)
+
+
+def _model(agent_key: str, value: Any) -> Optional[BaseModel]:
+    model = OUTPUT_MODELS.get(agent_key.split(":", 1)[0])
+    if model is None or not isinstance(value, dict):
+        return None
+    try:
+        return model.model_validate(value)
+    except ValidationError:
+        return None
+
+
+def render(agent_key: str, value: Any) -> str:
+    """Prose for the user."""
+    record = _model(agent_key, value)
+    if record is not None:
+        return record.render()
+    return value if isinstance(value, str) else str(getattr(value, "raw", value))
+
+
+def brief(agent_key: str, value: Any) -> str:
+    """Compact text of the fields later agents need, for their prompts."""
+    record = _model(agent_key, value)
+    if record is not None:
+        return record.brief()
+    return value if isinstance(value, str) else str(getattr(value, "raw", value))
@@ -0,0 +1,173 @@
+# tasks/prompts.py
+"""
+Task prompt templates laid out for provider prompt caching.
+
+CrewAI sends each agent call as a system message (role, backstory, goal,
+tool descriptions and format rules; static per agent) followed by a user
+message starting with the task description. Every template here puts the
+task's static instructions first and the per-call fields (request, trip
+context, knowledge pack, upstream outputs) in one block at the end, so the
+system message plus the instruction head form a byte-identical prefix across
+calls. That prefix is what Gemini's implicit caching reuses, and the system
+message is also marked for explicit context caching (model.py,
+GEMINI_CONTEXT_CACHE) when it is long enough.
+
+Templates are rendered once at import; a call only fills the `{field}`
+placeholders of the tail through the crew's kickoff inputs.
+
+    python -m tasks.prompts        # cacheable prefix size per agent
+"""
+from typing import Any, Dict, Sequence, Tuple
+
+# Knowledge pack field values (the instructions travel with the pack so the head stays static)
+PACK_ONLY = "Use only this knowledge pack and cite its sources; do not search the web.\n"
+PACK_LOCAL = "Use this knowledge pack for getting around the destination instead of searching.\n"
+NO_PACK = "none"
+
+# Rolling summary of the chat so far (runtime/summary.py), for follow-up questions
+CONVERSATION = ("Conversation so far", "conversation")
+CONVERSATION_NOTE = (" Use the conversation so far only to resolve follow-up references and stated preferences; "
+                     "the request and trip context take precedence.")
+
+
+class TaskPrompt:
+    """Static instructions, then a `Label: {field}` line per per-call input."""
+
+    def __init__(self, instructions: str, fields: Sequence[Tuple[str, str]], expected_output: str):
+        self.head = " ".join(instructions.split())
+        self.fields = tuple(fields)
+        self.tail = "\n".join(f"{label}: {{{name}}}" for label, name in self.fields)
+        self.description = f"{self.head}\n\n{self.tail}"
+        self.expected_output = expected_output
+
+    def inputs(self, **values: Any) -> Dict[str, str]:
+        """Kickoff inputs for the tail; every field must be given (use "" for none)."""
+        missing = [name for _, name in self.fields if name not in values]
+        if missing:
+            raise ValueError(f"Missing prompt fields: {', '.join(missing)}")
+        return {name: str(values[name]) for _, name in self.fields}
+
+
+TASK_PROMPTS: Dict[str, TaskPrompt] = {
+    "travel_research": TaskPrompt(
+        "Research attractions and local tips for the trip described below. "
+        "Return a compact record: a two or three sentence summary, attractions (name, area, one line on why), "
+        "hidden gems, food must-tries, practical tips and source URLs. Keep every entry short." + CONVERSATION_NOTE,
+        [("Main request", "query"), CONVERSATION, ("Trip context", "formatted_context"),
+         ("Knowledge pack", "knowledge_pack")],
+        "A ResearchReport record with attractions, hidden gems, food, tips and sources.",
+    ),
+    "weather_advice": TaskPrompt(
+        "Provide a weather forecast and an explicit safety assessment for the destination and dates below. "
+        "Return a compact record: a one or two sentence summary, one entry per day (date, conditions, "
+        "min/max °C, chance of rain), activity advice, travel_safety ('Safe'/'Unsafe') and source URLs. "
+        "When climate normals are given, the dates are beyond the forecast range: base the summary and daily "
+        "entries on the normals, say they are typical conditions rather than a forecast, and do not search."
+        + CONVERSATION_NOTE,
+        [("User prompt", "user_prompt"), CONVERSATION, ("Destination", "destination"),
+         ("Start date", "start_date"), ("End date", "end_date"), ("Climate normals", "climate_normals")],
+        "A WeatherReport record with daily forecasts and a safety assessment",
+    ),
+    "hotel_recommendation": TaskPrompt(
+        "Recommend hotels or alternatives in the destination below, within the given budget and near the "
+        "attractions or neighbourhoods of interest. "
+        "Return a compact record: a short summary, hotel options each with name, tier (budget/mid/luxury), "
+        "area, approximate price per night and a brief note, booking tips and source URLs." + CONVERSATION_NOTE,
+        [("Main request", "user_prompt"), CONVERSATION, ("Trip context", "context"),
+         ("Knowledge pack", "knowledge_pack")],
+        "A HotelReport record with hotel options across budget tiers",
+    ),
+    "transport_advice": TaskPrompt(
+        "Recommend transport options from the origin to the destination below and for key local legs. "
+        "Consider the user's travel_mode_preference and any constraints in the trip context. "
+        "Return a compact record: a short summary, the recommended legs (from, to, mode, duration in hours, "
+        "cost per person, short route note), ways of getting around locally, safety advice and source URLs."
+        + CONVERSATION_NOTE,
+        [("Main request", "user_prompt"), CONVERSATION, ("Trip context", "context"),
+         ("Knowledge pack", "knowledge_pack")],
+        "A TransportReport record with legs, durations and costs",
+    ),
+    "budget_optimizer": TaskPrompt(
+        "Create a cost-optimized trip plan from the request and the trip context below "
+        "(transport_estimates, hotel_options, meal_estimate, activities where given). "
+        "Return a compact record with: currency, total_estimate, line_items (category: "
+        "transport/hotel/meals/activities/other, short description, amount), per_day costs, "
+        "suggested savings and cheaper alternatives." + CONVERSATION_NOTE,
+        [("Main request", "user_prompt"), CONVERSATION, ("Trip context", "context")],
+        "A BudgetReport record with line items and a total",
+    ),
+    "itinerary": TaskPrompt(
+        "Create a day-by-day travel itinerary for the request below, using the supporting research, weather, "
+        "transport, hotel and budget notes. Write the complete itinerary in a natural, narrative style. "
+        "Each day should be written in paragraph format, like a travel blog or guidebook. "
+        "Do NOT use JSON, bullet points, or lists. Just write flowing text with transitions." + CONVERSATION_NOTE,
+        [("User request", "user_prompt"), CONVERSATION, ("Travel research", "research_output"), ("Weather", "weather_output"),
+         ("Transport", "transport_output"), ("Hotels", "hotels_output"), ("Budget", "budget_output")],
+        "A detailed day-by-day itinerary written as natural language paragraphs only",
+    ),
+    "hotel_booking": TaskPrompt(
+        "Book the hotel below for the given guests and dates.",
+        [("Hotel", "hotel_name"), ("Guests", "num_guests"),
+         ("Check-in", "check_in_date"), ("Check-out", "check_out_date")],
+        "A confirmation message with a booking confirmation number.",
+    ),
+}
+
+
+def pack_field(pack_text: str, note: str = PACK_ONLY) -> str:
+    """Value of the `knowledge_pack` field: the pack with its usage note, or NO_PACK."""
+    return f"{note}{pack_text}" if pack_text else NO_PACK
+
+
+# -------------------
+# Cacheable prefix report
+# -------------------
+def _agents() -> Dict[str, Any]:
+    from agents.budget_optimizer_agent import budget_optimizer
+    from agents.hotel_booking_agent import hotel_booker
+    from agents.hotel_recommendation_agent import hotel_recommender
+    from agents.itinerary_builder import itinerary_planner
+    from agents.transport_advisor_agent import transport_advisor
+    from agents.travel_researcher import travel_researcher
+    from agents.weather_advisor_agent import weather_advisor
+    return {
+        "travel_research": travel_researcher, "weather_advice": weather_advisor,
+        "hotel_recommendation": hotel_recommender, "transport_advice": transport_advisor,
+        "budget_optimizer": budget_optimizer, "itinerary": itinerary_planner, "hotel_booking": hotel_booker,
+    }
+
+
+def system_prompt(agent: Any, with_tools: bool = True) -> str:
+    """The system message CrewAI builds for `agent` (role, backstory, goal, tools, format rules)."""
+    from crewai.utilities import I18N
+    i18n = I18N()
+    tools = agent.tools if with_tools else []
+    text = i18n.slice("role_playing") + i18n.slice("tools" if tools else "no_tools")
+    return (text.replace("{role}", agent.role).replace("{backstory}", agent.backstory)
+            .replace("{goal}", agent.goal)
+            .replace("{tools}", "\n".join(t.description for t in tools))
+            .replace("{tool_names}", ", ".join(t.name for t in tools)))
+
+
+def prefix_report() -> Dict[str, Dict[str, int]]:
+    """Estimated tokens of the static prefix per agent: system message plus task instruction head."""
+    from model import estimate_tokens
+    report = {}
+    for key, agent in _agents().items():
+        system = estimate_tokens(system_prompt(agent))
+        head = estimate_tokens(TASK_PROMPTS[key].head)
+        report[key] = {"system": system, "task_head": head, "prefix": system + head,
+                       "fields": len(TASK_PROMPTS[key].fields)}
+    return report
+
+
+def main():
+    from config.setting import GEMINI_CACHE_MIN_TOKENS
+    print(f"{'agent':<22} {'system':>7} {'head':>6} {'prefix':>7}  explicit cache (>= {GEMINI_CACHE_MIN_TOKENS})")
+    for key, row in prefix_report().items():
+        cached = "yes" if row["system"] >= GEMINI_CACHE_MIN_TOKENS else "no (implicit only)"
+        print(f"{key:<22} {row['system']:>7} {row['task_head']:>6} {row['prefix']:>7}  {cached}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,53 @@
 # tasks/transport_task.py
 from crewai import Task, Crew
 from agents.transport_advisor_agent import transport_advisor
+from db.knowledge_packs import load_pack, pack_prompt
+from runtime.profiling import span
+from runtime.single_flight import coalesced
+from runtime.tool_guard import tool_run
+from tasks.outputs import TransportReport, to_record
+from tasks.prompts import PACK_LOCAL, PACK_ONLY, TASK_PROMPTS, pack_field
 
-def run_transport_advice(user_prompt: str, context: dict):
+@coalesced("transport_advice")
+def run_transport_advice(user_prompt: str, context: dict, use_pack: bool = True, conversation: str = ""):
     """
     Runs the Transport Advisor agent.
     Context should include: origin, destination, travel_mode_preference (e.g. 'car'), travelers count.
-    Returns raw result.
+    With `use_pack`, the destination's knowledge pack covers local transport; the web is
+    searched only for the origin -> destination leg.
+    `conversation` is the rolling summary of the chat so far.
+    Returns a TransportReport as a dict (raw text if the answer could not be parsed).
     """
-    description = (
-        "Recommend transport options for origin -> destination and key local legs. "
-        "Consider user's travel_mode_preference and any constraints in context. "
-        "Main request: {user_prompt}. "
-        "Additional context: {context}. "
-        "Output should include: recommended_mode(s), estimated_times, costs_estimates, in paragrapgh format  "
-        "route_notes, safety_advice, apps/tips, sources."
-    )
+    prompt = TASK_PROMPTS["transport_advice"]
+
+    # Fresh copy per run: multi-destination trips run this agent for several legs at once
+    agent = transport_advisor.copy()
+
+    pack = load_pack(context.get("destination")) if use_pack else None
+    pack_note = PACK_LOCAL if context.get("origin") else PACK_ONLY
+    if pack and not context.get("origin"):
+        agent.tools = []
 
     task = Task(
-        description=description,
-        agent=transport_advisor,
-        expected_output="A valid paragraph format with transport advice"
+        description=prompt.description,
+        agent=agent,
+        expected_output=prompt.expected_output,
+        output_pydantic=TransportReport,
     )
 
     crew = Crew(
-        agents=[transport_advisor],
+        agents=[agent],
         tasks=[task],
         verbose=False
     )
 
     # stringify context for safe interpolation
     context_str = ", ".join(f"{k}: {v}" for k, v in context.items())
-    inputs = {"user_prompt": user_prompt, "context": context_str}
+    inputs = prompt.inputs(user_prompt=user_prompt, conversation=conversation or "none",
+                           context=context_str,
+                           knowledge_pack=pack_field(pack_prompt(pack, "transport") if pack else "", pack_note))
 
-    result = crew.kickoff(inputs=inputs)
+    with span("kickoff:transport_advice"), tool_run("transport_advisor", agent):
+        result = crew.kickoff(inputs=inputs)
 
-    return result.raw
+    return to_record(result)
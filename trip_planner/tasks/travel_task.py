@@ -2,40 +2,54 @@
 from crewai import Task, Crew
 from agents.travel_researcher import travel_researcher
 from typing import Dict, Any
+from db.knowledge_packs import load_pack, pack_prompt
+from tasks.outputs import ResearchReport, to_record
+from tasks.prompts import TASK_PROMPTS, pack_field
+from runtime.profiling import span
+from runtime.single_flight import coalesced
+from runtime.tool_guard import tool_run
 
-def run_travel_research(user_prompt: str, context: Dict[str, Any]):
+@coalesced("travel_research")
+def run_travel_research(user_prompt: str, context: Dict[str, Any], use_pack: bool = True, conversation: str = ""):
     """
     Runs the Travel Researcher agent.
     Args:
         user_prompt: The main query string (e.g., "Plan a 3-day trip to Manali")
         context: Dict with any additional info (e.g., {"destination": "Manali"})
+        use_pack: Answer from the destination's knowledge pack, if there is one, instead of searching
+        conversation: Rolling summary of the chat so far, for follow-up questions
     Returns:
-        dict with raw output and placeholder for structured JSON.
+        ResearchReport as a dict (raw text if the answer could not be parsed).
     """
     # Format the context dictionary into a readable string for the agent
     formatted_context = "\n".join([f"{k}: {v}" for k, v in context.items() if v is not None])
 
-    description = (
-        "Research attractions and local tips for the given trip. "
-        "Main request: {query}. "
-        "Additional context:\n{formatted_context}. "
-        "Output should be a single, continuous natural language paragraph summarizing all findings, "
-        "without explicit sections, bullet points, or lists, and without any programmatic wrapping (e.g., no 'raw: CrewOutput(...)')."
-    )
-    
+    prompt = TASK_PROMPTS["travel_research"]
+
+    # Fresh copy per run: multi-destination trips run this agent for several legs at once
+    agent = travel_researcher.copy()
+
+    pack = load_pack(context.get("destination")) if use_pack else None
+    if pack:
+        agent.tools = []
+
     task = Task(
-        description=description,
-        agent=travel_researcher,
-        expected_output="A valid paragraph format with listing of attractions, hidden gems, tips and sources."
+        description=prompt.description,
+        agent=agent,
+        expected_output=prompt.expected_output,
+        output_pydantic=ResearchReport,
     )
     
     crew = Crew(
-        agents=[travel_researcher],
+        agents=[agent],
         tasks=[task],
         verbose=False
     )
     
-    inputs = {"query": user_prompt, "formatted_context": formatted_context}
-    result = crew.kickoff(inputs=inputs)
+    inputs = prompt.inputs(query=user_prompt, conversation=conversation or "none",
+                           formatted_context=formatted_context,
+                           knowledge_pack=pack_field(pack_prompt(pack, "research") if pack else ""))
+    with span("kickoff:travel_research"), tool_run("travel_researcher", agent):
+        result = crew.kickoff(inputs=inputs)
     
-    return result.raw
+    return to_record(result)
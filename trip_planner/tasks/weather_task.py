@@ -1,32 +1,51 @@
 # tasks/weather_task.py
+from datetime import date, timedelta
+
 from crewai import Task, Crew
 from agents.weather_advisor_agent import weather_advisor
+from config.setting import WEATHER_FORECAST_HORIZON_DAYS
+from runtime.profiling import span
+from runtime.single_flight import coalesced
+from runtime.tool_guard import tool_run
+from tasks.outputs import WeatherReport, to_record
+from tasks.prompts import TASK_PROMPTS
+from tools.climatology_tool import climate_normals, parse_date
 
-def run_weather_advice(user_prompt: str, context: dict):
+@coalesced("weather_advice")
+def run_weather_advice(user_prompt: str, context: dict, conversation: str = ""):
     """
     Runs the Weather Advisor agent.
     Expects context to contain keys: destination, start_date, end_date
-    Returns raw and structured placeholder.
+    Trips starting beyond the forecast range are answered from climate normals, without tools.
+    `conversation` is the rolling summary of the chat so far.
+    Returns a WeatherReport as a dict (raw text if the answer could not be parsed).
     """
-    description = (
-        "Provide weather forecast and explicit safety assessment for given destination and dates. "
-        "User Prompt: {user_prompt}. "
-        "Destination: {destination}. "
-        "Start Date: {start_date}. "
-        "End Date: {end_date}. "
-        "Output should include: quick_summary, daily_forecasts(list), activity_advice, travel_safety('Safe'/'Unsafe'), sources."
-    )
+    prompt = TASK_PROMPTS["weather_advice"]
+    # Fresh copy per run: multi-destination trips run this agent for several legs at once
+    agent = weather_advisor.copy()
+
+    normals = ""
+    start = parse_date(context.get("start_date"))
+    if start and start > date.today() + timedelta(days=WEATHER_FORECAST_HORIZON_DAYS):
+        normals = climate_normals(context.get("destination") or "", context.get("start_date"), context.get("end_date"))
+        if normals:
+            agent.tools = []
+
     task = Task(
-        description=description,
-        agent=weather_advisor,
-        expected_output="A valid paragraph format with listing Structured weather + safety info"
+        description=prompt.description,
+        agent=agent,
+        expected_output=prompt.expected_output,
+        output_pydantic=WeatherReport,
+    )
+    crew = Crew(agents=[agent], tasks=[task], verbose=False)
+    inputs = prompt.inputs(
+        user_prompt=user_prompt,
+        conversation=conversation or "none",
+        destination=context.get("destination") or "",
+        start_date=context.get("start_date") or "",
+        end_date=context.get("end_date") or "",
+        climate_normals=normals or "none",
     )
-    crew = Crew(agents=[weather_advisor], tasks=[task], verbose=False)
-    inputs = {
-        "user_prompt": user_prompt,
-        "destination": context.get("destination", ""),
-        "start_date": context.get("start_date", ""),
-        "end_date": context.get("end_date", "")
-    }
-    result = crew.kickoff(inputs=inputs)
-    return result.raw
+    with span("kickoff:weather_advice"), tool_run("weather_advisor", agent):
+        result = crew.kickoff(inputs=inputs)
+    return to_record(result)
@@ -0,0 +1,29 @@
+# tests/test_climatology.py
+import orjson
+import numpy as np
+
+from db import climatology
+
+
+def build(directory):
+    np.save(directory / "normals.npy", np.full((1, 12, 4), 20.0, dtype=np.float32))
+    np.save(directory / "coords.npy", np.array([[26.92, 75.79]], dtype=np.float32))
+    (directory / "stations.json").write_bytes(orjson.dumps({"names": ["Jaipur"]}))
+
+
+def test_missing_dataset_is_looked_for_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(climatology, "CLIMATOLOGY_RETRY_SECONDS", 0)
+    normals = climatology.Climatology(str(tmp_path))
+    assert not normals.available()
+    build(tmp_path)
+    assert normals.available()
+    assert normals.station_by_name("Jaipur, India") == 0
+
+
+def test_reload_picks_up_a_dataset_built_later(tmp_path):
+    normals = climatology.Climatology(str(tmp_path))
+    assert not normals.available()
+    build(tmp_path)
+    assert not normals.available()  # not before CLIMATOLOGY_RETRY_SECONDS
+    normals.reload()
+    assert normals.nearest(26.9, 75.8)[0] == 0
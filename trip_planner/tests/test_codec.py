@@ -0,0 +1,69 @@
+# tests/test_codec.py
+import orjson
+import pytest
+import zstandard as zstd
+
+from db.codec import CURRENT_FILE, MAGIC, Codec, dict_filename
+
+OUTPUT = orjson.dumps({
+    "weather_advice": "Jaipur in March: sunny, 31°C by day and 17°C at night. Carry sunscreen and a light jacket. " * 8,
+    "hotel_recommendation": "Rambagh Palace (₹28,000/night), Samode Haveli (₹12,000/night), Zostel (₹900/night). " * 8,
+})
+
+
+def samples():
+    return [orjson.dumps({"q": f"weather in {city} in {month}", "a": f"{city} in {month} is sunny and {t}°C. "
+                          "Carry sunscreen, a light jacket and water. Book hotels near the old city early."})
+            for city in ("Jaipur", "Goa", "Udaipur", "Leh", "Kochi", "Agra", "Varanasi", "Shimla")
+            for month in ("January", "March", "May", "July", "October", "December")
+            for t in (14, 22, 31, 38)]
+
+
+@pytest.fixture
+def dictionary(tmp_path):
+    trained = zstd.train_dictionary(4096, samples())
+    (tmp_path / dict_filename(trained.dict_id())).write_bytes(trained.as_bytes())
+    (tmp_path / CURRENT_FILE).write_text(dict_filename(trained.dict_id()))
+    return trained
+
+
+def test_round_trip_without_dictionary():
+    codec = Codec(dict_dir=None, min_bytes=64)
+    stored = codec.encode(OUTPUT)
+    assert stored.startswith(MAGIC) and len(stored) < len(OUTPUT)
+    assert codec.decode(stored) == OUTPUT
+
+
+def test_round_trip_with_dictionary(tmp_path, dictionary):
+    writer = Codec(dict_dir=str(tmp_path), min_bytes=64)
+    stored = writer.encode(OUTPUT)
+    assert writer.current_dict_id() == dictionary.dict_id()
+    assert zstd.get_frame_parameters(stored[len(MAGIC) + 1:]).dict_id == dictionary.dict_id()
+    # Another process loads the dictionary named by the frame
+    assert Codec(dict_dir=str(tmp_path), min_bytes=64).decode(stored) == OUTPUT
+
+
+def test_values_written_with_an_older_dictionary_stay_readable(tmp_path, dictionary):
+    codec = Codec(dict_dir=str(tmp_path), min_bytes=64)
+    old = codec.encode(OUTPUT)
+    newer = zstd.train_dictionary(2048, samples()[::2])
+    (tmp_path / dict_filename(newer.dict_id())).write_bytes(newer.as_bytes())
+    (tmp_path / CURRENT_FILE).write_text(dict_filename(newer.dict_id()))
+    codec.reload()
+    assert codec.current_dict_id() == newer.dict_id() != dictionary.dict_id()
+    assert codec.decode(old) == OUTPUT
+    assert codec.decode(codec.encode(OUTPUT)) == OUTPUT
+
+
+def test_small_and_legacy_values_pass_through():
+    codec = Codec(dict_dir=None, min_bytes=64)
+    assert codec.encode(b'{"a": 1}') == b'{"a": 1}'
+    assert codec.decode(b'{"a": 1}') == b'{"a": 1}'
+    assert codec.decode(None) is None
+
+
+def test_corrupt_values_raise_value_error():
+    codec = Codec(dict_dir=None, min_bytes=64)
+    stored = codec.encode(OUTPUT)
+    with pytest.raises(ValueError):
+        codec.decode(stored[:20])
@@ -0,0 +1,59 @@
+# tests/test_forecast_cache.py
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from db import forecast_cache as fc
+
+JAIPUR = {"city": {"name": "Jaipur", "country": "IN", "coord": {"lat": 26.9196, "lon": 75.7878}}, "list": []}
+
+
+class Fetch:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, city=None, lat=None, lon=None):
+        self.calls.append((city, lat, lon, time.time()))
+        return {**JAIPUR, "issued": len(self.calls)}
+
+
+@pytest.fixture
+def cache():
+    return fc.ForecastCache(client=fakeredis.FakeRedis())
+
+
+def test_city_spellings_and_neighbours_share_one_entry(cache):
+    fetch = Fetch()
+    cache.forecast("Jaipur", fetch)
+    cache.forecast(" jaipur ", fetch)
+    cache.forecast("Jaipur,IN", fetch)
+    cache.remember("Amer", {"lat": 26.94, "lon": 75.76})  # same 0.1° cell
+    cache.forecast("Amer", fetch)
+    assert len(fetch.calls) == 1
+    assert cache.stats()["memory_hits"] == 3
+
+
+def test_other_processes_read_the_payload_from_redis(cache):
+    fetch = Fetch()
+    cache.forecast("Jaipur", fetch)
+    other = fc.ForecastCache(client=cache.r)
+    assert other.forecast("jaipur", fetch)["issued"] == 1
+    assert other.stats()["redis_hits"] == 1
+
+
+def test_refresh_ahead_fetches_the_next_issuance_once_its_bucket_starts(cache, monkeypatch):
+    monkeypatch.setattr(fc, "WEATHER_BUCKET_SECONDS", 0.4)
+    monkeypatch.setattr(fc, "WEATHER_REFRESH_AHEAD_SECONDS", 0.4)  # every hit is near the end of its bucket
+    fetch = Fetch()
+    cache.forecast("Jaipur", fetch)
+    bucket = fc.forecast_bucket()
+    cache.forecast("Jaipur", fetch)
+    deadline = time.time() + 2
+    while len(fetch.calls) < 2 and time.time() < deadline:
+        time.sleep(0.02)
+    assert len(fetch.calls) == 2
+    refreshed_at = fetch.calls[1][3]
+    assert fc.forecast_bucket(refreshed_at) >= bucket + 1
+    assert cache.get(cache.cell(cache.location("Jaipur")), fc.forecast_bucket(refreshed_at))["issued"] == 2
@@ -0,0 +1,51 @@
+# tests/test_geo_index.py
+import numpy as np
+import pytest
+
+from db.climatology import haversine_km
+from db.geo_index import GeoIndex
+
+AMBER_FORT = (26.9855, 75.8513)
+HOTELS = [
+    {"name": "Amber Haveli", "lat": 26.9870, "lon": 75.8560, "tier": "mid", "price_per_night": 4000},
+    {"name": "Fort View Hostel", "lat": 26.9800, "lon": 75.8480, "tier": "budget", "price_per_night": 900},
+    {"name": "Rambagh Palace", "lat": 26.8980, "lon": 75.8080, "tier": "luxury", "price_per_night": 28000},
+    {"name": "Goa Beach Resort", "lat": 15.5520, "lon": 73.7510, "tier": "mid"},
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = GeoIndex(str(tmp_path / "geo.db"))
+    index.add_places(HOTELS, "hotel", "Jaipur", source="test")
+    return index
+
+
+def test_hotels_within_the_radius_sorted_by_distance(index):
+    found = index.hotels_near([AMBER_FORT], radius_km=3)
+    assert [h["name"] for h in found] == ["Amber Haveli", "Fort View Hostel"]
+    for hotel in found:
+        expected = haversine_km(*np.radians(AMBER_FORT), np.radians([hotel["lat"]]), np.radians([hotel["lon"]]))[0]
+        assert hotel["distance_km"] == pytest.approx(expected, abs=0.01)
+
+
+def test_filters_and_price_sort(index):
+    assert [h["name"] for h in index.hotels_near([AMBER_FORT], 15, tiers=["luxury"])] == ["Rambagh Palace"]
+    assert [h["name"] for h in index.hotels_near([AMBER_FORT], 15, max_price=5000)] == ["Amber Haveli",
+                                                                                           "Fort View Hostel"]
+    by_price = index.hotels_near([AMBER_FORT], 15, sort="price")
+    assert [h["tier"] for h in by_price] == ["budget", "mid", "luxury"]
+
+
+def test_each_hotel_is_reported_once_with_its_closest_point(index):
+    found = index.hotels_near([(26.8980, 75.8080), AMBER_FORT], radius_km=15)
+    assert len({h["name"] for h in found}) == len(found) == 3
+    assert next(h for h in found if h["name"] == "Rambagh Palace")["near"] == 0
+    assert next(h for h in found if h["name"] == "Amber Haveli")["near"] == 1
+
+
+def test_writes_show_up_in_queries_and_lookups(index):
+    index.add_places([{"name": "Amer Stay", "lat": 26.9860, "lon": 75.8520}], "hotel", "Jaipur")
+    assert "Amer Stay" in {h["name"] for h in index.hotels_near([AMBER_FORT], 1)}
+    assert index.locate("amer  stay", "jaipur") == (26.9860, 75.8520)
+    assert index.stats() == {"attraction": 0, "hotel": 5}
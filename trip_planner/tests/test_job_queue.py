@@ -0,0 +1,74 @@
+# tests/test_job_queue.py
+import threading
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from runtime import job_queue as jq
+from runtime.deadline import DeadlineExceeded, deadline
+
+ATTEMPTS = {}
+
+
+def plan(city, days=3):
+    return f"{days} days in {city}"
+
+
+def flaky(key):
+    ATTEMPTS[key] = ATTEMPTS.get(key, 0) + 1
+    if ATTEMPTS[key] < 2:
+        raise RuntimeError("upstream 503")
+    return f"ok after {ATTEMPTS[key]}"
+
+
+def broken():
+    raise RuntimeError("always fails")
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    monkeypatch.setattr(jq, "RUNNER_MODULES", (__name__,))
+    server = fakeredis.FakeServer()
+    queue = jq.JobQueue(client=fakeredis.FakeRedis(server=server, decode_responses=True), stream="test_jobs")
+    worker = jq.Worker(concurrency=2, client=fakeredis.FakeRedis(server=server, decode_responses=True),
+                       stream="test_jobs", name="w1")
+    worker.ensure_group()
+    thread = threading.Thread(target=worker.run, daemon=True)
+    thread.start()
+    queue.worker = worker
+    yield queue
+    worker.stop()
+    thread.join(timeout=5)
+    queue._reply_key = None  # stops the reply listener
+
+
+def test_worker_runs_the_job_and_replies(queue):
+    assert queue.submit(plan, "Jaipur", days=2).result(timeout=5) == "2 days in Jaipur"
+    assert queue.worker.metrics()["completed"] == 1
+    assert queue.stats()["running"] == 0
+
+
+def test_failed_jobs_are_retried(queue):
+    assert queue.submit(flaky, "retry-test").result(timeout=5) == "ok after 2"
+    assert queue.worker.metrics()["retried"] == 1
+
+
+def test_jobs_out_of_attempts_fail_and_go_to_the_dead_letter_stream(queue):
+    with pytest.raises(jq.JobFailed, match="always fails"):
+        queue.submit(broken, attempts=1).result(timeout=5)
+    assert queue.stats()["dead"] == 1
+
+
+def test_jobs_past_their_deadline_are_not_run(queue):
+    with deadline(0.0):
+        future = queue.submit(plan, "Goa")
+    with pytest.raises(DeadlineExceeded):
+        future.result(timeout=5)
+    assert queue.worker.metrics()["expired"] == 1
+
+
+def test_only_task_runners_can_be_queued(queue):
+    with pytest.raises(ValueError):
+        queue.submit(time.sleep, 1)
@@ -0,0 +1,66 @@
+# tests/test_local_answer.py
+import pytest
+
+from runtime.local_answer import answer_locally
+
+CTX = {
+    "origin": "Delhi", "destination": "Jaipur", "start_date": "2025-03-10", "end_date": "2025-03-14", "travelers": 2,
+    "budget_total": 40000, "travel_mode_preference": "train", "hotel_name": "Rambagh Palace",
+    "check_in_date": "2025-03-10", "check_out_date": "2025-03-14", "booking_pending_confirmation": True, "legs": [],
+}
+OUTPUTS = {"weather_advice": "Sunny, 31°C.", "hotel_recommendation": "Try Heritage Haveli."}
+HISTORY = [
+    {"role": "user", "content": "how do I get there by train from delhi"},
+    {"role": "assistant", "content": "Take the Shatabdi Express, about 4.5 hours."},
+    {"role": "user", "content": "weather in jaipur"},
+    {"role": "assistant", "content": "Sunny, 31°C."},
+]
+
+
+def ask(question, history=HISTORY):
+    return answer_locally(question, CTX, lambda key: OUTPUTS.get(key, ""), history)
+
+
+@pytest.mark.parametrize("question, kind", [
+    ("What dates did I pick?", "dates"),
+    ("when are we leaving?", "dates"),
+    ("which hotel am I booking?", "hotel"),
+    ("how many people are travelling?", "travelers"),
+    ("what's my budget?", "budget"),
+    ("where am I going?", "destination"),
+    ("what is our route?", "destination"),
+    ("how are we getting there?", "mode"),
+    ("repeat the weather", "repeat"),
+    ("Give me a recap of my trip so far", "trip"),
+])
+def test_session_questions_are_answered(question, kind):
+    answered = ask(question)
+    assert answered is not None and answered[0] == kind
+
+
+@pytest.mark.parametrize("question", [
+    "where are we going for dinner?",
+    "where are we going to stay?",
+    "when are we leaving for the airport?",
+    "what are my check-in options?",
+    "how are we getting there from the airport?",
+    "what is our route to amber fort?",
+    "suggest cheaper hotels",
+    "is my budget enough?",
+    "what did you say about the camel safari?",
+])
+def test_new_questions_go_to_the_agents(question):
+    assert ask(question) is None
+
+
+@pytest.mark.parametrize("question", ["what did you say about the train?", "what did you say about trains?"])
+def test_earlier_answer_matches_singular_and_plural(question):
+    assert ask(question) == ("earlier_answer", "Earlier you asked “how do I get there by train from delhi”. "
+                                               "My answer was:\n\nTake the Shatabdi Express, about 4.5 hours.")
+
+
+def test_plural_in_earlier_question_matches_singular():
+    history = [{"role": "user", "content": "are there trains from delhi"},
+               {"role": "assistant", "content": "Yes, the train takes 4.5 hours."}]
+    answered = ask("what did you say about the train?", history)
+    assert answered is not None and answered[1].endswith("Yes, the train takes 4.5 hours.")
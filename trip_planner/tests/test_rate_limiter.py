@@ -0,0 +1,85 @@
+# tests/test_rate_limiter.py
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")  # fakeredis runs the limiter's Lua scripts with lupa
+
+from runtime.deadline import DeadlineExceeded, deadline
+from runtime.rate_limiter import QuotaExceededError, RateLimiter
+
+RESERVES = {"interactive": 0.0, "prefetch": 0.15, "batch": 0.3}
+
+
+@pytest.fixture
+def limiter():
+    return RateLimiter({"llm": {"rpm": 60, "tpm": 6000, "daily": 10}}, RESERVES,
+                       client=fakeredis.FakeRedis(decode_responses=True))
+
+
+def tokens(limiter, dimension):
+    return float(limiter.r.hget(f"ratelimit:llm:{dimension}", "tokens"))
+
+
+def test_take_charges_request_and_tokens(limiter):
+    assert limiter.acquire("llm", tokens=1000) == 0.0
+    assert tokens(limiter, "rpm") == pytest.approx(59, abs=0.1)
+    assert tokens(limiter, "tpm") == pytest.approx(5000, abs=1)
+
+
+def test_debit_on_an_empty_bucket_starts_from_capacity(limiter):
+    limiter.debit("llm", 400)
+    assert tokens(limiter, "tpm") == pytest.approx(5600, abs=1)
+    assert limiter.r.hget("ratelimit:llm:tpm", "ts") is not None
+
+
+def test_refused_call_gives_tokens_back_without_overfilling(limiter):
+    limiter.set_limit("llm", tpm=600)
+    limiter.acquire("llm", tokens=500)
+    with deadline(0.05), pytest.raises(DeadlineExceeded):
+        limiter.acquire("llm", tokens=500)  # tpm only frees up in ~40s
+    assert tokens(limiter, "rpm") == pytest.approx(59, abs=0.1)  # the refused call's request was refunded
+    assert tokens(limiter, "tpm") <= 600
+
+
+def test_refund_on_an_expired_bucket_leaves_it_full(limiter):
+    limiter._adjust("llm", "rpm", 60, 1)
+    assert tokens(limiter, "rpm") == 60
+
+
+def test_daily_quota_keeps_reserves_for_interactive_calls(limiter):
+    for _ in range(7):
+        limiter.acquire("llm", prio="batch")
+    with pytest.raises(QuotaExceededError):
+        limiter.acquire("llm", prio="batch")
+    limiter.acquire("llm", prio="prefetch")
+    with pytest.raises(QuotaExceededError):
+        limiter.acquire("llm", prio="prefetch")
+    limiter.acquire("llm", prio="interactive")
+    limiter.acquire("llm", prio="interactive")
+    with pytest.raises(QuotaExceededError):
+        limiter.acquire("llm", prio="interactive")
+
+
+def test_refused_calls_are_not_counted_against_the_day(limiter):
+    for _ in range(7):
+        limiter.acquire("llm", prio="batch")
+    for _ in range(5):
+        with pytest.raises(QuotaExceededError):
+            limiter.acquire("llm", prio="batch")
+    [key] = limiter.r.keys("ratelimit:llm:daily:*")
+    assert int(limiter.r.get(key)) == 7
+    for _ in range(3):
+        limiter.acquire("llm", prio="interactive")
+    assert limiter.metrics()["llm:batch"]["rejected"] == 5
+
+
+def test_local_fallback_keeps_the_same_limits():
+    limiter = RateLimiter({"llm": {"rpm": 60, "daily": 2}}, RESERVES,
+                          client=fakeredis.FakeRedis(decode_responses=True))
+    limiter._redis_failed()
+    limiter.acquire("llm")
+    limiter.acquire("llm")
+    with pytest.raises(QuotaExceededError):
+        limiter.acquire("llm")
+    limiter._adjust("llm", "rpm", 60, 5)
+    assert limiter._local._buckets["ratelimit:llm:rpm"][0] == 60
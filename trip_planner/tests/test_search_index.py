@@ -0,0 +1,59 @@
+# tests/test_search_index.py
+import re
+import time
+
+import numpy as np
+import pytest
+
+from db.search_index import SearchIndex, _fts_query
+
+RESULTS = [
+    {"url": "https://a.example/amber-fort", "title": "Amber Fort guide", "snippet": "Amber Fort opens at 8 am."},
+    {"url": "https://b.example/hotels", "title": "Best hotels in Jaipur", "snippet": "Heritage hotels near the fort."},
+    {"url": "https://c.example/food", "title": "Jaipur street food", "snippet": "Try kachori at Rawat."},
+]
+
+
+class WordEmbedder:
+    """Bag-of-words vectors: cosine is the share of words two texts have in common."""
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), 256), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in set(re.findall(r"\w+", text.lower())):
+                vectors[row, sum(map(ord, word)) % 256] += 1.0
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.db"), embedder=WordEmbedder())
+    index.add_results(RESULTS, query="jaipur", source="test", destination="Jaipur")
+    return index
+
+
+def test_query_leaves_out_stopwords_and_the_destination():
+    assert _fts_query('best hotels in Jaipur "near" OR fort', exclude="Jaipur") == '"hotels" OR "fort"'
+    assert _fts_query("Jaipur", exclude="Jaipur") == ""
+
+
+def test_results_carry_the_absolute_cosine(index):
+    results = index.search("street food", destination="Jaipur", k=3)
+    assert results[0]["url"] == "https://c.example/food"
+    assert results[0]["score"] == max(r["score"] for r in results)
+    assert 0 < results[0]["cosine"] <= 1
+    assert all(r["cosine"] < results[0]["cosine"] for r in results[1:])
+
+
+def test_destination_only_queries_do_not_match_everything_by_keywords(index):
+    unrelated = index.search("visa rules for Jaipur", destination="Jaipur", k=3)
+    assert all(r["cosine"] < 0.5 for r in unrelated)
+
+
+def test_other_destinations_and_old_results_are_left_out(index, tmp_path):
+    index.add_results([{"url": "https://d.example/goa", "title": "Goa street food", "snippet": "Fish thali."}],
+                      query="goa", source="test", destination="Goa")
+    assert {r["destination"] for r in index.search("street food", destination="Goa")} == {"Goa"}
+    index._conn().execute("UPDATE results SET fetched_at = ?", (time.time() - 90 * 86400,))
+    assert index.search("street food", max_age_days=30) == []
+    assert index.prune(max_age_days=30) == 4
@@ -0,0 +1,61 @@
+# tests/test_session_store.py
+import pytest
+
+pytest.importorskip("redis")
+session_store = pytest.importorskip("db.session_store")
+SessionMap = session_store.SessionMap
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return session_store.SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    return session_store.InMemorySessionStore()
+
+
+def outputs(store):
+    state = store.load("s1")
+    return state, SessionMap(state, "agent_outputs")
+
+
+def test_deleted_entries_are_removed_from_the_store(store):
+    state, m = outputs(store)
+    m["weather_advice"], m["hotel_recommendation"] = "Sunny.", "Try Haveli."
+    state.save()
+
+    state, m = outputs(store)
+    m.clear()
+    m["itinerary"] = "Day 1."
+    state.save()
+
+    assert dict(outputs(store)[1]) == {"itinerary": "Day 1."}
+    assert store.load_field("s1", "agent_outputs:weather_advice") is None
+    assert store.load_field("s1", "agent_outputs:hotel_recommendation") is None
+
+
+def test_deletion_survives_a_concurrent_save(store):
+    state, m = outputs(store)
+    m["weather_advice"] = "Sunny."
+    state.save()
+
+    first, second = outputs(store), outputs(store)
+    first[1]["itinerary"] = "Day 1."
+    first[0].save()
+    del second[1]["weather_advice"]
+    second[0].save()
+
+    assert dict(outputs(store)[1]) == {"itinerary": "Day 1."}
+    assert store.load_field("s1", "agent_outputs:weather_advice") is None
+
+
+def test_set_after_delete_keeps_the_value(store):
+    state, m = outputs(store)
+    m["weather_advice"] = "Sunny."
+    state.save()
+
+    state, m = outputs(store)
+    del m["weather_advice"]
+    m["weather_advice"] = "Rain."
+    state.save()
+
+    assert outputs(store)[1]["weather_advice"] == "Rain."
@@ -0,0 +1,117 @@
+# tests/test_single_flight.py
+import threading
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")  # lock release runs as a Lua script
+
+from runtime import single_flight as sf
+from runtime.deadline import DeadlineExceeded, deadline
+
+
+@pytest.fixture
+def flight(monkeypatch):
+    flight = sf.SingleFlight(client=fakeredis.FakeRedis())
+    monkeypatch.setattr(sf, "single_flight", flight)
+    return flight
+
+
+def slow(calls, seconds=0.2):
+    def fn(user_prompt, context, conversation=""):
+        calls.append((user_prompt, context, conversation))
+        time.sleep(seconds)
+        return f"answer {len(calls)}"
+    return fn
+
+
+def run_together(*callables):
+    results = [None] * len(callables)
+
+    def run(i, call):
+        try:
+            results[i] = call()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i, call)) for i, call in enumerate(callables)]
+    for i, t in enumerate(threads):
+        t.start()
+        if i == 0:
+            time.sleep(0.05)  # let the first caller lead
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_same_trip_and_conversation_share_one_run(flight):
+    calls = []
+    advice = sf.coalesced("weather_advice")(slow(calls))
+    ctx = {"destination": "Jaipur"}
+    results = run_together(lambda: advice("weather?", ctx, conversation="Recent turns:\n- hotels in Jaipur"),
+                           lambda: advice("Weather? ", ctx, conversation="recent turns:  - Hotels in jaipur"))
+    assert len(calls) == 1
+    assert results == ["answer 1", "answer 1"]
+
+
+def test_different_conversations_run_separately(flight):
+    calls = []
+    advice = sf.coalesced("weather_advice")(slow(calls))
+    ctx = {"destination": "Jaipur"}
+    run_together(lambda: advice("weather?", ctx, conversation="Recent turns:\n- hotels in Jaipur"),
+                 lambda: advice("weather?", ctx, conversation="Recent turns:\n- trains to Jaipur"))
+    assert len(calls) == 2
+
+
+def test_local_followers_get_the_leaders_result(flight):
+    calls = []
+    fn = slow(calls)
+    results = run_together(*[lambda: flight.do("k", fn, "weather?", {}) for _ in range(4)])
+    assert results == ["answer 1"] * 4
+    stats = flight.metrics()
+    assert (stats["executed"], stats["coalesced_local"]) == (1, 3)
+
+
+def test_follower_waits_no_longer_than_its_own_deadline(flight):
+    calls = []
+    fn = slow(calls, seconds=1.0)
+
+    def follower():
+        with deadline(0.1):
+            started = time.monotonic()
+            try:
+                flight.do("k", fn, "weather?", {})
+            finally:
+                follower.waited = time.monotonic() - started
+
+    results = run_together(lambda: flight.do("k", fn, "weather?", {}), follower)
+    assert results[0] == "answer 1"
+    assert isinstance(results[1], DeadlineExceeded)
+    assert follower.waited < 0.5
+    assert len(calls) == 1
+
+
+def test_follower_runs_the_call_when_the_leader_ran_out_of_time(flight):
+    calls = []
+
+    def fn(user_prompt, context):
+        calls.append(user_prompt)
+        time.sleep(0.1)
+        if len(calls) == 1:
+            raise DeadlineExceeded("leader's budget")
+        return "answer"
+
+    results = run_together(lambda: flight.do("k", fn, "weather?", {}), lambda: flight.do("k", fn, "weather?", {}))
+    assert isinstance(results[0], DeadlineExceeded)
+    assert results[1] == "answer"
+
+
+def test_followers_in_another_process_get_the_published_result():
+    server = fakeredis.FakeServer()
+    leader, follower = (sf.SingleFlight(client=fakeredis.FakeRedis(server=server)) for _ in range(2))
+    calls = []
+    fn = slow(calls)
+    results = run_together(lambda: leader.do("k", fn, "weather?", {}), lambda: follower.do("k", fn, "weather?", {}))
+    assert results == ["answer 1", "answer 1"]
+    assert follower.metrics()["coalesced_remote"] == 1
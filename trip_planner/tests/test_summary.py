@@ -0,0 +1,30 @@
+# tests/test_summary.py
+import pytest
+
+pytest.importorskip("crewai")  # runtime.summary loads model.py for token estimates
+
+from config.setting import SUMMARY_MAX_TOKENS
+from model import estimate_tokens
+from runtime.summary import fold_exchange, render_summary, trim_oldest
+
+
+def test_digest_trimming_keeps_whole_exchanges_without_stray_separators():
+    summary = None
+    for day in range(1, 31):
+        summary = fold_exchange(
+            summary, f"What about day {day} in Jaipur?",
+            f"On day {day} visit Amber Fort at 8 am. Lunch at LMB costs ₹600. Evening at Nahargarh for sunset.",
+            "itinerary", condense=lambda t, n: "")
+    digest = summary["digest"]
+    assert digest
+    assert "| |" not in digest and not digest.startswith("|")
+    assert all(part.startswith("(itinerary) User:") for part in digest.split(" | ")[1:])
+    assert "day 26" in digest  # the newest exchange that left the recent lines
+    assert estimate_tokens(render_summary(summary)) <= SUMMARY_MAX_TOKENS
+
+
+def test_trim_oldest_is_stable_when_repeated():
+    text = "(a) User: one. — Answer: Fine. | (b) User: two. — Answer: Sure. | (c) User: three. — Answer: Yes."
+    once = trim_oldest(text, 12)
+    assert trim_oldest(once, 12) == once
+    assert once.endswith("three. — Answer: Yes.")
@@ -0,0 +1,61 @@
+# tests/test_tool_guard.py
+import pytest
+
+pytest.importorskip("redis")  # tool keys are built with runtime.single_flight.coalesce_key
+
+from runtime import tool_guard
+from runtime.tool_guard import BUDGET_NOTE, REPEATED_NOTE, guarded, tool_run
+
+
+class WeatherTool:
+    name = "OpenWeather Forecast"
+
+    def __init__(self):
+        self.fetched = []
+
+    @guarded
+    def _run(self, city: str, days: int = 5) -> str:
+        self.fetched.append(city)
+        return f"{city}: sunny for {days} days"
+
+
+class Agent:
+    max_iter = 25
+
+
+def test_repeated_calls_are_answered_from_the_first_observation():
+    tool = WeatherTool()
+    with tool_run("weather_advisor") as run:
+        first = tool._run("Jaipur")
+        again = tool._run(" jaipur ", days=5)
+    assert tool.fetched == ["Jaipur"]
+    assert again == f"{REPEATED_NOTE}\n{first}"
+    assert (run.counts["executed"], run.counts["repeated"]) == (1, 1)
+
+
+def test_loops_are_cut_after_the_configured_repeats(monkeypatch):
+    monkeypatch.setattr(tool_guard, "TOOL_LOOP_REPEATS", 3)
+    tool = WeatherTool()
+    with tool_run("weather_advisor") as run:
+        answers = [tool._run(city) for city in ("Jaipur", "Goa") * 3]
+    assert tool.fetched == ["Jaipur", "Goa"]
+    assert "Do not call them again" in answers[-1] and answers[-1].startswith("Goa: sunny")
+    assert run.counts["loops_cut"] >= 1
+
+
+def test_calls_past_the_budget_are_refused(monkeypatch):
+    monkeypatch.setitem(tool_guard.AGENT_TOOL_BUDGETS, "weather_advisor", {"calls": 2, "iterations": 4})
+    tool, agent = WeatherTool(), Agent()
+    with tool_run("weather_advisor", agent) as run:
+        answers = [tool._run(city) for city in ("Jaipur", "Goa", "Leh")]
+    assert agent.max_iter == 4
+    assert tool.fetched == ["Jaipur", "Goa"]
+    assert answers[-1] == BUDGET_NOTE.format(budget=2)
+    assert run.report()["over_budget"] == 1
+
+
+def test_calls_outside_a_run_go_straight_through():
+    tool = WeatherTool()
+    tool._run("Jaipur")
+    tool._run("Jaipur")
+    assert tool.fetched == ["Jaipur", "Jaipur"]
@@ -0,0 +1,187 @@
+# tools/batch_search_tool.py
+"""
+Several web searches in one tool call.
+
+An agent that needs five searches otherwise spends five reasoning steps on
+them, one after another. This tool takes all the queries at once, runs them
+concurrently over the pooled Serper and DuckDuckGo clients and returns one
+merged list: results are ranked by reciprocal rank fusion over every
+(query, engine) result list, and a page found by several queries or engines
+appears once, crediting each of them. Every query keeps at least its best
+result in the list.
+
+Engine policies:
+- auto: the local search index when it covers the query, else Google
+  (Serper), else DuckDuckGo if Google fails;
+- google / duckduckgo: that engine only;
+- both: Google and DuckDuckGo for every query.
+"""
+import contextvars
+import re
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple, Type
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from config.setting import (
+    BATCH_SEARCH_MAX_QUERIES,
+    BATCH_SEARCH_MAX_RESULTS,
+    BATCH_SEARCH_RESULTS_PER_QUERY,
+    BATCH_SEARCH_WORKERS,
+)
+from runtime.deadline import DeadlineExceeded, time_left
+from runtime.profiling import traced
+from runtime.tool_guard import guarded
+from tools.duckduckgo_tool import search_duckduckgo_items
+from tools.google_serper_tool import _serper_search
+from tools.knowledge_search_tool import cached_results
+
+ENGINES = ("auto", "google", "duckduckgo", "both")
+# Reciprocal rank fusion constant: a result at rank r in one list scores 1 / (RRF_K + r)
+RRF_K = 60
+_TRACKING_PARAM = re.compile(r"^(?:utm_\w+|gclid|fbclid|ref|ref_src)$", re.I)
+
+# Shared by all agents in the process; searches are network-bound
+_pool = ThreadPoolExecutor(max_workers=BATCH_SEARCH_WORKERS, thread_name_prefix="search")
+
+
+def normalize_url(url: str) -> str:
+    """Key under which the same page found through different links counts once."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not _TRACKING_PARAM.match(k)])
+    return f"{host}{parts.path.rstrip('/')}" + (f"?{query}" if query else "")
+
+
+def _web_query(query: str, destination: Optional[str]) -> str:
+    return f"{query} {destination}" if destination and destination.lower() not in query.lower() else query
+
+
+def search_engine(query: str, engine: str, destination: Optional[str], k: int) -> Tuple[str, List[dict]]:
+    """(source label, results) for one query on one engine ("auto" picks the source)."""
+    if engine == "auto":
+        cached = cached_results(query, destination, k)
+        if cached is not None:
+            return "cached", cached
+        try:
+            return "google", _serper_search.search_items(_web_query(query, destination), num_results=k,
+                                                         destination=destination)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"Serper search failed, trying DuckDuckGo: {e}")
+            engine = "duckduckgo"
+    if engine == "google":
+        return "google", _serper_search.search_items(_web_query(query, destination), num_results=k,
+                                                     destination=destination)
+    return "duckduckgo", search_duckduckgo_items(_web_query(query, destination), max_results=k,
+                                                 destination=destination)
+
+
+def merge_results(lists: List[Tuple[int, str, List[dict]]], limit: int) -> List[dict]:
+    """
+    Fuse (query number, source, results) lists into one ranking, one entry per page. Pages
+    found by several lists rank first; each query's best result is kept within `limit`.
+    """
+    merged: Dict[str, dict] = {}
+    best: Dict[int, str] = {}  # query number -> page key of its top result
+    for number, source, items in lists:
+        for rank, item in enumerate(items):
+            if not item.get("url"):
+                continue
+            key = normalize_url(item["url"])
+            entry = merged.setdefault(key, {"title": item.get("title"), "url": item["url"], "snippet": "",
+                                            "score": 0.0, "queries": set(), "sources": set()})
+            entry["score"] += 1 / (RRF_K + rank + 1)
+            entry["queries"].add(number)
+            entry["sources"].add(source)
+            if len(item.get("snippet") or "") > len(entry["snippet"]):
+                entry["snippet"] = item["snippet"]
+            best.setdefault(number, key)
+    ranked = sorted(merged, key=lambda k: merged[k]["score"], reverse=True)
+    keep = list(dict.fromkeys(best.values()))[:limit]
+    for key in ranked:
+        if len(keep) >= limit:
+            break
+        if key not in keep:
+            keep.append(key)
+    return sorted((merged[key] for key in keep), key=lambda e: e["score"], reverse=True)
+
+
+def batch_search(queries: List[str], engine: str = "auto", destination: Optional[str] = None,
+                 k: int = BATCH_SEARCH_RESULTS_PER_QUERY, limit: int = BATCH_SEARCH_MAX_RESULTS) -> str:
+    queries = list(dict.fromkeys(" ".join(str(q).split()) for q in queries if str(q).strip()))
+    if not queries:
+        return "No queries given."
+    dropped = queries[BATCH_SEARCH_MAX_QUERIES:]
+    queries = queries[:BATCH_SEARCH_MAX_QUERIES]
+    engines = ("google", "duckduckgo") if engine == "both" else (engine if engine in ENGINES else "auto",)
+
+    # Each search carries the caller's context (deadline, rate-limit priority and the like)
+    futures = {
+        _pool.submit(contextvars.copy_context().run, search_engine, query, e, destination, k): (number, e)
+        for number, query in enumerate(queries, 1) for e in engines
+    }
+    done, _ = wait(futures, timeout=time_left())
+    lists, failures = [], []
+    for future, (number, e) in futures.items():
+        if future not in done:
+            future.cancel()
+            failures.append(f"{number} ({e}): not finished in time")
+            continue
+        try:
+            source, items = future.result()
+        except Exception as ex:
+            failures.append(f"{number} ({e}): {type(ex).__name__}: {ex}")
+            continue
+        lists.append((number, source, items))
+
+    left = time_left()
+    if not lists and left is not None and left <= 0:
+        raise DeadlineExceeded("Time budget exhausted during batch search")
+    results = merge_results(lists, limit)
+    lines = ["Queries: " + "; ".join(f"{n}. {q}" for n, q in enumerate(queries, 1))]
+    if results:
+        lines.append(f"{len(results)} results, best first (q = queries that found it):")
+        for r in results:
+            found = ",".join(str(n) for n in sorted(r["queries"]))
+            lines.append(f"- {r['title'] or 'No title'} ({r['url']}) [q{found}; {'+'.join(sorted(r['sources']))}]"
+                         f"\n  {r['snippet'] or 'No snippet available'}")
+    else:
+        lines.append("No results found.")
+    if failures:
+        lines.append("Failed: " + "; ".join(failures))
+    if dropped:
+        lines.append(f"Not searched (over {BATCH_SEARCH_MAX_QUERIES} queries): " + "; ".join(dropped))
+    return "\n".join(lines)
+
+
+class BatchSearchInput(BaseModel):
+    """Input schema for the batch web search."""
+    queries: List[str] = Field(..., description=f"Up to {BATCH_SEARCH_MAX_QUERIES} search queries, run at the same time")
+    engine: str = Field("auto", description="'auto' (cached results, else Google), 'google', "
+                                            "'duckduckgo' (blogs, forums, hidden gems) or 'both'")
+    destination: Optional[str] = Field(None, description="City or region the queries are about, e.g. 'Jaipur'")
+
+
+class BatchSearchTool(BaseTool):
+    name: str = "Batch Web Search"
+    description: str = (
+        "Run several web searches in one call and get one merged, de-duplicated list of results with "
+        "sources. Use this instead of separate searches whenever you need more than one query."
+    )
+    args_schema: Type[BaseModel] = BatchSearchInput
+
+    @guarded
+    @traced("tool:batch_search")
+    def _run(self, queries: List[str], engine: str = "auto", destination: Optional[str] = None) -> str:
+        if isinstance(queries, str):
+            queries = re.split(r"[\n;]+", queries)
+        return batch_search(queries, engine=engine, destination=destination)
+
+
+if __name__ == "__main__":
+    tool_instance = BatchSearchTool()
+    print(tool_instance._run(["famous forts and palaces", "best street food", "hidden gems"], destination="Jaipur"))
@@ -0,0 +1,86 @@
+# tools/climatology_tool.py
+from datetime import date, datetime
+from typing import Optional, Tuple, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from config.setting import CLIMATOLOGY_MAX_KM
+from db.climatology import get_climatology, months_between
+from db.forecast_cache import forecast_cache
+from db.knowledge_packs import load_pack
+from runtime.deadline import DeadlineExceeded
+from runtime.profiling import traced
+from runtime.rate_limiter import QuotaExceededError
+from runtime.tool_guard import guarded
+from tools.ors_tool import get_coordinates
+
+
+class ClimatologyInput(BaseModel):
+    city: str = Field(..., description="City name, e.g. 'Jaipur' or 'Paris,FR'")
+    start_date: str = Field(..., description="First day of the trip, YYYY-MM-DD")
+    end_date: Optional[str] = Field(None, description="Last day of the trip, YYYY-MM-DD (defaults to start_date)")
+
+
+def parse_date(value: Optional[str]) -> Optional[date]:
+    try:
+        return datetime.strptime(str(value).strip(), "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def locate(city: str) -> Optional[Tuple[float, float]]:
+    """Coordinates from what we already know (forecast aliases, knowledge packs), else geocoding."""
+    loc = forecast_cache.location(city)
+    if loc:
+        return loc["lat"], loc["lon"]
+    coords = (load_pack(city.split(",")[0].strip()) or {}).get("coordinates") or {}
+    if coords.get("lat") is not None:
+        return coords["lat"], coords["lon"]
+    try:
+        return get_coordinates(city)
+    except (DeadlineExceeded, QuotaExceededError):
+        raise
+    except Exception as e:
+        print(f"Could not locate {city} for climate normals: {e}")
+        return None
+
+
+def climate_normals(city: str, start_date: str, end_date: Optional[str] = None) -> str:
+    """Monthly normals for the months of the trip at the nearest station, or "" if there are none."""
+    climatology = get_climatology()
+    start = parse_date(start_date)
+    end = parse_date(end_date) or start
+    if start is None or not climatology.available():
+        return ""
+
+    station, distance = climatology.station_by_name(city), 0.0
+    if station is None:
+        coords = locate(city)
+        nearest = climatology.nearest(*coords) if coords else None
+        if nearest is None or nearest[1] > CLIMATOLOGY_MAX_KM:
+            return ""
+        station, distance = nearest
+
+    where = climatology.station_name(station)
+    if distance >= 1:
+        where += f", {distance:.0f} km away"
+    lines = [f"Climate normals ({climatology.meta.get('period', 'multi-year')} averages, station {where}):"]
+    for m in climatology.month_normals(station, months_between(start, max(start, end))):
+        lines.append(f"- {m['month']}: highs around {m['tmax_c']:.0f}°C, lows around {m['tmin_c']:.0f}°C, "
+                     f"{m['precip_mm']:.0f} mm of rain over about {m['rain_days']:.0f} days")
+    return "\n".join(lines)
+
+
+class ClimatologyTool(BaseTool):
+    name: str = "Climate Normals"
+    description: str = (
+        "Typical monthly weather (average highs/lows, rainfall, rainy days) for a city and date range. "
+        "Use for dates beyond the 5-day forecast range."
+    )
+    args_schema: Type[BaseModel] = ClimatologyInput
+
+    @guarded
+    @traced("tool:climatology")
+    def _run(self, city: str, start_date: str, end_date: Optional[str] = None) -> str:
+        return climate_normals(city, start_date, end_date) or f"No climate normals available for {city}."
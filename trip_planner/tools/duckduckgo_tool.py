@@ -1,16 +1,46 @@
 # tools/duckduckgo_tool.py
 
+import threading
 from ddgs import DDGS
 from crewai.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
+from db.search_index import index_results
+from runtime.deadline import request_timeout
+from runtime.profiling import traced
+from runtime.rate_limiter import throttle
+from runtime.tool_guard import guarded
+
+DDGS_TIMEOUT = 10
+
+# One DDGS client per thread, kept across searches so its HTTP connections are reused
+_clients = threading.local()
+
+
+def _ddgs(timeout: float) -> DDGS:
+    if timeout < DDGS_TIMEOUT:
+        # Less time left in the turn than the pooled client's timeout: a one-off client
+        return DDGS(timeout=timeout)
+    client = getattr(_clients, "ddgs", None)
+    if client is None:
+        client = _clients.ddgs = DDGS(timeout=DDGS_TIMEOUT)
+    return client
+
+
+def search_duckduckgo_items(query: str, max_results: int = 10, destination: str = None):
+    """Results as dicts (title, url, snippet); every fetch is added to the local search index."""
+    throttle("duckduckgo")
+    ddg = _ddgs(request_timeout(DDGS_TIMEOUT))
+    items = [{"title": r.get("title"), "url": r.get("href"), "snippet": r.get("body")}
+             for r in ddg.text(query, max_results=max_results)]
+    index_results(items, query=query, source="duckduckgo", destination=destination)
+    return items
 
 def search_duckduckgo(query: str, max_results: int = 10):
     """Original search function"""
     results = []
-    with DDGS() as ddg:
-        for r in ddg.text(query, max_results=max_results):
-            results.append(f"- {r.get('title')} ({r.get('href')})\n  {r.get('body')}")
+    for r in search_duckduckgo_items(query, max_results=max_results):
+        results.append(f"- {r['title']} ({r['url']})\n  {r['snippet']}")
     return "\n".join(results)
 
 # Input schema for the tool
@@ -27,6 +57,8 @@ class DuckDuckGoSearchTool(BaseTool):
     )
     args_schema: Type[BaseModel] = DuckDuckGoSearchInput
 
+    @guarded
+    @traced("tool:duckduckgo")
     def _run(self, query: str) -> str:
         return search_duckduckgo(query, max_results=5)
 
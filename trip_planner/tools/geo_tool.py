@@ -0,0 +1,85 @@
+# tools/geo_tool.py
+from typing import List, Optional, Tuple, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from config.setting import GEO_DEFAULT_RADIUS_KM, GEO_MAX_RADIUS_KM
+from db.geo_index import TIERS, get_geo_index
+from db.knowledge_packs import load_pack
+from runtime.deadline import DeadlineExceeded
+from runtime.profiling import traced
+from runtime.rate_limiter import QuotaExceededError
+from runtime.tool_guard import guarded
+from tools.ors_tool import get_coordinates
+
+
+class NearbyHotelsInput(BaseModel):
+    destination: str = Field(..., description="City, e.g. 'Jaipur'")
+    attractions: List[str] = Field(..., description="Attractions or neighbourhoods to stay close to")
+    radius_km: float = Field(GEO_DEFAULT_RADIUS_KM, description="Maximum distance from any of them, in km")
+    tier: Optional[str] = Field(None, description="Only this price band: budget, mid or luxury")
+    sort: str = Field("distance", description="'distance' (closest first) or 'price' (cheapest band first)")
+    limit: int = Field(8, description="Maximum number of hotels")
+
+
+def locate_attraction(name: str, destination: str) -> Optional[Tuple[float, float]]:
+    """Coordinates from the geo index or the destination's pack, else geocoded once and indexed."""
+    index = get_geo_index()
+    found = index.locate(name, destination)
+    if found:
+        return found
+    for attraction in (load_pack(destination) or {}).get("attractions", []):
+        if attraction.get("lat") is not None and attraction["name"].lower() == name.lower():
+            return attraction["lat"], attraction["lon"]
+    try:
+        lat, lon = get_coordinates(f"{name}, {destination}")
+    except (DeadlineExceeded, QuotaExceededError):
+        raise
+    except Exception as e:
+        print(f"Could not locate {name}: {e}")
+        return None
+    index.add_places([{"name": name, "lat": lat, "lon": lon}], "attraction", destination, source="geocode")
+    return lat, lon
+
+
+def nearby_hotels(destination: str, attractions: List[str], radius_km: float = GEO_DEFAULT_RADIUS_KM,
+                  tier: Optional[str] = None, sort: str = "distance", limit: int = 8) -> str:
+    index = get_geo_index()
+    if not index.count("hotel"):
+        return "No geocoded hotels indexed yet; search for hotels instead."
+    located = [(name, locate_attraction(name, destination)) for name in attractions]
+    points = [(name, coords) for name, coords in located if coords]
+    if not points:
+        return f"Could not locate {', '.join(attractions)} in {destination}."
+    radius_km = min(max(radius_km, 0.1), GEO_MAX_RADIUS_KM)
+    tiers = [tier] if tier in TIERS else None
+    hotels = index.hotels_near([coords for _, coords in points], radius_km, tiers=tiers, sort=sort, limit=limit)
+    if not hotels:
+        return (f"No indexed hotels within {radius_km:g} km of {', '.join(name for name, _ in points)}; "
+                "search for hotels instead or widen the radius.")
+    lines = [f"Hotels within {radius_km:g} km (straight-line distance):"]
+    for h in hotels:
+        price = (f", {h['currency'] or 'INR'} {h['price_per_night']:,.0f}/night"
+                 if h["price_per_night"] is not None else "")
+        lines.append(f"- {h['name']} ({h['tier'] or 'tier unknown'}{price}): "
+                     f"{h['distance_km']} km from {points[h['near']][0]}")
+    missing = [name for name, coords in located if not coords]
+    if missing:
+        lines.append(f"Not located: {', '.join(missing)}")
+    return "\n".join(lines)
+
+
+class NearbyHotelsTool(BaseTool):
+    name: str = "Nearby Hotels"
+    description: str = (
+        "Hotels within a distance of given attractions or neighbourhoods, with price band and distance, "
+        "from the local geo index (no web search). Sort by 'distance' or 'price'."
+    )
+    args_schema: Type[BaseModel] = NearbyHotelsInput
+
+    @guarded
+    @traced("tool:nearby_hotels")
+    def _run(self, destination: str, attractions: List[str], radius_km: float = GEO_DEFAULT_RADIUS_KM,
+             tier: Optional[str] = None, sort: str = "distance", limit: int = 8) -> str:
+        return nearby_hotels(destination, attractions, radius_km, tier, sort, limit)
@@ -2,9 +2,16 @@
 
 import os
 import requests
+from requests.adapters import HTTPAdapter
 from crewai.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
+from config.setting import SEARCH_HTTP_POOL_SIZE
+from db.search_index import index_results
+from runtime.deadline import DeadlineExceeded, request_timeout
+from runtime.profiling import traced
+from runtime.rate_limiter import QuotaExceededError, throttle
+from runtime.tool_guard import guarded
 
 class GoogleSerperSearch:
     """
@@ -18,42 +25,56 @@ class GoogleSerperSearch:
             raise ValueError("❌ GOOGLE_SURPER_API not set. Please set it in your environment variables.")
 
         self.endpoint = "https://google.serper.dev/search"
+        # Shared by all threads: keep-alive connections instead of a new TLS handshake per query
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=SEARCH_HTTP_POOL_SIZE))
 
-    def search(self, query: str, num_results: int = 10):
+    def search_items(self, query: str, num_results: int = 10, destination: str = None):
         """
-        Perform a Google search via Serper API
+        Organic results as dicts (title, url, snippet); every fetch is added to the
+        local search index. Raises on HTTP or API errors.
         """
         headers = {
             "X-API-KEY": self.api_key,
             "Content-Type": "application/json"
         }
-
         payload = {
             "q": query,
             "num": num_results
         }
+        throttle("serper")
+        response = self.session.post(self.endpoint, headers=headers, json=payload, timeout=request_timeout(30))
+        if response.status_code != 200:
+            raise requests.exceptions.HTTPError(f"Serper API error: {response.status_code}, {response.text}")
+        items = [
+            {"title": item.get("title"), "url": item.get("link"), "snippet": item.get("snippet")}
+            for item in response.json().get("organic", [])[:num_results]
+        ]
+        index_results(items, query=query, source="serper", destination=destination)
+        return items
 
+    def search(self, query: str, num_results: int = 10):
+        """
+        Perform a Google search via Serper API
+        """
         try:
-            response = requests.post(self.endpoint, headers=headers, json=payload, timeout=30)
-            
-            if response.status_code != 200:
-                return f"Serper API error: {response.status_code}, {response.text}"
-
-            data = response.json()
-            results = []
-
-            # Format results for better readability
-            for item in data.get("organic", [])[:num_results]:
-                result_text = f"- {item.get('title', 'No title')} ({item.get('link', 'No link')})\n  {item.get('snippet', 'No snippet available')}"
-                results.append(result_text)
-
-            return "\n\n".join(results) if results else "No results found."
-            
+            items = self.search_items(query, num_results=num_results)
+        except (DeadlineExceeded, QuotaExceededError):
+            raise
+        except requests.exceptions.HTTPError as e:
+            return str(e)
         except requests.exceptions.RequestException as e:
             return f"Request failed: {str(e)}"
         except Exception as e:
             return f"Error occurred: {str(e)}"
 
+        # Format results for better readability
+        results = [
+            f"- {item['title'] or 'No title'} ({item['url'] or 'No link'})\n  {item['snippet'] or 'No snippet available'}"
+            for item in items
+        ]
+        return "\n\n".join(results) if results else "No results found."
+
 _serper_search = GoogleSerperSearch()
 
 # Input schema for the tool
@@ -70,6 +91,8 @@ class GoogleSerperSearchTool(BaseTool):
     )
     args_schema: Type[BaseModel] = GoogleSerperSearchInput
 
+    @guarded
+    @traced("tool:serper")
     def _run(self, query: str) -> str:
         query = str(query)
         return _serper_search.search(query, num_results=5)
@@ -4,6 +4,8 @@ from datetime import datetime
 from typing import Type
 from pydantic import BaseModel, Field
 from crewai.tools import BaseTool
+from runtime.profiling import traced
+from runtime.tool_guard import guarded
 
 
 # Input schema for the hotel booking tool
@@ -23,6 +25,8 @@ class HotelBookingTool(BaseTool):
     )
     args_schema: Type[BaseModel] = HotelBookingInput
 
+    @guarded
+    @traced("tool:hotel_booking")
     def _run(self, hotel_name: str, check_in_date: str, check_out_date: str, num_guests: int) -> str:
         try:
             # Validate dates
@@ -0,0 +1,96 @@
+# tools/knowledge_search_tool.py
+
+import threading
+from typing import List, Optional, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from config.setting import SEARCH_INDEX_MIN_HITS, SEARCH_INDEX_MIN_COSINE
+from db.search_index import get_search_index
+from runtime.deadline import DeadlineExceeded
+from runtime.profiling import traced
+from runtime.tool_guard import guarded
+from tools.duckduckgo_tool import search_duckduckgo_items
+from tools.google_serper_tool import _serper_search
+
+_stats_lock = threading.Lock()
+_stats = {"queries": 0, "local": 0, "web": 0}
+
+
+def search_stats():
+    """How many knowledge searches were answered from the local index vs. the web."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["local_rate"] = stats["local"] / stats["queries"] if stats["queries"] else 0.0
+    return stats
+
+
+def _count(name: str):
+    with _stats_lock:
+        _stats["queries"] += 1
+        _stats[name] += 1
+
+
+def _format(items, origin: str) -> str:
+    lines = [f"- {i.get('title') or 'No title'} ({i.get('url')})\n  {i.get('snippet') or ''}" for i in items]
+    return f"Results ({origin}):\n" + "\n\n".join(lines) if lines else "No results found."
+
+
+def cached_results(query: str, destination: Optional[str] = None, k: int = 5) -> Optional[List[dict]]:
+    """Hits from the local index if enough of them are good enough to answer `query`, else None."""
+    try:
+        hits = get_search_index().search(query, destination=destination, k=k)
+    except Exception as e:
+        print(f"Error searching local index: {e}")
+        hits = []
+    # An absolute match signal: the hybrid score is relative to this query's best keyword hit
+    good = [h for h in hits if h["cosine"] >= SEARCH_INDEX_MIN_COSINE]
+    return good if len(good) >= min(SEARCH_INDEX_MIN_HITS, k) else None
+
+
+def knowledge_search(query: str, destination: Optional[str] = None, k: int = 5) -> str:
+    """Answer from the local index when recall is good enough, otherwise search the web."""
+    good = cached_results(query, destination, k)
+    if good is not None:
+        _count("local")
+        return _format(good, "cached")
+
+    _count("web")
+    web_query = f"{query} {destination}" if destination and destination.lower() not in query.lower() else query
+    try:
+        # Tagged with the destination so later lookups for it match these results
+        items = _serper_search.search_items(web_query, num_results=k, destination=destination)
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        print(f"Serper search failed, trying DuckDuckGo: {e}")
+        items = search_duckduckgo_items(web_query, max_results=k, destination=destination)
+    return _format(items, "web")
+
+
+class KnowledgeSearchInput(BaseModel):
+    """Input schema for the travel knowledge search."""
+    query: str = Field(..., description="What to look up, e.g. 'best forts and palaces'")
+    destination: Optional[str] = Field(None, description="City or region the query is about, e.g. 'Jaipur'")
+
+
+class KnowledgeSearchTool(BaseTool):
+    name: str = "Travel Knowledge Search"
+    description: str = (
+        "Search travel information (attractions, hotels, tips) with sources. Answers from previously "
+        "fetched results when they cover the question and searches Google otherwise. "
+        "Use this first for popular or official information."
+    )
+    args_schema: Type[BaseModel] = KnowledgeSearchInput
+
+    @guarded
+    @traced("tool:knowledge_search")
+    def _run(self, query: str, destination: Optional[str] = None) -> str:
+        return knowledge_search(str(query), destination=destination)
+
+
+if __name__ == "__main__":
+    tool_instance = KnowledgeSearchTool()
+    print(tool_instance._run("famous forts and palaces", destination="Jaipur"))
+    print(search_stats())
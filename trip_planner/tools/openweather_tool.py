@@ -7,6 +7,13 @@ from typing import Type
 from pydantic import BaseModel, Field
 import os
 
+from db.forecast_cache import forecast_cache
+from runtime.deadline import request_timeout
+from runtime.profiling import traced
+from runtime.rate_limiter import throttle
+from runtime.single_flight import coalesced
+from runtime.tool_guard import guarded
+
 # Load environment variables
 load_dotenv()
 
@@ -15,24 +22,33 @@ class OpenWeatherInput(BaseModel):
     city: str = Field(..., description="City name with country code, e.g., 'Paris,FR'")
     days: int = Field(5, description="Number of forecast days (max 5 for free API)")
 
-# Helper function to fetch weather
-def fetch_weather_forecast(city: str, days: int = 5):
+# Raw 5-day / 3-hour forecast, by city name or coordinates
+@coalesced("openweather_forecast")
+def fetch_forecast_payload(city: str = None, lat: float = None, lon: float = None) -> dict:
     api_key = os.getenv("OPEN_WEATHER_API_KEY")
     if not api_key:
         raise ValueError("OPEN_WEATHER_API_KEY not set in .env file")
 
     url = "https://api.openweathermap.org/data/2.5/forecast"
     params = {
-        "q": city,
         "appid": api_key,
         "units": "metric"
     }
+    if lat is not None and lon is not None:
+        params.update(lat=lat, lon=lon)
+    else:
+        params["q"] = city
 
-    response = requests.get(url, params=params)
+    throttle("openweather")
+    response = requests.get(url, params=params, timeout=request_timeout(30))
     if response.status_code != 200:
         raise Exception(f"OpenWeather API error: {response.status_code} - {response.text}")
+    return response.json()
 
-    data = response.json()
+# Helper function to fetch weather
+def fetch_weather_forecast(city: str, days: int = 5):
+    # One cached payload per location and 3-hour issuance serves every `days` value
+    data = forecast_cache.forecast(city, fetch_forecast_payload)
     daily_data = defaultdict(list)
 
     # Group forecasts by date
@@ -56,6 +72,8 @@ class OpenWeatherTool(BaseTool):
     description: str = "Provides a multi-day weather forecast for a given city using OpenWeather API."
     args_schema: Type[BaseModel] = OpenWeatherInput
 
+    @guarded
+    @traced("tool:openweather")
     def _run(self, city: str, days: int = 5) -> str:
         return fetch_weather_forecast(city, days)
 
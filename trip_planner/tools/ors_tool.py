@@ -5,6 +5,11 @@ from typing import Type
 from pydantic import BaseModel, Field
 from crewai.tools import BaseTool
 
+from runtime.deadline import Cancelled, DeadlineExceeded, request_timeout
+from runtime.profiling import traced
+from runtime.rate_limiter import QuotaExceededError, throttle
+from runtime.tool_guard import guarded
+
 # Load environment variables
 load_dotenv()
 
@@ -29,7 +34,8 @@ def get_route_summary(start_lat, start_lon, end_lat, end_lon, mode="driving-car"
     }
 
     try:
-        response = requests.post(url, json=body, headers=headers, timeout=10)
+        throttle("ors")
+        response = requests.post(url, json=body, headers=headers, timeout=request_timeout(10))
         response.raise_for_status()
         data = response.json()
     except requests.exceptions.RequestException as e:
@@ -76,7 +82,8 @@ def get_coordinates(location: str):
     }
     
     try:
-        response = requests.get(geocode_url, params=params, timeout=10)
+        throttle("ors_geocode")
+        response = requests.get(geocode_url, params=params, timeout=request_timeout(10))
         response.raise_for_status()
         data = response.json()
         
@@ -85,6 +92,8 @@ def get_coordinates(location: str):
         
         coordinates = data["features"][0]["geometry"]["coordinates"]
         return coordinates[1], coordinates[0]  # lat, lon
+    except (DeadlineExceeded, Cancelled, QuotaExceededError):
+        raise
     except Exception as e:
         raise Exception(f"Failed to geocode '{location}': {e}")
 
@@ -99,6 +108,8 @@ class ORSLocationTool(BaseTool):
     )
     args_schema: Type[BaseModel] = ORSLocationInput
 
+    @guarded
+    @traced("tool:ors_location_route")
     def _run(self, start_location: str, end_location: str, mode: str = "driving-car") -> str:
         """
         CrewAI tool interface to call ORS API with location names.
@@ -117,6 +128,8 @@ class ORSLocationTool(BaseTool):
                 f"Distance: {summary['distance_km']} km\n"
                 f"Duration: {summary['duration_min']} minutes"
             )
+        except (DeadlineExceeded, Cancelled, QuotaExceededError):
+            raise
         except Exception as e:
             return f"Error getting route information: {str(e)}"
 
@@ -138,6 +151,8 @@ class ORSTool(BaseTool):
     )
     args_schema: Type[BaseModel] = ORSSearchInput
 
+    @guarded
+    @traced("tool:ors_route")
     def _run(self, start_lat: float, start_lon: float, end_lat: float, end_lon: float, mode: str = "driving-car") -> str:
         """
         CrewAI tool interface to call ORS API.
@@ -145,6 +160,8 @@ class ORSTool(BaseTool):
         try:
             summary = get_route_summary(start_lat, start_lon, end_lat, end_lon, mode)
             return f"Mode: {summary['mode']}\nDistance: {summary['distance_km']} km\nDuration: {summary['duration_min']} minutes"
+        except (DeadlineExceeded, Cancelled, QuotaExceededError):
+            raise
         except Exception as e:
             return f"Error getting route information: {str(e)}"
 
@@ -162,5 +179,7 @@ if __name__ == "__main__":
         )
         print("Result:")
         print(result)
+    except (DeadlineExceeded, Cancelled, QuotaExceededError):
+        raise
     except Exception as e:
         print(f"Error: {e}")
\ No newline at end of file
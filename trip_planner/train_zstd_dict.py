@@ -0,0 +1,116 @@
+# train_zstd_dict.py
+"""
+Train the zstd dictionary used to compress stored memories and session fields
+(see db/codec.py).
+
+Samples are the values we actually store: conversation memories and session
+fields (agent outputs, history) read back from Redis, plus the knowledge
+packs on disk. The new dictionary is written to COMPRESSION_DICT_DIR and made
+CURRENT; earlier ones are kept so values compressed with them stay readable.
+Running processes pick it up on restart.
+
+    python train_zstd_dict.py --max-samples 20000 --size 112640
+"""
+import argparse
+import glob
+import os
+import random
+import time
+from typing import List
+
+import redis
+import zstandard as zstd
+
+from config.setting import (
+    COMPRESSION_DICT_DIR,
+    COMPRESSION_LEVEL,
+    KNOWLEDGE_PACK_DIR,
+    REDIS_DB,
+    REDIS_HOST,
+    REDIS_PORT,
+)
+from db.codec import CURRENT_FILE, Codec, codec, dict_filename
+
+
+def redis_samples(limit: int) -> List[bytes]:
+    """Stored memories and session fields, decoded to the JSON the codec sees."""
+    r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
+    samples = []
+    try:
+        for key in r.scan_iter(match="*:memories", count=500):
+            for doc_id in r.lrange(key, 0, -1):
+                raw = r.get(doc_id)
+                if raw:
+                    samples.append(raw)
+            if len(samples) >= limit:
+                break
+        for key in r.scan_iter(match="session:*", count=500):
+            for field, raw in r.hgetall(key).items():
+                if field.startswith(b"f:"):
+                    samples.append(raw)
+            if len(samples) >= limit:
+                break
+    except redis.RedisError as e:
+        print(f"Redis samples unavailable: {e}")
+    decoded = []
+    for raw in samples:
+        try:
+            decoded.append(codec.decode(raw))
+        except ValueError:
+            continue
+    return decoded
+
+
+def pack_samples() -> List[bytes]:
+    samples = []
+    for path in glob.glob(os.path.join(KNOWLEDGE_PACK_DIR, "*.json")):
+        with open(path, "rb") as f:
+            samples.append(f.read())
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the zstd dictionary for stored travel text.")
+    parser.add_argument("--max-samples", type=int, default=20000)
+    parser.add_argument("--size", type=int, default=112640, help="Dictionary size in bytes")
+    parser.add_argument("--holdout", type=float, default=0.1, help="Share of samples kept out to measure the ratio")
+    args = parser.parse_args()
+
+    samples = [s for s in redis_samples(args.max_samples) + pack_samples() if s]
+    random.Random(0).shuffle(samples)
+    samples = samples[:args.max_samples]
+    split = int(len(samples) * (1 - args.holdout))
+    train, holdout = samples[:split], samples[split:] or samples
+    print(f"{len(samples)} samples, {sum(map(len, samples)) / 1e6:.1f} MB")
+
+    started = time.perf_counter()
+    try:
+        dictionary = zstd.train_dictionary(args.size, train, level=COMPRESSION_LEVEL)
+    except zstd.ZstdError as e:
+        print(f"Training failed ({e}); collect more samples and retry")
+        return
+    print(f"Trained dictionary {dictionary.dict_id()} ({len(dictionary.as_bytes())} bytes) "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    plain = sum(map(len, holdout))
+    for label, d in (("no dictionary", None), ("new dictionary", dictionary)):
+        trial = Codec(dict_dir=None, min_bytes=0)
+        trial.use(d)
+        stored = sum(len(trial.encode(s)) for s in holdout)
+        print(f"  {label:<15} held-out ratio {plain / stored:.2f}x")
+
+    os.makedirs(COMPRESSION_DICT_DIR, exist_ok=True)
+    name = dict_filename(dictionary.dict_id())
+    path = os.path.join(COMPRESSION_DICT_DIR, name)
+    with open(path + ".tmp", "wb") as f:
+        f.write(dictionary.as_bytes())
+    os.replace(path + ".tmp", path)
+    current = os.path.join(COMPRESSION_DICT_DIR, CURRENT_FILE)
+    with open(current + ".tmp", "w") as f:
+        f.write(name)
+    os.replace(current + ".tmp", current)
+    print(f"Saved {path} as {CURRENT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
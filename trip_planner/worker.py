@@ -0,0 +1,66 @@
+# worker.py
+"""
+Agent worker: runs the agent jobs web processes put on the job queue
+(runtime/job_queue.py), so crews scale across cores and machines separately
+from the front end. Every worker process joins the same consumer group and
+runs up to --concurrency jobs at a time; start as many processes, on as many
+hosts, as the load needs.
+
+    JOB_QUEUE_ENABLED=1 streamlit run app.py     # web process: enqueue only
+    python worker.py --processes 4 --concurrency 8
+
+SIGTERM or Ctrl-C stops reading new jobs and finishes the running ones; jobs
+of a worker that is killed outright are picked up by the others after
+JOB_VISIBILITY_TIMEOUT_SECONDS.
+"""
+import argparse
+import multiprocessing
+import signal
+import threading
+import time
+
+from config.setting import WORKER_CONCURRENCY
+
+
+def serve(concurrency: int, stats_every: float):
+    from runtime.job_queue import Worker
+
+    worker = Worker(concurrency=concurrency)
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: worker.stop())
+
+    def report():
+        while True:
+            time.sleep(stats_every)
+            print(f"[{worker.name}] {worker.metrics()}", flush=True)
+
+    if stats_every > 0:
+        threading.Thread(target=report, name="worker-stats", daemon=True).start()
+    print(f"[{worker.name}] serving {worker.stream} as {worker.group}, up to {concurrency} jobs at a time", flush=True)
+    worker.run()
+    print(f"[{worker.name}] stopped: {worker.metrics()}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued agent jobs.")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes to start on this host")
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY, help="jobs at a time per process")
+    parser.add_argument("--stats-every", type=float, default=60.0, help="seconds between metrics lines (0: off)")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        serve(args.concurrency, args.stats_every)
+        return
+    processes = [multiprocessing.Process(target=serve, args=(args.concurrency, args.stats_every), name=f"worker-{i}")
+                 for i in range(args.processes)]
+    for p in processes:
+        p.start()
+    # Ctrl-C reaches the whole process group; SIGTERM to this process is passed on
+    signal.signal(signal.SIGTERM, lambda *_: [p.terminate() for p in processes if p.is_alive()])
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for p in processes:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()